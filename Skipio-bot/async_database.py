@@ -0,0 +1,284 @@
+import asyncio
+import itertools
+import logging
+import time
+import psycopg
+from contextlib import asynccontextmanager
+from psycopg_pool import AsyncConnectionPool
+from config import DB_POOL_MIN, DB_ASYNC_POOL_MAX, DB_PREPARED_STATEMENTS
+from database import get_db_dsn, get_session_options, QueryTimeout
+import queries
+import query_cache
+import query_stats
+
+logger = logging.getLogger(__name__)
+
+# --- ASYNC DATABASE LAYER ---
+# asyncio-native counterpart to database.py. Cogs await these helpers directly,
+# so a slow remote round trip suspends only the command that issued it instead
+# of blocking the event loop (heartbeats, autocomplete, other users' commands).
+#
+# Connections run in autocommit mode: the cogs only read, and skipping the
+# implicit BEGIN saves a round trip per command. Writers open an explicit
+# `async with conn.transaction():` block.
+
+
+pool_stats = {"stale_recycled": 0, "idle_checks": 0, "replayed": 0, "timed_out": 0, "pipelined": 0}
+
+
+def get_pool_stats():
+    stats = dict(pool_stats)
+    if _apool:
+        stats["connections_lost"] = _apool.get_stats().get("connections_lost", 0)
+    return stats
+
+
+class AsyncCursorWrapper:
+    def __init__(self, cur, db=None, cache_season=None, budget=None):
+        self.cur = cur
+        self.db = db
+        self.cache_season = cache_season
+        # One deadline for every statement run through this cursor
+        self.budget = budget
+        self.deadline = asyncio.get_running_loop().time() + budget if budget else None
+        self._rows = None  # result served from query_cache, consumed by the fetch* methods
+    async def execute(self, sql, params=None, prepare=None):
+        self._rows = None
+        if self.cache_season is None or not query_cache.enabled() or not query_cache.cacheable(sql):
+            return await self._execute(sql, params, prepare)
+        key = query_cache.make_key(sql, params)
+        rows = query_cache.get(key)
+        if rows is None:
+            await self._execute(sql, params, prepare)
+            rows = await self.cur.fetchall()
+            query_cache.put(key, rows, self.cache_season)
+        self._rows = iter(rows)
+    async def _execute(self, sql, params, prepare):
+        start = time.perf_counter()
+        try:
+            return await self._bounded(self.cur.execute(sql, params, prepare=prepare))
+        except (psycopg.OperationalError, psycopg.InterfaceError):
+            # Same contract as UnifiedCursorWrapper: a connection that died idle in
+            # the pool is swapped and the first statement replayed once.
+            if not self.db or not await self.db.reconnect():
+                raise
+            self.cur = self.db.conn.cursor()
+            pool_stats["replayed"] += 1
+            return await self._bounded(self.cur.execute(sql, params, prepare=prepare))
+        finally:
+            query_stats.record(sql, params, time.perf_counter() - start, self.cur.rowcount)
+            if self.db:
+                self.db.used = True
+    async def _bounded(self, coro):
+        # Cancelling psycopg's execute sends a cancel request to the server and
+        # waits for it, so the connection goes back to the pool idle rather than
+        # still busy with the abandoned statement. The same happens when the
+        # command task itself is cancelled.
+        if self.deadline is None:
+            return await coro
+        try:
+            return await asyncio.wait_for(coro, self.deadline - asyncio.get_running_loop().time())
+        except asyncio.TimeoutError:
+            pool_stats["timed_out"] += 1
+            raise QueryTimeout(self.budget) from None
+    async def fetch_batch(self, statements):
+        """Run independent SELECTs in a single round trip; returns each one's rows, in order.
+
+        `statements` are (sql, params) pairs or named() entries. Cached results are
+        served first; the misses are sent together in one psycopg pipeline. Later
+        statements must not depend on earlier ones' results.
+        """
+        statements = [(s[0], s[1], s[2] if len(s) > 2 else None) for s in statements]
+        results = [None] * len(statements)
+        keys = {}
+        if self.cache_season is not None and query_cache.enabled():
+            for i, (sql, params, _) in enumerate(statements):
+                if query_cache.cacheable(sql):
+                    keys[i] = query_cache.make_key(sql, params)
+                    results[i] = query_cache.get(keys[i])
+        misses = [i for i, rows in enumerate(results) if rows is None]
+        if not misses:
+            return results
+        start = time.perf_counter()
+        try:
+            fetched = await self._bounded(self._pipeline([statements[i] for i in misses]))
+        except (psycopg.OperationalError, psycopg.InterfaceError):
+            if not self.db or not await self.db.reconnect():
+                raise
+            self.cur = self.db.conn.cursor()
+            pool_stats["replayed"] += 1
+            fetched = await self._bounded(self._pipeline([statements[i] for i in misses]))
+        finally:
+            if self.db:
+                self.db.used = True
+        # One round trip served them all: split its time evenly for query_stats
+        share = (time.perf_counter() - start) / len(misses)
+        for i, rows in zip(misses, fetched):
+            results[i] = rows
+            query_stats.record(statements[i][0], statements[i][1], share, len(rows))
+            if i in keys:
+                query_cache.put(keys[i], rows, self.cache_season)
+        return results
+    async def _pipeline(self, statements):
+        conn = self.cur.connection
+        if len(statements) == 1 or not psycopg.AsyncPipeline.is_supported():
+            out = []
+            for sql, params, prepare in statements:
+                await self.cur.execute(sql, params, prepare=prepare)
+                out.append(await self.cur.fetchall())
+            return out
+        pool_stats["pipelined"] += 1
+        # A cursor only holds its latest result, so each statement gets its own.
+        # The first fetch sends the Sync and every result comes back with it.
+        async with conn.pipeline():
+            curs = []
+            for sql, params, prepare in statements:
+                cur = conn.cursor()
+                await cur.execute(sql, params, prepare=prepare)
+                curs.append(cur)
+            out = [await cur.fetchall() for cur in curs]
+        for cur in curs:
+            await cur.close()
+        return out
+    async def fetchone(self):
+        if self._rows is None:
+            return await self.cur.fetchone()
+        return next(self._rows, None)
+    async def fetchmany(self, size=0):
+        if self._rows is None:
+            return await self.cur.fetchmany(size)
+        return list(itertools.islice(self._rows, size or self.cur.arraysize))
+    async def fetchall(self):
+        if self._rows is None:
+            return await self.cur.fetchall()
+        return list(self._rows)
+    def __getattr__(self, name):
+        return getattr(self.cur, name)
+    async def __aiter__(self):
+        while (row := await self.fetchone()) is not None:
+            yield row
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.cur.close()
+
+
+class AsyncDBWrapper:
+    def __init__(self, conn, apool):
+        self.conn = conn
+        self.apool = apool
+        self.used = False
+    def cursor(self, cache_season=None, budget=None):
+        return AsyncCursorWrapper(self.conn.cursor(), db=self, cache_season=cache_season, budget=budget)
+    async def reconnect(self):
+        if self.used or not self.conn.closed:
+            return False
+        pool_stats["stale_recycled"] += 1
+        await self.apool.putconn(self.conn)  # the pool disposes of closed connections
+        # One dead idle connection usually means its siblings died with it (server
+        # restart, network blip): flush them before picking the replacement.
+        await self.apool.check()
+        self.conn = await self.apool.getconn()
+        return True
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+_apool = None
+_apool_lock = asyncio.Lock()
+
+
+async def get_async_pool():
+    global _apool
+    if _apool:
+        return _apool
+    async with _apool_lock:
+        if _apool:
+            return _apool
+        dsn = get_db_dsn()
+        if not dsn:
+            return None
+        kwargs = {"autocommit": True, "options": get_session_options()}
+        if not DB_PREPARED_STATEMENTS:
+            # Supabase's transaction-mode pooler does not keep server-side
+            # prepared statements between transactions.
+            kwargs["prepare_threshold"] = None
+        try:
+            apool = AsyncConnectionPool(
+                dsn, min_size=min(DB_POOL_MIN, DB_ASYNC_POOL_MAX), max_size=DB_ASYNC_POOL_MAX, open=False, kwargs=kwargs,
+            )
+            await apool.open()
+            _apool = apool
+            logger.info("Async database connection pool created")
+        except Exception as e:
+            logger.error("Failed to create async connection pool: %s", e)
+    return _apool
+
+
+@asynccontextmanager
+async def aget_conn():
+    """Borrow a pooled connection (AsyncDBWrapper); it is returned to the pool on exit."""
+    apool = await get_async_pool()
+    if not apool:
+        raise RuntimeError("Database is not configured or unreachable")
+    db = AsyncDBWrapper(await apool.getconn(), apool)
+    try:
+        yield db
+    finally:
+        await apool.putconn(db.conn)
+
+
+@asynccontextmanager
+async def acursor(cache_season=None, budget=None):
+    """Shortcut for the common `borrow a connection, open one cursor` pattern.
+
+    Pass the season a read-only command queries as `cache_season` to serve its
+    SELECTs through query_cache, and `budget` (seconds, see
+    utils.helpers.query_budget) to cancel statements still running past it.
+    """
+    async with aget_conn() as db:
+        async with db.cursor(cache_season=cache_season, budget=budget) as cur:
+            yield cur
+
+
+def named(name, params=(), season=None):
+    """A queries.CATALOG statement as a (sql, params, prepare) entry for fetch_batch().
+
+    psycopg 3 keeps a per-connection cache of prepared statements; prepare=True
+    puts catalog entries in it on first use rather than after prepare_threshold runs.
+    """
+    _, sql, sp = queries.resolve(name, season)
+    return sql, (*params, *sp), True if DB_PREPARED_STATEMENTS else None
+
+
+async def execute_named(cursor, name, params=(), season=None):
+    """Run a queries.CATALOG statement by name."""
+    sql, args, prepare = named(name, params, season)
+    return await cursor.execute(sql, args, prepare=prepare)
+
+
+async def fetchone(sql, params=None):
+    async with acursor() as cur:
+        await cur.execute(sql, params)
+        return await cur.fetchone()
+
+
+async def fetchall(sql, params=None):
+    async with acursor() as cur:
+        await cur.execute(sql, params)
+        return await cur.fetchall()
+
+
+async def check_idle_connections():
+    """Background liveness pass over idle async connections (see database.py)."""
+    if _apool:
+        pool_stats["idle_checks"] += 1
+        await _apool.check()
+
+
+async def close_async_pool():
+    global _apool
+    if _apool:
+        await _apool.close()
+        _apool = None
+        logger.info("Async database connection pool closed")
@@ -0,0 +1,222 @@
+"""Offline benchmark for the bot's queries, embeds and charts.
+
+Loads a synthetic league into a local Postgres, runs every command and chart
+against it and writes p50/p95 timings to JSON. Never point it at Supabase:
+loading drops and recreates the league tables.
+
+    cd Skipio-bot
+    python -m benchmark --dsn postgresql://postgres@localhost/skipio_bench \\
+        --scale 1 10 --repeat 20 --out bench.json
+    python -m benchmark --dsn ... --scale 1 --out after.json --baseline bench.json
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+import numpy as np
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmark", description=__doc__.splitlines()[0])
+    ap.add_argument("--dsn", default=os.getenv("BENCH_DB_URL"),
+                    help="Local Postgres to load into (default: $BENCH_DB_URL)")
+    ap.add_argument("--scale", type=int, nargs="+", default=[1],
+                    help="League sizes to run, in seasons of S25's size (default: 1)")
+    ap.add_argument("--teams", type=int, help="Teams per season (default: 36)")
+    ap.add_argument("--players-per-team", type=int, help="Players per team, sub included (default: 6)")
+    ap.add_argument("--weeks", type=int, help="Weeks per season (default: full round robin)")
+    ap.add_argument("--maps-per-match", type=int, help="Series length, BO<n> (default: 3)")
+    ap.add_argument("--rounds-to-win", type=int, help="Rounds needed to win a map (default: 13)")
+    ap.add_argument("--player-rounds", action="store_true", help="Also fill match_player_rounds")
+    ap.add_argument("--seed", type=int, help="Generator seed")
+    ap.add_argument("--repeat", type=int, default=20, help="Timed runs per scenario (default: 20)")
+    ap.add_argument("--warmup", type=int, default=2, help="Untimed runs per scenario first (default: 2)")
+    ap.add_argument("--only", nargs="+", metavar="PREFIX", help="Only scenarios starting with these prefixes")
+    ap.add_argument("--cache", action="store_true",
+                    help="Leave the query result cache on (measures warm hits instead of the database)")
+    ap.add_argument("--skip-load", action="store_true", help="Reuse the league already in the database")
+    ap.add_argument("--out", default="bench.json", help="Result file (default: bench.json)")
+    ap.add_argument("--baseline", help="Earlier result file to compare against")
+    ap.add_argument("--threshold", type=float, default=20.0,
+                    help="Flag p50/p95 slowdowns above this percentage (default: 20)")
+    return ap.parse_args(argv)
+
+
+def _local_dsn(dsn):
+    if not dsn:
+        sys.exit("No database: pass --dsn or set BENCH_DB_URL to a local Postgres.")
+    if "supabase" in dsn:
+        sys.exit("Refusing to load synthetic data into a Supabase database.")
+    # get_db_dsn() enforces sslmode=require; a local server usually has no TLS
+    if "sslmode" not in dsn:
+        dsn += ("&" if "?" in dsn else "?") + "sslmode=disable"
+    return dsn
+
+
+def _spec(args, scale):
+    spec = {"seasons": scale}
+    for key in ("teams", "players_per_team", "weeks", "maps_per_match", "rounds_to_win", "seed"):
+        if getattr(args, key) is not None:
+            spec[key] = getattr(args, key)
+    if args.player_rounds:
+        spec["player_rounds"] = True
+    return spec
+
+
+def _summary(samples, errors):
+    ms = np.array(samples) * 1000
+    return {
+        "runs": len(samples), "errors": errors,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "min_ms": round(float(ms.min()), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+async def _call(kind, fn):
+    """Run one scenario; returns True when the command reported an error."""
+    from benchmark.scenarios import BenchInteraction
+    if kind == "command":
+        interaction = BenchInteraction()
+        await fn(interaction)
+        return interaction.failed
+    result = fn()
+    if inspect.isawaitable(result):
+        await result
+    return False
+
+
+async def run_scale(args, scale):
+    import database
+    import async_database
+    import query_cache
+    from benchmark import synth, scenarios
+    from utils import elo_store
+
+    spec = _spec(args, scale)
+    entry = {"spec": {**synth.LEAGUE, **spec}}
+    if not args.skip_load:
+        # Connections from the previous scale hold prepared statements on dropped tables
+        await async_database.close_async_pool()
+        database.close_pool()
+        started = time.perf_counter()
+        conn = database.get_conn()
+        try:
+            entry["rows"] = synth.load(conn.conn, spec)
+        finally:
+            conn.close()
+        entry["load_s"] = round(time.perf_counter() - started, 2)
+        elo_store.reset()
+        print(f"[{scale}x] loaded in {entry['load_s']}s: "
+              + ", ".join(f"{k}={v}" for k, v in entry["rows"].items() if v))
+    query_cache.clear()
+    database.refresh_seasons()
+
+    targets = scenarios.pick_targets()
+    entry["targets"] = targets
+    entry["results"] = {}
+    for name, kind, fn in scenarios.build(targets):
+        if args.only and not any(name.startswith(p) for p in args.only):
+            continue
+        samples, errors = [], 0
+        for i in range(args.warmup + args.repeat):
+            if not args.cache:
+                query_cache.clear()
+            started = time.perf_counter()
+            try:
+                failed = await _call(kind, fn)
+            except Exception as e:
+                print(f"[{scale}x] {name}: {type(e).__name__}: {e}")
+                failed = True
+            elapsed = time.perf_counter() - started
+            if i >= args.warmup:
+                samples.append(elapsed)
+                errors += failed
+        entry["results"][name] = stats = _summary(samples, errors)
+        print(f"[{scale}x] {name:<26} p50 {stats['p50_ms']:>9.1f}ms  p95 {stats['p95_ms']:>9.1f}ms"
+              + (f"  errors {errors}" if errors else ""))
+    return entry
+
+
+def _meta(args):
+    import database
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    with database.get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SHOW server_version")
+        server = cursor.fetchone()[0]
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit, "python": platform.python_version(), "postgres": server,
+        "repeat": args.repeat, "warmup": args.warmup, "cache": args.cache,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print p50/p95 changes per scenario; returns the number flagged as slower."""
+    flagged = 0
+    for scale, entry in current["scales"].items():
+        base = baseline.get("scales", {}).get(scale)
+        if not base:
+            continue
+        print(f"\n[{scale}x] vs {baseline['meta'].get('commit') or 'baseline'}")
+        for name, now in entry["results"].items():
+            before = base["results"].get(name)
+            if not before:
+                continue
+            deltas = []
+            for key in ("p50_ms", "p95_ms"):
+                pct = (now[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+                deltas.append(pct)
+            slower = max(deltas) > threshold
+            flagged += slower
+            print(f"  {'▲' if slower else ' '} {name:<26} p50 {deltas[0]:+7.1f}%  p95 {deltas[1]:+7.1f}%")
+    return flagged
+
+
+async def main(args):
+    from async_database import close_async_pool
+    from database import close_pool
+    from utils.helpers import shutdown_db_executor
+
+    result = {"meta": _meta(args), "scales": {}}
+    try:
+        for scale in args.scale:
+            result["scales"][str(scale)] = await run_scale(args, scale)
+    finally:
+        await close_async_pool()
+        shutdown_db_executor()
+        close_pool()
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nWrote {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            flagged = compare(result, json.load(f), args.threshold)
+        print(f"\n{flagged} scenario(s) more than {args.threshold:g}% slower")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # config.py reads these at import time, so set them before any bot module loads
+    os.environ["SUPABASE_DB_URL"] = _local_dsn(args.dsn)
+    os.environ.pop("DB_CONNECTION_STRING", None)
+    os.environ.setdefault("DISCORD_TOKEN", "benchmark")  # config.py exits without one; never used
+    if not args.cache:
+        os.environ["QUERY_CACHE_TTL"] = "0"
+    os.environ.setdefault("SLOW_QUERY_MS", "1e9")  # timings go to the JSON, not the log
+    warnings.filterwarnings("ignore", message="Glyph .* missing from font")  # emoji chart titles
+    asyncio.run(main(args))
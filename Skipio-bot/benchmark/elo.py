@@ -0,0 +1,164 @@
+"""ELO engine benchmark: the NumPy engine against the per-appearance loop it replaced.
+
+Runs both on the synthetic league's match_stats_map rows (no database needed),
+checks that their outputs are identical and reports the speedup per scale.
+With --dsn it also loads the league into a local Postgres and checks the
+database path (raw scores worked out in SQL from the REAL adr/kast columns)
+against the legacy engine fed the rows psycopg2 returns. Like the main
+benchmark, that drops and recreates the league tables.
+
+    cd Skipio-bot
+    python -m benchmark.elo --scale 1 10 100 --out bench_elo.json
+    python -m benchmark.elo --scale 1 --dsn postgresql://postgres@localhost/skipio_bench
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("DISCORD_TOKEN", "benchmark")  # config.py exits without one; never used
+os.environ.setdefault("SUPABASE_DB_URL", "")
+
+from benchmark import synth  # noqa: E402
+from utils.elo import _rank_grp, calculate_skipio_elos, compute_skipio_elos  # noqa: E402
+
+
+def legacy_skipio_elos(rows, p_groups):
+    """The pre-vectorisation engine, kept verbatim as the reference output.
+
+    Rebuilds each player's running average from the full list on every
+    appearance, so it is quadratic in maps played per player.
+    """
+    grp_totals = {1: [0.0, 0], 2: [0.0, 0], 3: [0.0, 0], 4: [0.0, 0]}
+    lobby_scores = {}
+    appearances = []
+
+    for pid, mid, acs, kills, deaths, adr, kast in rows:
+        grp = p_groups.get(pid, 2)
+        kd = (kills / deaths) if deaths else (kills or 0)
+        raw = (acs or 0) * 0.40 + kd * 30 * 0.30 + (adr or 0) * 0.20 + (kast or 0) * 0.10
+        grp_totals[grp][0] += raw
+        grp_totals[grp][1] += 1
+        lobby_scores.setdefault((mid, grp), []).append(raw)
+        appearances.append((pid, mid, raw, grp))
+
+    grp_avgs = {g: (v[0] / v[1] if v[1] > 0 else 150.0) for g, v in grp_totals.items()}
+
+    player_history = {}
+    blended_acc = {}
+    appearances.sort(key=lambda x: x[1])
+
+    for pid, mid, raw, grp in appearances:
+        g_avg = grp_avgs[grp]
+        lobby = lobby_scores.get((mid, grp), [])
+        l_avg = sum(lobby) / len(lobby) if len(lobby) > 1 else g_avg
+        g_norm = (raw / g_avg * 100) if g_avg else 100.0
+        l_norm = (raw / l_avg * 100) if l_avg else 100.0
+        blended = g_norm * 0.5 + l_norm * 0.5
+        blended_acc.setdefault(pid, []).append(blended)
+        avg_so_far = sum(blended_acc[pid]) / len(blended_acc[pid])
+        player_history.setdefault(pid, []).append(round(1000 + (avg_so_far - 100) * 20))
+
+    return player_history, appearances
+
+
+def rated_players(result):
+    """A legacy result without the history it kept under player None.
+
+    Rows without a player still count towards the averages in both engines;
+    the NumPy one keeps no history for them.
+    """
+    history, appearances = result
+    return {p: h for p, h in history.items() if p is not None}, [a for a in appearances if a[0] is not None]
+
+
+def league_inputs(scale, seed=None):
+    """(rows, p_groups) shaped like calculate_skipio_elos' query results."""
+    tables, _ = synth.generate({"seasons": scale, **({"seed": seed} if seed is not None else {})})
+    columns, stats = tables["match_stats_map"]
+    pick = [columns.index(c) for c in ("player_id", "match_id", "acs", "kills", "deaths", "adr", "kast")]
+    rows = [tuple(r[i] for i in pick) for r in stats]
+    _, players = tables["players"]
+    return rows, {p[0]: _rank_grp(p[3]) for p in players}
+
+
+def database_check(dsn, scale, seed=None):
+    """Whether calculate_skipio_elos on the league loaded into `dsn` matches the legacy engine.
+
+    The legacy engine gets the stat rows as psycopg2 returns them, so adr and
+    kast arrive as the floats their REAL values print as, in the order the
+    database path rates them (match, map, player, a missing player first).
+    """
+    import psycopg2
+    from benchmark.__main__ import _local_dsn
+
+    conn = psycopg2.connect(_local_dsn(dsn))
+    try:
+        synth.load(conn, {"seasons": scale, **({"seed": seed} if seed is not None else {})})
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, rank FROM players")
+        p_groups = {pid: _rank_grp(rank) for pid, rank in cursor.fetchall()}
+        cursor.execute("""
+            SELECT msm.player_id, msm.match_id, msm.acs, msm.kills, msm.deaths, msm.adr, msm.kast
+            FROM match_stats_map msm JOIN matches m ON m.id = msm.match_id
+            WHERE m.status = 'completed'
+            ORDER BY msm.match_id, msm.map_index, msm.player_id NULLS FIRST
+        """)
+        expected = rated_players(legacy_skipio_elos(cursor.fetchall(), p_groups))
+        actual = calculate_skipio_elos(cursor)
+    finally:
+        conn.close()
+    return actual == expected and list(actual[0]) == list(expected[0])
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmark.elo", description=__doc__.splitlines()[0])
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100],
+                    help="League sizes, in seasons of S25's size (default: 1 10 100)")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per engine; the best is kept (default: 3)")
+    ap.add_argument("--seed", type=int, help="Generator seed")
+    ap.add_argument("--out", help="Write the timings to this JSON file")
+    ap.add_argument("--dsn", help="Also check the database path on this local Postgres (reloads its league)")
+    args = ap.parse_args(argv)
+
+    results, mismatches = {}, 0
+    for scale in args.scale:
+        rows, p_groups = league_inputs(scale, args.seed)
+        legacy_s, expected = _best_of(lambda: legacy_skipio_elos(rows, p_groups), args.repeat)
+        expected = rated_players(expected)
+        numpy_s, actual = _best_of(lambda: compute_skipio_elos(rows, p_groups), args.repeat)
+        identical = actual == expected and list(actual[0]) == list(expected[0])
+        mismatches += not identical
+        results[str(scale)] = {
+            "rows": len(rows), "players": len(expected[0]),
+            "legacy_ms": round(legacy_s * 1000, 3), "numpy_ms": round(numpy_s * 1000, 3),
+            "speedup": round(legacy_s / numpy_s, 2), "identical": identical,
+        }
+        r = results[str(scale)]
+        print(f"[{scale}x] {r['rows']:>8} rows  legacy {r['legacy_ms']:>10.1f}ms  numpy {r['numpy_ms']:>8.1f}ms  "
+              f"x{r['speedup']:<7} {'identical' if identical else 'OUTPUT DIFFERS'}")
+        if args.dsn:
+            identical = database_check(args.dsn, scale, args.seed)
+            mismatches += not identical
+            r["database_identical"] = identical
+            print(f"[{scale}x] database path {'identical' if identical else 'OUTPUT DIFFERS'}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.out}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
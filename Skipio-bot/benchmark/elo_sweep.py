@@ -0,0 +1,349 @@
+"""Skipio ELO formula sweep: scores raw-score weights, blend and scale by how well they predict map results.
+
+Every configuration rates the league with the Skipio formula
+(docs/SKIPIO_ELO_SYSTEM.md) and predicts each map from the two lineups' ELO
+before that match: the side with the higher average wins, with probability
+1 / (1 + 10^(-diff / 400)). Configurations are scored on accuracy and log
+loss and the Pareto-best ones are reported next to the live settings.
+
+    cd Skipio-bot
+    python -m benchmark.elo_sweep --scale 10 --out sweep.json
+    python -m benchmark.elo_sweep --dsn "$SUPABASE_DB_URL" --cache s25.npz --season S25
+
+--dsn only reads. --cache keeps the prepared stat arrays in a .npz file, so
+later sweeps over the same data skip the database (or the generator).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+os.environ.setdefault("DISCORD_TOKEN", "benchmark")  # config.py exits without one; never used
+os.environ.setdefault("SUPABASE_DB_URL", "")
+
+from benchmark import synth  # noqa: E402
+from utils.elo import _rank_grp, compute_skipio_elos  # noqa: E402
+
+# Raw-score inputs, in the order of the weights (K/D is pre-multiplied by 30 as in the formula)
+STATS = ("acs", "kd", "adr", "kast")
+LIVE = {"weights": (0.40, 0.30, 0.20, 0.10), "blend": 0.5, "scale": 20.0}
+# Upper bound on rows x configurations held in one array per worker
+SWEEP_CELLS = 4_000_000
+
+STAT_ROWS_SQL = """
+    SELECT msm.player_id, msm.match_id, COALESCE(msm.map_index, 0), msm.team_id,
+           COALESCE(msm.acs, 0), COALESCE(msm.kills, 0), COALESCE(msm.deaths, 0),
+           COALESCE(msm.adr, 0), COALESCE(msm.kast, 0), m.team1_id, mm.winner_id, p.rank
+    FROM match_stats_map msm
+    JOIN matches m ON m.id = msm.match_id
+    LEFT JOIN match_maps mm ON mm.match_id = msm.match_id AND mm.map_index = msm.map_index
+    LEFT JOIN players p ON p.id = msm.player_id
+    WHERE m.status = 'completed' AND {season_filter}
+"""
+
+
+# --- INPUTS ---
+# One row per stat line: (player_id, match_id, map_index, team_id, acs, kills,
+# deaths, adr, kast, match team1_id, map winner_id, player rank)
+
+def synthetic_rows(scale, seed=None):
+    tables, _ = synth.generate({"seasons": scale, **({"seed": seed} if seed is not None else {})})
+    col = {name: dict(zip(cols, range(len(cols)))) for name, (cols, _) in tables.items()}
+    team1 = {r[0]: r[col["matches"]["team1_id"]] for r in tables["matches"][1]}
+    winner = {(r[0], r[1]): r[col["match_maps"]["winner_id"]] for r in tables["match_maps"][1]}
+    rank = {r[0]: r[col["players"]["rank"]] for r in tables["players"][1]}
+    c = col["match_stats_map"]
+    return [
+        (r[c["player_id"]], r[c["match_id"]], r[c["map_index"]], r[c["team_id"]], r[c["acs"]], r[c["kills"]],
+         r[c["deaths"]], r[c["adr"]], r[c["kast"]], team1[r[c["match_id"]]],
+         winner.get((r[c["match_id"]], r[c["map_index"]])), rank[r[c["player_id"]]])
+        for r in tables["match_stats_map"][1]
+    ]
+
+
+def database_rows(dsn, season):
+    import psycopg2
+    conn = psycopg2.connect(dsn)
+    try:
+        cursor = conn.cursor()
+        if season == 'all':
+            cursor.execute(STAT_ROWS_SQL.format(season_filter="1=1"))
+        else:
+            cursor.execute(STAT_ROWS_SQL.format(season_filter="m.season_id = %s"), (season,))
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def prepare(rows):
+    """Stat arrays plus everything about the league that no configuration changes.
+
+    Rows are put in the engine's order (match, map, player), so the live
+    configuration rates the league exactly like utils/elo does.
+    """
+    rows = sorted(rows, key=lambda r: (r[1], r[2], r[0]))
+    pid, mid, map_index, team = (np.array([r[i] or 0 for r in rows], dtype=np.int64) for i in range(4))
+    acs, kills, deaths, adr, kast = (np.array([float(r[i] or 0) for r in rows]) for i in range(4, 9))
+    kd = np.where(deaths != 0, kills / np.where(deaths != 0, deaths, 1.0), kills)
+    groups = {}
+    grp = np.array([groups.setdefault(r[0], _rank_grp(r[11])) for r in rows], dtype=np.int64)
+    team1 = np.array([r[9] or 0 for r in rows], dtype=np.int64)
+    winner = np.array([r[10] or 0 for r in rows], dtype=np.int64)
+    return {
+        "pid": pid, "mid": mid, "grp": grp,
+        "stats": np.column_stack([acs, kd * 30, adr, kast]),
+        "map": np.unique(mid * 1000 + map_index, return_inverse=True)[1],
+        "side": (team != team1).astype(np.int64),
+        "team1_won": np.where(winner == 0, -1, (winner == team1).astype(np.int64)),
+    }
+
+
+def load_inputs(args):
+    if args.cache and os.path.exists(args.cache):
+        with np.load(args.cache) as cached:
+            return {name: cached[name] for name in cached.files}
+    rows = database_rows(args.dsn, args.season) if args.dsn else synthetic_rows(args.scale, args.seed)
+    if not rows:
+        sys.exit("No completed maps to sweep over.")
+    inputs = prepare(rows)
+    if args.cache:
+        np.savez(args.cache, **inputs)
+    return inputs
+
+
+# --- SWEEP ---
+
+class League:
+    """Index arrays shared by every configuration, built once per process."""
+
+    def __init__(self, inputs):
+        self.stats = inputs["stats"]
+        grp, pid, mid = inputs["grp"], inputs["pid"], inputs["mid"]
+        n = len(pid)
+
+        self.grp = grp
+        self.grp_cnt = np.bincount(grp, minlength=5)
+        lobby_key, self.lobby = np.unique(mid * 5 + grp, return_inverse=True)
+        self.lobby_cnt = np.bincount(self.lobby)
+        self.lobby_grp = lobby_key % 5
+
+        # Per-player running means are cumulative sums over this order, reset at each player
+        self.by_player = np.argsort(pid, kind="stable")
+        p_sorted = pid[self.by_player]
+        first = np.r_[True, p_sorted[1:] != p_sorted[:-1]]
+        seg_start = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+        self.seg_start = seg_start
+
+        # Rating before each row's match: the mean over the player's appearances
+        # in earlier matches, i.e. cumulative-sum positions (seg_start, prev]
+        m_sorted = mid[self.by_player]
+        new_match = first | np.r_[True, m_sorted[1:] != m_sorted[:-1]]
+        match_start = np.maximum.accumulate(np.where(new_match, np.arange(n), 0))
+        prev = np.full(n, -1)
+        prev[self.by_player] = np.where(match_start > seg_start, match_start - 1, -1)
+        rated = np.flatnonzero(prev >= 0)
+        self.pre_hi = prev[rated] + 1  # offsets into the cumulative sum with a leading zero row
+        self.pre_lo = seg_start[prev[rated]]
+        self.pre_cnt = (self.pre_hi - self.pre_lo)[:, None]
+
+        # Map sides: slot = map * 2 + side. Unrated players sit at the baseline and
+        # add nothing; a map counts when both sides have a rated player
+        slot = inputs["map"] * 2 + inputs["side"]
+        n_slots = 2 * (int(inputs["map"].max()) + 1)
+        self.pre_slot = slot[rated]
+        self.n_slots = n_slots
+        self.slot_cnt = np.maximum(np.bincount(slot, minlength=n_slots), 1)[:, None]
+        has_rated = np.bincount(self.pre_slot, minlength=n_slots) > 0
+        outcome = np.full(n_slots // 2, -1)
+        outcome[inputs["map"]] = inputs["team1_won"]
+        self.maps = np.flatnonzero(has_rated[0::2] & has_rated[1::2] & (outcome >= 0))
+        self.team1_won = outcome[self.maps].astype(bool)
+
+    def norms(self, weights):
+        """(global, lobby) normalised scores for each row under each weight vector: two (rows, k) arrays."""
+        raw = self.stats @ weights.T
+        k = raw.shape[1]
+        grp_sum = np.zeros((5, k))
+        np.add.at(grp_sum, self.grp, raw)
+        grp_avg = np.where(self.grp_cnt[:, None] > 0, grp_sum / np.maximum(self.grp_cnt, 1)[:, None], 150.0)
+        lobby_sum = np.zeros((len(self.lobby_cnt), k))
+        np.add.at(lobby_sum, self.lobby, raw)
+        lobby_avg = np.where(self.lobby_cnt[:, None] > 1, lobby_sum / self.lobby_cnt[:, None],
+                             grp_avg[self.lobby_grp])
+        # Averages are per group / lobby, so divide there and only multiply per row;
+        # a zero average scores 100 like the engine's guard
+        norms = []
+        for avg, index in ((grp_avg, self.grp), (lobby_avg, self.lobby)):
+            nonzero = avg != 0
+            factor = np.divide(100.0, avg, out=np.zeros_like(avg), where=nonzero)
+            norm = raw * factor[index]
+            if not nonzero.all():
+                norm += np.where(nonzero, 0.0, 100.0)[index]
+            norms.append(norm)
+        return tuple(norms)
+
+    def running(self, norm):
+        """Running mean per player after each appearance, in by_player order."""
+        total = np.cumsum(norm[self.by_player], axis=0)
+        before = np.where(self.seg_start[:, None] > 0, total[self.seg_start - 1], 0.0)
+        return (total - before) / (np.arange(len(total)) - self.seg_start + 1)[:, None]
+
+    def edge(self, norm):
+        """Pre-match side difference (team 1 minus team 2) of mean (B - 100), per counted map."""
+        total = np.zeros((len(norm) + 1, norm.shape[1]))
+        np.cumsum(norm[self.by_player], axis=0, out=total[1:])
+        pre = (total[self.pre_hi] - total[self.pre_lo]) / self.pre_cnt - 100
+        side_sum = np.zeros((self.n_slots, norm.shape[1]))
+        np.add.at(side_sum, self.pre_slot, pre)
+        side = side_sum / self.slot_cnt
+        return side[2 * self.maps] - side[2 * self.maps + 1]
+
+
+_league = None
+
+
+def _init_worker(inputs):
+    global _league
+    _league = League(inputs)
+
+
+def _score_block(job):
+    """Accuracy and log loss for weights x blends x scales: an array (k, blends, scales, 2)."""
+    weights, blends, scales = job
+    g_edge, l_edge = (_league.edge(norm) for norm in _league.norms(weights))
+    won = _league.team1_won[:, None]
+    out = np.empty((len(weights), len(blends), len(scales), 2))
+    for b, blend in enumerate(blends):
+        # The blend is linear all the way to the side averages, so it is applied last
+        edge = g_edge * blend + l_edge * (1 - blend)
+        out[:, b, :, 0] = (np.where(edge == 0, 0.5, (edge > 0) == won)).mean(axis=0)[:, None]
+        # Log loss of the logistic forecast at ELO difference edge * scale:
+        # log(1 + e^-z) with z the winner's margin, in float32 (the scores need no more)
+        margin = (np.where(won, edge, -edge) * (np.log(10) / 400)).astype(np.float32)
+        for s, scale in enumerate(scales):
+            z = margin * np.float32(scale)
+            out[:, b, s, 1] = (np.log1p(np.exp(-np.abs(z))) + np.maximum(-z, 0)).mean(axis=0)
+    return out
+
+
+def weight_grid(step):
+    """Weight vectors on the simplex (they sum to 1; scaling all four changes no normalised score)."""
+    n = round(1 / step)
+    return np.array([(a, b, c, n - a - b - c) for a in range(n + 1) for b in range(n + 1 - a)
+                     for c in range(n + 1 - a - b)], dtype=float) / n
+
+
+def sweep(inputs, weights, blends, scales, workers):
+    rows = len(inputs["pid"])
+    # Bounded by memory, and at least one block per worker
+    per_block = max(1, min(SWEEP_CELLS // rows, -(-len(weights) // workers)))
+    jobs = [(weights[i:i + per_block], blends, scales) for i in range(0, len(weights), per_block)]
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(inputs,)) as pool:
+            return np.concatenate(list(pool.map(_score_block, jobs)))
+    _init_worker(inputs)
+    return np.concatenate([_score_block(job) for job in jobs])
+
+
+def pareto(scores):
+    """Indices of configurations no other one beats on both accuracy and log loss."""
+    order = np.lexsort((-scores[:, 0], scores[:, 1]))  # log loss ascending, accuracy descending on ties
+    front, best_acc = [], -1.0
+    for i in order:
+        if scores[i, 0] > best_acc:
+            front.append(i)
+            best_acc = scores[i, 0]
+    return front
+
+
+def check_against_engine(league, inputs):
+    """Largest ELO gap between the live configuration here and utils/elo.compute_skipio_elos."""
+    g_norm, l_norm = league.norms(np.array([LIVE["weights"]]))
+    blended = g_norm * LIVE["blend"] + l_norm * (1 - LIVE["blend"])
+    elo = np.round(1000 + (league.running(blended)[:, 0] - 100) * LIVE["scale"])
+    last = np.r_[league.seg_start[1:] != league.seg_start[:-1], True]
+    ours = dict(zip(inputs["pid"][league.by_player][last].tolist(), elo[last].astype(int).tolist()))
+    # K/D is fed in as kills with one death, so the engine sees the same value
+    stats = inputs["stats"]
+    rows = list(zip(inputs["pid"].tolist(), inputs["mid"].tolist(), stats[:, 0].tolist(),
+                    (stats[:, 1] / 30).tolist(), [1] * len(stats), stats[:, 2].tolist(), stats[:, 3].tolist()))
+    p_groups = dict(zip(inputs["pid"].tolist(), inputs["grp"].tolist()))
+    history, _ = compute_skipio_elos(rows, p_groups)
+    return max(abs(ours[pid] - elos[-1]) for pid, elos in history.items())
+
+
+def _config(weights, blend, scale):
+    return {**dict(zip(STATS, (round(float(w), 4) for w in weights))), "blend": blend, "scale": scale}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmark.elo_sweep", description=__doc__.splitlines()[0])
+    ap.add_argument("--dsn", help="Postgres to read completed maps from (default: a synthetic league)")
+    ap.add_argument("--season", default="all", help="Season to read with --dsn (default: all)")
+    ap.add_argument("--scale", type=int, default=10, help="Synthetic league size in seasons (default: 10)")
+    ap.add_argument("--seed", type=int, help="Generator seed")
+    ap.add_argument("--cache", help="Load the stat arrays from this .npz file, or save them there")
+    ap.add_argument("--step", type=float, default=0.05, help="Weight grid step (default: 0.05)")
+    ap.add_argument("--blends", type=float, nargs="+", default=[round(b * 0.1, 1) for b in range(11)],
+                    help="Share of the global rank-group comparison (default: 0 0.1 ... 1)")
+    ap.add_argument("--scales", type=float, nargs="+", default=[10, 15, 20, 25, 30, 40],
+                    help="ELO points per 1%% above peers (default: 10 15 20 25 30 40)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes (default: all cores)")
+    ap.add_argument("--top", type=int, default=15, help="Pareto settings to print (default: 15)")
+    ap.add_argument("--out", help="Write the scores and the Pareto front to this JSON file")
+    args = ap.parse_args(argv)
+
+    started = time.perf_counter()
+    inputs = load_inputs(args)
+    loaded_s = time.perf_counter() - started
+    league = League(inputs)
+    drift = check_against_engine(league, inputs)
+    if drift > 1:
+        print(f"Sweep kernel differs from utils/elo by up to {drift} ELO; fix it before trusting the scores.")
+        return 1
+
+    weights = weight_grid(args.step)
+    live_w = np.array(LIVE["weights"])
+    if not np.isclose(weights, live_w).all(axis=1).any():
+        weights = np.vstack([weights, live_w])
+    blends = sorted(set(args.blends) | {LIVE["blend"]})
+    scales = sorted(set(args.scales) | {LIVE["scale"]})
+
+    started = time.perf_counter()
+    scores = sweep(inputs, weights, np.array(blends), np.array(scales), args.workers)
+    sweep_s = time.perf_counter() - started
+
+    flat = scores.reshape(-1, 2)
+    front = pareto(flat)
+    live = np.ravel_multi_index((int(np.isclose(weights, live_w).all(axis=1).argmax()),
+                                 blends.index(LIVE["blend"]), scales.index(LIVE["scale"])), scores.shape[:3])
+
+    def entry(i):
+        w, b, s = np.unravel_index(i, scores.shape[:3])
+        return {**_config(weights[w], blends[b], scales[s]),
+                "accuracy": round(float(flat[i, 0]), 4), "log_loss": round(float(flat[i, 1]), 4)}
+
+    print(f"{len(inputs['pid'])} stat rows, {len(league.maps)} maps scored · {len(flat)} configurations "
+          f"in {sweep_s:.1f}s on {args.workers} worker(s) (inputs {loaded_s:.1f}s)")
+    print("live   " + "  ".join(f"{k} {v}" for k, v in entry(live).items()))
+    print(f"Pareto front ({len(front)} settings, best accuracy first):")
+    for i in sorted(front, key=lambda i: -flat[i, 0])[:args.top]:
+        print("       " + "  ".join(f"{k} {v}" for k, v in entry(i).items()))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "rows": len(inputs["pid"]), "maps": len(league.maps), "configurations": len(flat),
+                "sweep_s": round(sweep_s, 2), "workers": args.workers,
+                "live": entry(live), "pareto": [entry(i) for i in front],
+            }, f, indent=2)
+        print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
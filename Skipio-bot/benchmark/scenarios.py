@@ -0,0 +1,162 @@
+import types
+import discord
+from database import get_conn, get_default_season
+from queries import season_params
+
+# --- BENCHMARK SCENARIOS ---
+# Slash commands are driven through their callbacks with a recording
+# interaction, so the measured time covers everything a user waits for except
+# Discord itself: queries, result shaping, embed and chart rendering. Embed
+# builders, chart generators, autocomplete lookups and the ELO replay are
+# timed directly as the DB executor would run them.
+
+
+class _Followup:
+    def __init__(self, sent):
+        self.sent = sent
+
+    async def send(self, content=None, embed=None, **kwargs):
+        self.sent.append(content if embed is None else embed)
+
+
+class _Response:
+    def __init__(self, sent):
+        self.sent = sent
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def defer(self, **kwargs):
+        self.done = True
+
+    async def send_message(self, content=None, embed=None, **kwargs):
+        self.done = True
+        self.sent.append(content if embed is None else embed)
+
+    async def edit_message(self, **kwargs):
+        self.done = True
+
+
+class BenchInteraction:
+    """Just enough of discord.Interaction for the cogs' callbacks."""
+    def __init__(self):
+        self.sent = []
+        self.followup = _Followup(self.sent)
+        self.response = _Response(self.sent)
+        self.created_at = discord.utils.utcnow()
+        self.type = discord.InteractionType.application_command
+        self.user = types.SimpleNamespace(id=1, display_name="benchmark", roles=[])
+        self.channel_id = 1
+
+    @property
+    def failed(self):
+        return any(isinstance(m, str) and m.startswith("❌") for m in self.sent)
+
+
+class BenchBot:
+    """No gateway: avatar lookups resolve to None, as for users the bot cannot see."""
+    loop = None
+
+    def get_user(self, user_id):
+        return None
+
+    async def fetch_user(self, user_id):
+        raise discord.NotFound(types.SimpleNamespace(status=404, reason="benchmark"), "no gateway")
+
+
+def pick_targets():
+    """The busiest team of the active season, one of its players and one of its matches."""
+    season = get_default_season()
+    sf, sp = season_params(season)
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT t.id, t.name, t.tag, COUNT(*) AS played
+            FROM matches m JOIN teams t ON t.id IN (m.team1_id, m.team2_id)
+            WHERE m.status = 'completed' AND {sf}
+            GROUP BY t.id, t.name, t.tag ORDER BY played DESC, t.id LIMIT 2
+        """, sp)
+        (tid, tname, ttag, _), (_, other, _, _) = cursor.fetchall()
+        cursor.execute(f"""
+            SELECT p.id, p.name FROM match_stats_map msm
+            JOIN matches m ON msm.match_id = m.id JOIN players p ON msm.player_id = p.id
+            WHERE msm.team_id = %s AND {sf}
+            GROUP BY p.id, p.name ORDER BY COUNT(*) DESC, p.id LIMIT 2
+        """, (tid, *sp))
+        (pid, pname), (_, pname2) = cursor.fetchall()
+        cursor.execute(f"""
+            SELECT m.id FROM matches m
+            WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
+            ORDER BY m.id DESC LIMIT 1
+        """, (tid, tid, *sp))
+        mid = cursor.fetchone()[0]
+    return {"season": season, "team_id": tid, "team": tname, "tag": ttag, "team2": other,
+            "player_id": pid, "player": pname, "player2": pname2, "match_id": mid}
+
+
+def build(t):
+    """[(name, kind, callable)] for the targets from pick_targets().
+
+    kind is "command" (async callback, takes the interaction) or "sync".
+    """
+    from cogs.analytics import AnalyticsCog
+    from cogs.players import PlayersCog
+    from cogs.teams import TeamsCog
+    from cogs.elo_commands import EloCog
+    from cogs.matches import MatchesCog
+    from cogs.ai import AICog
+    from ui.embeds import get_match_overview_embed, get_match_performance_embed, get_match_rounds_embed
+    from utils.charts import (generate_radar_chart, generate_player_chart, generate_team_map_chart,
+                              generate_match_economy_chart)
+    from utils.autocomplete import _fetch_team_choices, _fetch_player_choices, _fetch_match_choices
+    from utils.elo import load_skipio_elos
+    from utils.elo_store import rebuild_scope, rebuild_all
+
+    bot = BenchBot()
+    analytics, players, teams = AnalyticsCog(bot), PlayersCog(bot), TeamsCog(bot)
+    elo, matches, ai = EloCog(bot), MatchesCog(bot), AICog(bot)
+
+    def command(cog, command_name, **kwargs):
+        cmd = getattr(cog, command_name)
+        return lambda interaction: cmd.callback(cog, interaction, **kwargs)
+
+    s = t["season"]
+    return [
+        ("scout", "command", command(analytics, "scout", team=t["team"])),
+        ("scout[all]", "command", command(analytics, "scout", team=t["tag"], season="all")),
+        ("standings", "command", command(analytics, "standings", group="Sun")),
+        ("leaderboard", "command", command(analytics, "leaderboard")),
+        ("leaderboard[role]", "command", command(analytics, "leaderboard", role="duelist", season="all")),
+        ("stats", "command", command(analytics, "stats", name=t["player"])),
+        ("player_info", "command", command(players, "player_info", name=t["player"])),
+        ("player_info[all]", "command", command(players, "player_info", name=t["player"], season="all")),
+        ("compare_players", "command", command(players, "compare_players", player1=t["player"], player2=t["player2"])),
+        ("team_info", "command", command(teams, "team_info", name=t["team"])),
+        ("team_info[all]", "command", command(teams, "team_info", name=t["tag"], season="all")),
+        ("compare_teams", "command", command(teams, "compare_teams", team1=t["team"], team2=t["team2"])),
+        ("elo", "command", command(elo, "elo", name=t["player"])),
+        ("elo[all]", "command", command(elo, "elo", name=t["player"], season="all")),
+        ("skipio_leaderboard", "command", command(elo, "skipio_leaderboard")),
+        ("skipio_leaderboard[all]", "command", command(elo, "skipio_leaderboard", season="all")),
+        ("meta_stats", "command", command(matches, "meta_stats")),
+        ("map_analytics", "command", command(matches, "map_analytics", team=t["team"])),
+        ("match_result", "command", command(matches, "match_result", match_id=t["match_id"])),
+        ("match_flow", "command", command(matches, "match_flow", match_id=str(t["match_id"]))),
+        ("stats_chart", "command", command(ai, "stats_chart", name=t["player"])),
+        ("embed.match_overview", "sync", lambda: get_match_overview_embed(t["match_id"])),
+        ("embed.match_performance", "sync", lambda: get_match_performance_embed(t["match_id"])),
+        ("embed.match_rounds", "sync", lambda: get_match_rounds_embed(t["match_id"])),
+        ("chart.radar", "sync", lambda: generate_radar_chart(t["player_id"], s)),
+        ("chart.player_acs", "sync", lambda: generate_player_chart(t["player_id"], s, "acs")),
+        ("chart.team_maps", "sync", lambda: generate_team_map_chart(t["team_id"], s)),
+        ("chart.match_economy", "sync", lambda: generate_match_economy_chart(t["match_id"])),
+        ("autocomplete.team", "sync", lambda: _fetch_team_choices("Team 1")),
+        ("autocomplete.player", "sync", lambda: _fetch_player_choices("Player1")),
+        ("autocomplete.match", "sync", lambda: _fetch_match_choices("")),
+        ("elo.replay", "sync", lambda: load_skipio_elos(s)),
+        ("elo.replay[all]", "sync", lambda: load_skipio_elos("all")),
+        ("elo.store_rebuild", "sync", lambda: rebuild_scope(s)),
+        ("elo.store_rebuild[all]", "sync", lambda: rebuild_scope("all")),
+        ("elo.store_rebuild[every]", "sync", rebuild_all),
+    ]
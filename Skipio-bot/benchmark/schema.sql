@@ -0,0 +1,123 @@
+-- Local stand-in for the Supabase tables the bot reads and writes.
+-- Column names and types follow the portal's inserts (src/app/api/admin/maps/save)
+-- and the bot's queries; columns nothing here touches are left out. Only the
+-- primary keys are declared, as in production.
+
+DROP TABLE IF EXISTS match_player_rounds, match_rounds, match_stats_map, match_maps,
+    matches, player_team_history, players, teams, seasons CASCADE;
+-- The bot's derived tables, recreated from ../elo_store.sql after this file
+DROP TABLE IF EXISTS skipio_elo_history, skipio_elo_ratings, skipio_elo_scopes;
+
+CREATE TABLE seasons (
+    id          TEXT PRIMARY KEY,
+    name        TEXT,
+    is_active   BOOLEAN DEFAULT FALSE,
+    winner_id   BIGINT
+);
+
+CREATE TABLE teams (
+    id          BIGINT PRIMARY KEY,
+    name        TEXT,
+    tag         TEXT,
+    group_name  TEXT
+);
+
+CREATE TABLE players (
+    id              BIGINT PRIMARY KEY,
+    name            TEXT,
+    riot_id         TEXT,
+    rank            TEXT,
+    uuid            TEXT,
+    puuid           TEXT,
+    default_team_id BIGINT
+);
+
+CREATE TABLE player_team_history (
+    player_id   BIGINT,
+    team_id     BIGINT,
+    season_id   TEXT,
+    is_current  BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE matches (
+    id            BIGINT PRIMARY KEY,
+    week          INTEGER,
+    group_name    TEXT,
+    team1_id      BIGINT,
+    team2_id      BIGINT,
+    winner_id     BIGINT,
+    score_t1      INTEGER,
+    score_t2      INTEGER,
+    status        TEXT,
+    season_id     TEXT,
+    match_type    TEXT DEFAULT 'regular',
+    format        TEXT DEFAULT 'BO3',
+    maps_played   INTEGER,
+    is_forfeit    INTEGER DEFAULT 0,
+    playoff_round INTEGER,
+    bracket_pos   INTEGER,
+    reported      BOOLEAN DEFAULT FALSE,
+    channel_id    TEXT,
+    submitter_id  TEXT
+);
+
+CREATE TABLE match_maps (
+    match_id     BIGINT,
+    map_index    INTEGER,
+    map_name     TEXT,
+    team1_rounds INTEGER,
+    team2_rounds INTEGER,
+    winner_id    BIGINT,
+    is_forfeit   INTEGER DEFAULT 0
+);
+
+CREATE TABLE match_stats_map (
+    match_id         BIGINT,
+    map_index        INTEGER,
+    team_id          BIGINT,
+    player_id        BIGINT,
+    is_sub           INTEGER DEFAULT 0,
+    subbed_for_id    BIGINT,
+    agent            TEXT,
+    acs              INTEGER,
+    kills            INTEGER,
+    deaths           INTEGER,
+    assists          INTEGER,
+    adr              REAL,
+    kast             REAL,
+    hs_pct           REAL,
+    fk               INTEGER,
+    fd               INTEGER,
+    mk               INTEGER,
+    dd_delta         REAL,
+    plants           INTEGER,
+    defuses          INTEGER,
+    survived         INTEGER,
+    traded           INTEGER,
+    clutches         INTEGER,
+    clutches_details JSONB,
+    ability_casts    JSONB
+);
+
+CREATE TABLE match_rounds (
+    match_id        BIGINT,
+    map_index       INTEGER,
+    round_number    INTEGER,
+    winning_team_id BIGINT,
+    win_type        TEXT,
+    plant           BOOLEAN,
+    defuse          BOOLEAN,
+    economy_t1      INTEGER,
+    economy_t2      INTEGER
+);
+
+CREATE TABLE match_player_rounds (
+    match_id     BIGINT,
+    map_index    INTEGER,
+    round_number INTEGER,
+    player_id    BIGINT,
+    kills        INTEGER,
+    damage       INTEGER,
+    weapon       TEXT,
+    spent        INTEGER
+);
@@ -0,0 +1,218 @@
+import io
+import math
+import random
+from pathlib import Path
+
+# --- SYNTHETIC LEAGUE ---
+# One season is sized like S25: four groups of nine teams playing a single
+# round robin, BO3 series, five starters plus a sub per team. `seasons` is the
+# scale knob (1x, 10x, 100x of a season) so the history the season='all' and
+# ELO queries scan grows the way it does in production. The first season is
+# S23 and, like the real one, leaves matches.season_id NULL unless it is the
+# only (active) season.
+LEAGUE = {
+    "seasons": 1,
+    "teams": 36,
+    "groups": 4,
+    "players_per_team": 6,     # five starters + one sub
+    "weeks": None,             # None = full round robin
+    "maps_per_match": 3,       # BO3
+    "rounds_to_win": 13,
+    "player_rounds": False,    # match_player_rounds is ~10 rows per round; off by default
+    "seed": 25,
+}
+
+SCHEMA = Path(__file__).with_name("schema.sql")
+ELO_SCHEMA = Path(__file__).parent.parent / "elo_store.sql"  # the bot's own tables
+GROUPS = ["Sun", "Moon", "Star", "Shadow"]
+MAPS = ["Ascent", "Bind", "Haven", "Split", "Lotus", "Sunset", "Icebox"]
+AGENTS = ["Jett", "Raze", "Reyna", "Neon", "Sova", "Skye", "Fade", "KAY/O",
+          "Omen", "Brimstone", "Clove", "Killjoy", "Cypher", "Viper"]
+RANKS = ["Iron 2", "Bronze 3", "Silver 1", "Gold 2", "Gold 3", "Platinum 1", "Diamond 2",
+         "Ascendant 1", "Immortal 2", "Immortal 3", "Radiant", None]
+WIN_TYPES = ["Elimination", "Elimination", "Elimination", "Bomb detonated", "Bomb defused", "Time ran out"]
+WEAPONS = ["Vandal", "Phantom", "Operator", "Sheriff", "Spectre", "Ghost"]
+
+
+def season_ids(n):
+    return [f"S{23 + i}" for i in range(n)]
+
+
+def _round_robin(team_ids):
+    """Circle-method weekly pairings; an odd group gets a bye each week."""
+    teams = list(team_ids) + ([None] if len(team_ids) % 2 else [])
+    weeks = []
+    for _ in range(len(teams) - 1):
+        half = len(teams) // 2
+        weeks.append([(a, b) for a, b in zip(teams[:half], reversed(teams[half:])) if a and b])
+        teams = [teams[0], teams[-1], *teams[1:-1]]
+    return weeks
+
+
+def _copy(cursor, table, columns, rows):
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join("\\N" if v is None else str(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+
+
+def generate(spec=None):
+    """Build the synthetic league in memory: {table: (columns, rows)} plus a summary."""
+    spec = {**LEAGUE, **(spec or {})}
+    rng = random.Random(spec["seed"])
+    sids = season_ids(spec["seasons"])
+    n_teams, per_team = spec["teams"], spec["players_per_team"]
+    to_win = spec["rounds_to_win"]
+    maps_max = spec["maps_per_match"]
+    needed = maps_max // 2 + 1
+
+    teams, players, skill = [], [], {}
+    rosters = {}
+    for t in range(1, n_teams + 1):
+        teams.append((t, f"Team {t}", f"T{t}", GROUPS[(t - 1) % spec["groups"] % len(GROUPS)]))
+        rosters[t] = []
+        for slot in range(per_team):
+            pid = (t - 1) * per_team + slot + 1
+            skill[pid] = rng.gauss(0, 1)
+            players.append([pid, f"Player{pid}", f"Player{pid}#FLV", rng.choice(RANKS),
+                            str(10 ** 17 + pid), None, t])
+            rosters[t].append(pid)
+
+    by_group = {}
+    for tid, _, _, group in teams:
+        by_group.setdefault(group, []).append(tid)
+
+    seasons, history, matches, maps, stats, rounds, player_rounds = [], [], [], [], [], [], []
+    mid = 0
+    for si, sid in enumerate(sids):
+        active = si == len(sids) - 1
+        seasons.append((sid, f"Season {sid[1:]}", active, None))
+        # A couple of transfers between seasons so roster history differs from default_team_id
+        if si:
+            for _ in range(max(1, n_teams // 6)):
+                a, b = rng.sample(range(1, n_teams + 1), 2)
+                i, j = rng.randrange(per_team), rng.randrange(per_team)
+                rosters[a][i], rosters[b][j] = rosters[b][j], rosters[a][i]
+        for tid, pids in rosters.items():
+            history.extend((pid, tid, sid, active) for pid in pids)
+
+        for group, tids in by_group.items():
+            schedule = _round_robin(tids)[:spec["weeks"]]
+            for week, pairs in enumerate(schedule, 1):
+                # The active season's last week is still to be played
+                played = not (active and week == len(schedule) and len(schedule) > 1)
+                for t1, t2 in pairs:
+                    mid += 1
+                    match_sid = None if sid == "S23" and not active else sid
+                    if not played:
+                        matches.append((mid, week, group, t1, t2, None, None, None, "scheduled", match_sid,
+                                        "regular", f"BO{maps_max}", None, 0))
+                        continue
+                    strength = {t: sum(skill[p] for p in rosters[t][:5]) / 5 for t in (t1, t2)}
+                    p_t1 = 1 / (1 + math.exp(-(strength[t1] - strength[t2]) * 1.5))
+                    wins = {t1: 0, t2: 0}
+                    pool = rng.sample(MAPS, maps_max)
+                    for mi in range(maps_max):
+                        if max(wins.values()) == needed:
+                            break
+                        map_winner = t1 if rng.random() < p_t1 else t2
+                        wins[map_winner] += 1
+                        loser_rounds = rng.randint(0, to_win - 2) if rng.random() < 0.85 else None
+                        if loser_rounds is None:  # overtime
+                            ot = rng.randint(0, 3)
+                            w_r, l_r = to_win + 1 + ot, to_win - 1 + ot
+                        else:
+                            w_r, l_r = to_win, loser_rounds
+                        r1, r2 = (w_r, l_r) if map_winner == t1 else (l_r, w_r)
+                        maps.append((mid, mi, pool[mi], r1, r2, map_winner, 0))
+                        total = r1 + r2
+
+                        order = [t1] * (r1 - (map_winner == t1)) + [t2] * (r2 - (map_winner == t2))
+                        rng.shuffle(order)
+                        order.append(map_winner)
+                        for rn, rw in enumerate(order, 1):
+                            wt = rng.choice(WIN_TYPES)
+                            rounds.append((mid, mi, rn, rw, wt, wt in ("Bomb detonated", "Bomb defused"),
+                                           wt == "Bomb defused", rng.randint(0, 9000), rng.randint(0, 9000)))
+
+                        for tid in (t1, t2):
+                            lineup = rosters[tid][:5]
+                            sub_for = None
+                            if per_team > 5 and rng.random() < 0.1:
+                                sub_for = rng.choice(lineup)
+                                lineup = [p for p in lineup if p != sub_for] + [rosters[tid][5]]
+                            own = r1 if tid == t1 else r2
+                            for pid in lineup:
+                                acs = max(60, int(rng.gauss(200 + 35 * skill[pid] + 2 * (own - total / 2), 45)))
+                                kills = max(0, int(rng.gauss(total * 0.7 * acs / 200, 3)))
+                                deaths = max(0, int(rng.gauss(total * 0.68 * 200 / acs, 3)))
+                                is_sub = int(sub_for is not None and pid == rosters[tid][5])
+                                stats.append((
+                                    mid, mi, tid, pid, is_sub, sub_for if is_sub else None,
+                                    rng.choice(AGENTS), acs, kills, deaths, rng.randint(0, 12),
+                                    round(acs * rng.uniform(0.6, 0.72), 1), round(rng.uniform(55, 90), 1),
+                                    round(rng.uniform(10, 40), 1), rng.randint(0, 6), rng.randint(0, 6),
+                                    rng.randint(0, 4), round((kills - deaths) * rng.uniform(8, 14), 1),
+                                    rng.randint(0, 3), rng.randint(0, 2), rng.randint(0, total // 3),
+                                    rng.randint(0, 5), rng.randint(0, 2), None, None,
+                                ))
+                                if spec["player_rounds"]:
+                                    for rn in range(1, total + 1):
+                                        player_rounds.append((mid, mi, rn, pid, rng.randint(0, 3),
+                                                              rng.randint(0, 400), rng.choice(WEAPONS),
+                                                              rng.randint(0, 5000)))
+                    t1w, t2w = wins[t1], wins[t2]
+                    matches.append((mid, week, group, t1, t2, t1 if t1w > t2w else t2, t1w, t2w, "completed",
+                                    match_sid, "regular", f"BO{maps_max}", t1w + t2w, 0))
+
+    # The live table has stat rows with no player linked; keep one so the ELO
+    # equivalence check (benchmark.elo) covers them
+    if stats:
+        orphan = list(stats[len(stats) // 2])
+        orphan[3:6] = [None, 0, None]  # player_id, is_sub, subbed_for_id
+        stats.append(tuple(orphan))
+
+    # Default teams follow the latest season's rosters
+    current = {pid: tid for tid, pids in rosters.items() for pid in pids}
+    for p in players:
+        p[6] = current[p[0]]
+
+    tables = {
+        "seasons": (("id", "name", "is_active", "winner_id"), seasons),
+        "teams": (("id", "name", "tag", "group_name"), teams),
+        "players": (("id", "name", "riot_id", "rank", "uuid", "puuid", "default_team_id"), players),
+        "player_team_history": (("player_id", "team_id", "season_id", "is_current"), history),
+        "matches": (("id", "week", "group_name", "team1_id", "team2_id", "winner_id", "score_t1", "score_t2",
+                     "status", "season_id", "match_type", "format", "maps_played", "is_forfeit"), matches),
+        "match_maps": (("match_id", "map_index", "map_name", "team1_rounds", "team2_rounds", "winner_id",
+                        "is_forfeit"), maps),
+        "match_stats_map": (("match_id", "map_index", "team_id", "player_id", "is_sub", "subbed_for_id", "agent",
+                             "acs", "kills", "deaths", "assists", "adr", "kast", "hs_pct", "fk", "fd", "mk",
+                             "dd_delta", "plants", "defuses", "survived", "traded", "clutches",
+                             "clutches_details", "ability_casts"), stats),
+        "match_rounds": (("match_id", "map_index", "round_number", "winning_team_id", "win_type", "plant",
+                          "defuse", "economy_t1", "economy_t2"), rounds),
+        "match_player_rounds": (("match_id", "map_index", "round_number", "player_id", "kills", "damage",
+                                 "weapon", "spent"), player_rounds),
+    }
+    return tables, {name: len(rows) for name, (_, rows) in tables.items()}
+
+
+def load(conn, spec=None):
+    """Recreate the schema on `conn` (psycopg2) and bulk-load a synthetic league.
+
+    Returns the row count per table.
+    """
+    tables, counts = generate(spec)
+    cursor = conn.cursor()
+    cursor.execute("SET statement_timeout = 0")  # the 100x load outlasts DB_STATEMENT_TIMEOUT_MS
+    cursor.execute(SCHEMA.read_text())
+    cursor.execute(ELO_SCHEMA.read_text())
+    for name, (columns, rows) in tables.items():
+        _copy(cursor, name, columns, rows)
+    conn.commit()
+    cursor.execute("ANALYZE")
+    conn.commit()
+    return counts
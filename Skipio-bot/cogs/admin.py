@@ -0,0 +1,129 @@
+import logging
+import discord
+from discord.ext import commands
+from discord import app_commands
+import database
+import async_database
+import query_cache
+import query_stats
+from utils.helpers import run_in_db_executor, get_executor_stats
+from utils import elo_store
+from utils.design import C_DARK
+
+logger = logging.getLogger(__name__)
+
+ORDER_CHOICES = [
+    app_commands.Choice(name="Total time", value="total_ms"),
+    app_commands.Choice(name="Average time", value="avg_ms"),
+    app_commands.Choice(name="Slowest call", value="max_ms"),
+    app_commands.Choice(name="Calls", value="calls"),
+    app_commands.Choice(name="Rows returned", value="rows"),
+]
+
+
+class AdminCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    # ── /db_stats ─────────────────────────────────────────────────────────────
+    @app_commands.command(name="db_stats", description="[Admin] Most expensive bot queries and pool health")
+    @app_commands.describe(top="How many statements to list", order="Sort statements by")
+    @app_commands.choices(order=ORDER_CHOICES)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def db_stats(self, interaction: discord.Interaction,
+                       top: app_commands.Range[int, 1, 10] = 5,
+                       order: app_commands.Choice[str] = None):
+        order_by = order.value if order else "total_ms"
+        statements = query_stats.top_statements(top, order_by)
+
+        embed = discord.Embed(
+            title="🩺 Database Stats",
+            description=f"Top `{len(statements)}` statements by **{order.name if order else 'Total time'}** · "
+                        f"slow threshold `{query_stats.SLOW_QUERY_MS:.0f}ms` · "
+                        f"`{len(query_stats.slow_queries)}` recent slow queries",
+            color=C_DARK
+        )
+        for i, s in enumerate(statements, 1):
+            embed.add_field(
+                name=f"`{i}.` {s['calls']} calls · {s['total_ms']:.0f}ms total",
+                value=(
+                    f"avg `{s['avg_ms']:.1f}ms` · p50 ≤`{s['p50_ms']:g}ms` · p95 ≤`{s['p95_ms']:g}ms` · "
+                    f"max `{s['max_ms']:.0f}ms` · rows/call `{s['avg_rows']:.1f}`\n"
+                    f"```sql\n{s['sql'][:300]}\n```"
+                ),
+                inline=False
+            )
+        if not statements:
+            embed.add_field(name="No queries recorded yet", value="Run a few commands first.", inline=False)
+
+        ps, aps, ex = database.get_pool_stats(), async_database.get_pool_stats(), get_executor_stats()
+        embed.add_field(
+            name="🔌 Pools",
+            value=(
+                f"sync: recycled `{ps['stale_recycled']}` · replayed `{ps['replayed']}` · "
+                f"exhausted `{ps['pool_exhausted']}` · fallbacks `{ps['fallback_connections']}`\n"
+                f"async: recycled `{aps['stale_recycled']}` · replayed `{aps['replayed']}` · "
+                f"lost `{aps.get('connections_lost', 0)}` · timed out `{aps['timed_out']}` · "
+                f"pipelined `{aps['pipelined']}`"
+            ),
+            inline=False
+        )
+        qc = query_cache.get_cache_stats()
+        lookups = qc["hits"] + qc["misses"]
+        embed.add_field(
+            name="🗃️ Result Cache",
+            value=(
+                f"entries `{qc['entries']}` · hit rate `{qc['hits'] / lookups * 100 if lookups else 0:.0f}%` "
+                f"(`{qc['hits']}`/`{lookups}`) · evicted `{qc['evictions']}` · invalidated `{qc['invalidated']}`"
+            ),
+            inline=False
+        )
+        es = elo_store.get_store_stats()
+        embed.add_field(
+            name="⚡ ELO Store",
+            value=f"scopes `{es['scopes']}` · rebuilt `{es['rebuilt']}` · stale `{es['stale']}` · pending `{es['pending']}` · failed `{es['failed']}`",
+            inline=False
+        )
+        embed.add_field(
+            name="🧵 DB Executor",
+            value=(
+                f"workers `{ex['workers']}` · in flight `{ex['in_flight']}` · queued `{ex['queue_depth']}` "
+                f"(max `{ex['max_queue_depth']}`)\n"
+                f"wait avg `{ex['wait_avg'] * 1000:.1f}ms` · max `{ex['wait_max'] * 1000:.0f}ms` · "
+                f"throttled `{ex['throttled']}` · timed out `{ex['timed_out']}`"
+            ),
+            inline=False
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # ── /refresh_seasons ──────────────────────────────────────────────────────
+    @app_commands.command(name="refresh_seasons", description="[Admin] Reload the seasons table now")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def refresh_seasons(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        if not await run_in_db_executor(database.refresh_seasons):
+            return await interaction.followup.send("❌ Could not reload seasons — see the bot log.", ephemeral=True)
+        seasons = database.get_seasons()
+        await interaction.followup.send(
+            f"✅ Loaded `{len(seasons)}` seasons · active season `{database.get_default_season()}`", ephemeral=True)
+
+    # ── /elo_rebuild ──────────────────────────────────────────────────────────
+    @app_commands.command(name="elo_rebuild", description="[Admin] Recompute the stored Skipio ELO for every season")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def elo_rebuild(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            rebuilt = await run_in_db_executor(elo_store.rebuild_all)
+        except Exception as e:
+            logger.exception("elo_rebuild failed")
+            return await interaction.followup.send(f"❌ Rebuild failed: {e}", ephemeral=True)
+        await interaction.followup.send(
+            "✅ Rebuilt Skipio ELO · " + " · ".join(f"`{scope}` {n} players" for scope, n in rebuilt.items()),
+            ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(AdminCog(bot))
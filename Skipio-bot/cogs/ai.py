@@ -3,8 +3,9 @@ from discord.ext import commands
 from discord import app_commands
 import re
 import requests as http_requests
-from database import get_conn, get_default_season
-from utils.helpers import run_in_executor
+from database import get_default_season
+from async_database import acursor
+from utils.helpers import run_in_executor, run_in_db_executor, query_budget
 from utils.autocomplete import player_autocomplete
 from utils.charts import generate_player_chart, generate_radar_chart
 from ui.views import ChartControls
@@ -25,7 +26,7 @@ class AICog(commands.Cog):
     @app_commands.checks.cooldown(1, 10, key=lambda i: i.user.id)
     async def ask_ai(self, interaction: discord.Interaction, question: str, season: str = None):
         await interaction.response.defer()
-        if season is None: season = await run_in_executor(get_default_season)
+        if season is None: season = get_default_season()
         try:
             payload = {"message": question, "history": [], "seasonId": season}
             headers = {"Content-Type": "application/json"}
@@ -82,7 +83,7 @@ class AICog(commands.Cog):
                             history_payload.append({"role": role, "content": content})
 
                     # Try to parse season from the original thread message footer
-                    season = await run_in_executor(get_default_season)
+                    season = get_default_season()
                     try:
                         first_msg = await message.channel.parent.fetch_message(message.channel.id)
                         if first_msg.embeds and first_msg.embeds[0].footer and first_msg.embeds[0].footer.text:
@@ -115,26 +116,25 @@ class AICog(commands.Cog):
     @app_commands.autocomplete(name=player_autocomplete)
     async def stats_chart(self, interaction: discord.Interaction, name: str, season: str = None):
         await interaction.response.defer()
-        if season is None: season = await run_in_executor(get_default_season)
+        if season is None: season = get_default_season()
         try:
             mention_match = re.match(r"^<@!?(\d+)>$", name.strip())
-            with get_conn() as conn:
-                cursor = conn.cursor()
+            async with acursor(budget=query_budget(interaction)) as cursor:
                 if mention_match:
-                    cursor.execute(
+                    await cursor.execute(
                         "SELECT id, name FROM players WHERE uuid = %s LIMIT 1",
                         (mention_match.group(1),))
                 else:
-                    cursor.execute(
+                    await cursor.execute(
                         "SELECT id, name FROM players WHERE name ILIKE %s OR riot_id ILIKE %s LIMIT 1",
                         (name, name))
-                row = cursor.fetchone()
-                if not row:
-                    return await interaction.followup.send(f"❌ Player `{name}` not found.")
-                pid, pname = row
+                row = await cursor.fetchone()
+            if not row:
+                return await interaction.followup.send(f"❌ Player `{name}` not found.")
+            pid, pname = row
 
             # Open with ACS trend chart
-            file, embed = await run_in_executor(generate_player_chart, pid, season, "acs")
+            file, embed = await run_in_db_executor(generate_player_chart, pid, season, "acs", budget=query_budget(interaction))
             if not file:
                 return await interaction.followup.send(f"❌ No match data found for **{pname}** in season `{season}`.")
 
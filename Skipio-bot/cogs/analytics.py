@@ -2,8 +2,11 @@ import logging
 import discord
 from discord.ext import commands
 from discord import app_commands
-from database import get_conn, get_default_season
-from utils.helpers import run_in_executor
+from database import get_default_season
+from queries import season_params
+from async_database import acursor, execute_named
+from config import HEAVY_QUERY_BUDGET_SECONDS
+from utils.helpers import query_budget
 from utils.autocomplete import player_autocomplete, team_autocomplete, rank_autocomplete, season_autocomplete
 from utils.formatting import rank_icon
 from utils.design import C_RED, C_TEAL, C_GOLD
@@ -22,91 +25,72 @@ class AnalyticsCog(commands.Cog):
     async def scout(self, interaction: discord.Interaction, team: str, season: str = None):
         await interaction.response.defer()
         if season is None:
-            season = await run_in_executor(get_default_season)
+            season = get_default_season()
         try:
-            with get_conn() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT id, name, tag, group_name FROM teams WHERE name ILIKE %s OR tag ILIKE %s LIMIT 1",
-                    (team, team)
-                )
-                row = cursor.fetchone()
+            async with acursor(cache_season=season, budget=query_budget(interaction)) as cursor:
+                await execute_named(cursor, "team_by_name", (team, team))
+                row = await cursor.fetchone()
                 if not row:
                     return await interaction.followup.send(f"❌ Team `{team}` not found.")
                 tid, tname, ttag, tgroup = row
 
-                sf = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
-                sp = (season, season) if season != 'all' else ()
-
-                cursor.execute(f"""
-                    SELECT mm.map_name,
-                           CASE WHEN m.team1_id = %s THEN mm.team1_rounds ELSE mm.team2_rounds END as my_rounds,
-                           CASE WHEN m.team1_id = %s THEN mm.team2_rounds ELSE mm.team1_rounds END as op_rounds
-                    FROM match_maps mm JOIN matches m ON mm.match_id = m.id
-                    WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
-                """, (tid, tid, tid, tid, *sp))
-                maps_data = cursor.fetchall()
+                sf, sp = season_params(season)
 
-                cursor.execute(
-                    "SELECT id, name FROM players WHERE default_team_id = %s",
-                    (tid,)
-                )
-                roster = cursor.fetchall()
-
-                # Batch agent query — one query for all roster players instead of N+1
-                if roster:
-                    pid_list = [pid for pid, _ in roster]
-                    pname_map = {pid: pname for pid, pname in roster}
-                    ph = ','.join(['%s'] * len(pid_list))
-                    cursor.execute(f"""
+                # Everything below only needs the team id: one round trip for all five
+                maps_data, roster, agent_rows, recent, top_players = await cursor.fetch_batch([
+                    (f"""
+                        SELECT mm.map_name,
+                               CASE WHEN m.team1_id = %s THEN mm.team1_rounds ELSE mm.team2_rounds END as my_rounds,
+                               CASE WHEN m.team1_id = %s THEN mm.team2_rounds ELSE mm.team1_rounds END as op_rounds
+                        FROM match_maps mm JOIN matches m ON mm.match_id = m.id
+                        WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
+                    """, (tid, tid, tid, tid, *sp)),
+                    ("SELECT id, name FROM players WHERE default_team_id = %s", (tid,)),
+                    # Most played agent per roster player, in one query instead of N+1
+                    (f"""
                         SELECT player_id, agent FROM (
                             SELECT msm.player_id, msm.agent,
                                    ROW_NUMBER() OVER (
                                        PARTITION BY msm.player_id ORDER BY COUNT(*) DESC
                                    ) as rn
                             FROM match_stats_map msm JOIN matches m ON msm.match_id = m.id
-                            WHERE msm.player_id IN ({ph}) AND msm.team_id = %s
-                              AND m.status = 'completed' AND {sf}
+                            WHERE msm.player_id IN (SELECT id FROM players WHERE default_team_id = %s)
+                              AND msm.team_id = %s AND m.status = 'completed' AND {sf}
                             GROUP BY msm.player_id, msm.agent
                         ) sub WHERE rn = 1
-                    """, (*pid_list, tid, *sp))
-                    top_agents = {r[0]: r[1] for r in cursor.fetchall()}
-                    player_best = [
-                        f"**{pname_map[pid]}**: {top_agents.get(pid, '*No data*')}"
-                        for pid in pid_list
-                    ]
-                else:
-                    player_best = ["*No roster found*"]
+                    """, (tid, tid, *sp)),
+                    (f"""
+                        SELECT m.week,
+                               CASE WHEN m.team1_id = %s THEN t2.name ELSE t1.name END as op_name,
+                               CASE WHEN m.winner_id = %s THEN 'W'
+                                    WHEN m.winner_id IS NOT NULL AND m.winner_id != %s THEN 'L'
+                                    ELSE 'D' END as res,
+                               CASE WHEN m.team1_id = %s THEN COALESCE(mr.r1, 0) ELSE COALESCE(mr.r2, 0) END as my_score,
+                               CASE WHEN m.team1_id = %s THEN COALESCE(mr.r2, 0) ELSE COALESCE(mr.r1, 0) END as op_score
+                        FROM matches m
+                        JOIN teams t1 ON m.team1_id = t1.id
+                        JOIN teams t2 ON m.team2_id = t2.id
+                        LEFT JOIN (
+                            SELECT match_id, SUM(team1_rounds) as r1, SUM(team2_rounds) as r2
+                            FROM match_maps GROUP BY match_id
+                        ) mr ON m.id = mr.match_id
+                        WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
+                        ORDER BY m.week DESC, m.id DESC LIMIT 5
+                    """, (tid, tid, tid, tid, tid, tid, tid, *sp)),
+                    (f"""
+                        SELECT p.name, AVG(msm.acs) as avg_acs
+                        FROM match_stats_map msm
+                        JOIN matches m ON msm.match_id = m.id
+                        JOIN players p ON msm.player_id = p.id
+                        WHERE msm.team_id = %s AND p.default_team_id = %s AND m.status = 'completed' AND {sf}
+                        GROUP BY p.id, p.name ORDER BY avg_acs DESC LIMIT 2
+                    """, (tid, tid, *sp)),
+                ])
 
-                cursor.execute(f"""
-                    SELECT m.week,
-                           CASE WHEN m.team1_id = %s THEN t2.name ELSE t1.name END as op_name,
-                           CASE WHEN m.winner_id = %s THEN 'W'
-                                WHEN m.winner_id IS NOT NULL AND m.winner_id != %s THEN 'L'
-                                ELSE 'D' END as res,
-                           CASE WHEN m.team1_id = %s THEN COALESCE(mr.r1, 0) ELSE COALESCE(mr.r2, 0) END as my_score,
-                           CASE WHEN m.team1_id = %s THEN COALESCE(mr.r2, 0) ELSE COALESCE(mr.r1, 0) END as op_score
-                    FROM matches m
-                    JOIN teams t1 ON m.team1_id = t1.id
-                    JOIN teams t2 ON m.team2_id = t2.id
-                    LEFT JOIN (
-                        SELECT match_id, SUM(team1_rounds) as r1, SUM(team2_rounds) as r2
-                        FROM match_maps GROUP BY match_id
-                    ) mr ON m.id = mr.match_id
-                    WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
-                    ORDER BY m.week DESC, m.id DESC LIMIT 5
-                """, (tid, tid, tid, tid, tid, tid, tid, *sp))
-                recent = cursor.fetchall()
-
-                cursor.execute(f"""
-                    SELECT p.name, AVG(msm.acs) as avg_acs
-                    FROM match_stats_map msm
-                    JOIN matches m ON msm.match_id = m.id
-                    JOIN players p ON msm.player_id = p.id
-                    WHERE msm.team_id = %s AND p.default_team_id = %s AND m.status = 'completed' AND {sf}
-                    GROUP BY p.id, p.name ORDER BY avg_acs DESC LIMIT 2
-                """, (tid, tid, *sp))
-                top_players = cursor.fetchall()
+            top_agents = {r[0]: r[1] for r in agent_rows}
+            player_best = [
+                f"**{pname}**: {top_agents.get(pid, '*No data*')}" for pid, pname in roster
+            ] or ["*No roster found*"]
 
             map_stats = {}
             for m_name, my_r, op_r in maps_data:
@@ -164,10 +148,10 @@ class AnalyticsCog(commands.Cog):
             return
 
         if season is None:
-            season = await run_in_executor(get_default_season)
+            season = get_default_season()
 
         try:
-            with get_conn() as conn:
+            async with acursor(cache_season=season, budget=query_budget(interaction)) as cursor:
                 sf = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
                 query = f"""
                 WITH match_rounds AS (
@@ -211,9 +195,8 @@ class AnalyticsCog(commands.Cog):
                 ORDER BY total_pts DESC, pd DESC
                 """
                 params = (season, season, season, season, group) if season != 'all' else (group,)
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
+                await cursor.execute(query, params)
+                rows = await cursor.fetchall()
 
             if not rows:
                 return await interaction.followup.send(f"❌ No data for group `{group}` in season `{season}`.")
@@ -268,7 +251,7 @@ class AnalyticsCog(commands.Cog):
                           season: str = None):
         await interaction.response.defer()
         if season is None:
-            season = await run_in_executor(get_default_season)
+            season = get_default_season()
         try:
             sf = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
             sf2 = "(m2.season_id = %s OR (m2.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
@@ -295,9 +278,8 @@ class AnalyticsCog(commands.Cog):
                 params.extend([season, season])
             params.append(min_games)
 
-            with get_conn() as conn:
-                cursor = conn.cursor()
-                cursor.execute(f"""
+            async with acursor(cache_season=season, budget=query_budget(interaction, HEAVY_QUERY_BUDGET_SECONDS)) as cursor:
+                await cursor.execute(f"""
                     SELECT p.name, p.riot_id, p.uuid, p.rank, t.tag,
                            COUNT(DISTINCT msm.match_id) as games,
                            AVG(msm.acs) as avg_acs,
@@ -314,7 +296,7 @@ class AnalyticsCog(commands.Cog):
                     HAVING COUNT(DISTINCT msm.match_id) >= %s
                     ORDER BY {stat} DESC LIMIT 10
                 """, tuple(params))
-                rows = cursor.fetchall()
+                rows = await cursor.fetchall()
 
             if not rows:
                 return await interaction.followup.send(f"No data found for season `{season}`.")
@@ -357,38 +339,23 @@ class AnalyticsCog(commands.Cog):
     async def stats(self, interaction: discord.Interaction, name: str, season: str = None):
         await interaction.response.defer()
         if season is None:
-            season = await run_in_executor(get_default_season)
+            season = get_default_season()
         try:
             import re
             mention_match = re.match(r"^<@!?(\d+)>$", name.strip())
-            with get_conn() as conn:
-                cursor = conn.cursor()
+            async with acursor(cache_season=season, budget=query_budget(interaction)) as cursor:
                 if mention_match:
-                    cursor.execute(
-                        "SELECT id, name, riot_id, rank, uuid FROM players WHERE uuid = %s LIMIT 1",
-                        (mention_match.group(1),)
-                    )
+                    await execute_named(cursor, "player_by_uuid", (mention_match.group(1),))
                 else:
-                    cursor.execute(
-                        "SELECT id, name, riot_id, rank, uuid FROM players "
-                        "WHERE name ILIKE %s OR riot_id ILIKE %s LIMIT 1",
-                        (name, name)
-                    )
-                row = cursor.fetchone()
+                    await execute_named(cursor, "player_by_name", (name, name))
+                row = await cursor.fetchone()
                 if not row:
                     return await interaction.followup.send(f"❌ Player `{name}` not found.")
                 pid, pname, rid, prank, puuid = row
 
-                sf = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
-                sp = (season, season) if season != 'all' else ()
-                cursor.execute(f"""
-                    SELECT AVG(acs), SUM(kills), SUM(deaths), AVG(adr), AVG(kast), COUNT(*)
-                    FROM match_stats_map msm
-                    JOIN matches m ON msm.match_id = m.id
-                    WHERE msm.player_id = %s AND m.status = 'completed' AND {sf}
-                """, (pid, *sp))
-                agg = cursor.fetchone()
-                acs, k, d, adr, kast, maps = (v or 0 for v in agg)
+                await execute_named(cursor, "player_totals", (pid,), season=season)
+                agg = await cursor.fetchone()
+                maps, acs, k, d, _, adr, kast = (v or 0 for v in agg[:7])
 
             kd = k / max(d, 1)
             embed = discord.Embed(
@@ -1,17 +1,24 @@
 import logging
+import math
 import re
 import discord
 from discord.ext import commands
 from discord import app_commands
-from database import get_conn, get_default_season
-from utils.helpers import run_in_executor
+from database import get_default_season
+from async_database import acursor
+from config import HEAVY_QUERY_BUDGET_SECONDS
+from utils.helpers import run_in_db_executor, query_budget
 from utils.autocomplete import player_autocomplete, rank_autocomplete, season_autocomplete
 from utils.formatting import rank_icon, fetch_discord_avatar
-from utils.elo import calculate_skipio_elos
+from utils import elo_store
 from utils.design import C_BLUE
 
 logger = logging.getLogger(__name__)
 
+# Maps a player needs before they appear on the leaderboard (its default filter)
+LEADERBOARD_MIN_GAMES = 3
+PAGE_SIZE = 10
+
 
 def _elo_tier(elo: int) -> str:
     if elo >= 1400:
@@ -38,45 +45,59 @@ class EloCog(commands.Cog):
     async def elo(self, interaction: discord.Interaction, name: str, season: str = None):
         await interaction.response.defer()
         if season is None:
-            season = await run_in_executor(get_default_season)
+            season = get_default_season()
         try:
-            with get_conn() as conn:
-                cursor = conn.cursor()
+            async with acursor(budget=query_budget(interaction)) as cursor:
                 pid_match = re.search(r'ID:\s*(\d+)', name)
                 mention_match = re.search(r'<@!?(\d+)>', name)
                 if pid_match:
-                    cursor.execute(
+                    await cursor.execute(
                         "SELECT id, name, riot_id, rank, uuid FROM players WHERE id = %s",
                         (pid_match.group(1),)
                     )
                 elif mention_match:
-                    cursor.execute(
+                    await cursor.execute(
                         "SELECT id, name, riot_id, rank, uuid FROM players WHERE uuid = %s",
                         (mention_match.group(1),)
                     )
                 else:
-                    cursor.execute(
+                    await cursor.execute(
                         "SELECT id, name, riot_id, rank, uuid FROM players "
                         "WHERE name ILIKE %s OR riot_id ILIKE %s",
                         (name, name)
                     )
-                player = cursor.fetchone()
-                if not player:
-                    return await interaction.followup.send("❌ Player not found.")
-                p_id, p_name, p_riot, p_rank, p_uuid = player
-
-                p_history, all_apps = calculate_skipio_elos(cursor, season)
-
-            elo_history = p_history.get(p_id, [])
+                player = await cursor.fetchone()
+            if not player:
+                return await interaction.followup.send("❌ Player not found.")
+            p_id, p_name, p_riot, p_rank, p_uuid = player
+
+            index = elo_store.cached_rank_index(season) or await run_in_db_executor(
+                elo_store.rank_index, season, budget=query_budget(interaction, HEAVY_QUERY_BUDGET_SECONDS))
+            # Only this player's rows: one range of the (scope, player_id, seq) key,
+            # O(their maps) whatever the size of the league
+            history = []
+            if index is not None:
+                async with acursor(budget=query_budget(interaction)) as cursor:
+                    await cursor.execute(
+                        "SELECT elo, raw_score FROM skipio_elo_history "
+                        "WHERE scope = %s AND player_id = %s ORDER BY seq",
+                        (season, p_id)
+                    )
+                    history = await cursor.fetchall()
+            elo_history = [elo for elo, _ in history]
             current_elo = elo_history[-1] if elo_history else 1000
             trend_str = ""
             if len(elo_history) >= 2:
                 diff = elo_history[-1] - elo_history[-2]
                 if diff != 0:
                     trend_str = f" ({'🟢 +' if diff > 0 else '🔴 '}{diff})"
-
-            my_raws = [row[2] for row in all_apps if row[0] == p_id]
-            avg_raw = sum(my_raws) / len(my_raws) if my_raws else 0
+            avg_raw = sum(raw for _, raw in history) / len(history) if history else 0
+            standing = index.standing(p_id, min_games=LEADERBOARD_MIN_GAMES) if index else None
+            if standing:
+                position, out_of = standing
+                standing_str = f"**#{position}** of `{out_of}` · top `{math.ceil(position / out_of * 100)}%`"
+            else:
+                standing_str = f"Unranked · `{LEADERBOARD_MIN_GAMES}` maps needed"
 
             embed = discord.Embed(
                 title="⚡ Skipio ELO Rating" + (f" · `{season}`" if season != 'all' else " · `All Time`"),
@@ -91,6 +112,7 @@ class EloCog(commands.Cog):
             embed.add_field(name="Performance", value=f"**{_elo_tier(current_elo)}**", inline=True)
             embed.add_field(name="Maps Played", value=f"`{len(elo_history)}`", inline=True)
             embed.add_field(name="Avg Raw Score", value=f"`{round(avg_raw, 1)}`", inline=True)
+            embed.add_field(name="Standing", value=standing_str, inline=True)
             embed.set_footer(text="Blended average of global rank-peer comparison and match lobby comparison.")
 
             avatar = await fetch_discord_avatar(self.bot, p_uuid)
@@ -104,48 +126,42 @@ class EloCog(commands.Cog):
 
     # ── /skipio-leaderboard ───────────────────────────────────────────────────
     @app_commands.command(name="skipio-leaderboard", description="Show top players by Skipio ELO rating")
-    @app_commands.describe(rank="Filter by rank tier", season="Season ID", min_games="Min maps played")
+    @app_commands.describe(rank="Filter by rank tier", season="Season ID", min_games="Min maps played",
+                           page="Page of 10 players")
     @app_commands.autocomplete(rank=rank_autocomplete, season=season_autocomplete)
     async def skipio_leaderboard(self, interaction: discord.Interaction,
-                                 rank: str = None, season: str = None, min_games: int = 3):
+                                 rank: str = None, season: str = None, min_games: int = LEADERBOARD_MIN_GAMES,
+                                 page: app_commands.Range[int, 1] = 1):
         await interaction.response.defer()
         if season is None:
-            season = await run_in_executor(get_default_season)
+            season = get_default_season()
         try:
-            with get_conn() as conn:
-                cursor = conn.cursor()
-                rank_filter = "WHERE rank ILIKE %s" if rank else ""
-                cursor.execute(
-                    f"SELECT id, name, riot_id, rank FROM players {rank_filter}",
-                    (f"%{rank}%",) if rank else ()
-                )
-                p_data = {r[0]: (r[1], r[2], r[3]) for r in cursor.fetchall()}
-                p_history, _ = calculate_skipio_elos(cursor, season)
-
-            leaderboard = []
-            for pid, history in p_history.items():
-                if pid not in p_data or len(history) < min_games:
-                    continue
-                p_name, _, p_rank = p_data[pid]
-                leaderboard.append({"name": p_name, "rank": p_rank, "elo": history[-1], "maps": len(history)})
-
-            leaderboard.sort(key=lambda x: x['elo'], reverse=True)
-            top_10 = leaderboard[:10]
-
-            if not top_10:
+            elo_store.rank_filter(rank)
+        except ValueError as e:
+            return await interaction.followup.send(f"❌ {e}.")
+        try:
+            index = elo_store.cached_rank_index(season) or await run_in_db_executor(
+                elo_store.rank_index, season, budget=query_budget(interaction, HEAVY_QUERY_BUDGET_SECONDS))
+            rows, total = index.page(page, PAGE_SIZE, rank, min_games) if index else ([], 0)
+
+            if not rows:
+                if total:
+                    return await interaction.followup.send(
+                        f"❌ Only `{math.ceil(total / PAGE_SIZE)}` page(s) match those criteria.")
                 return await interaction.followup.send("❌ No players found matching those criteria.")
 
             embed = discord.Embed(
                 title="🏆 Skipio Leaderboard" + (f" · `{season}`" if season != 'all' else " · `All Time`"),
-                description=f"Filter: `{rank or 'All'}` · Min Maps: `{min_games}`",
+                description=f"Filter: `{rank or 'All'}` · Min Maps: `{min_games}` · "
+                            f"Page `{page}/{math.ceil(total / PAGE_SIZE)}` of `{total}` players",
                 color=C_BLUE
             )
             medals = ["🥇", "🥈", "🥉"]
-            for i, p in enumerate(top_10, 1):
+            for i, (_, p_name, p_rank, elo, maps) in enumerate(rows, (page - 1) * PAGE_SIZE + 1):
                 medal = medals[i - 1] if i <= 3 else f"`{i}.`"
                 embed.add_field(
-                    name=f"{medal} {p['name']}  {rank_icon(p['rank'])} `{p['rank'] or '—'}`",
-                    value=f"ELO: **{round(p['elo'])}**  ·  Maps: `{p['maps']}`",
+                    name=f"{medal} {p_name}  {rank_icon(p_rank)} `{p_rank or '—'}`",
+                    value=f"ELO: **{round(elo)}**  ·  Maps: `{maps}`",
                     inline=False
                 )
             await interaction.followup.send(embed=embed)
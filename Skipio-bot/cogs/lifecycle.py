@@ -1,8 +1,12 @@
 import logging
+import time
 import discord
 from discord.ext import commands, tasks
-from database import get_conn
-from config import GUILD_ID
+import database
+import async_database
+from utils.helpers import run_in_db_executor, get_executor_stats
+from utils import elo_store
+from config import GUILD_ID, SEASON_REFRESH_SECONDS, ELO_REFRESH_SECONDS, ELO_SAVE_DEBOUNCE_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -10,22 +14,66 @@ logger = logging.getLogger(__name__)
 class LifecycleCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self._last_throttled = 0
+        self._last_stale_check = float("-inf")
 
     @commands.Cog.listener()
     async def on_ready(self):
         logger.info("Logged in as %s", self.bot.user)
         if not self.keep_alive.is_running():
             self.keep_alive.start()
+        if not self.season_refresh.is_running():
+            self.season_refresh.start()
+        if not self.elo_refresh.is_running():
+            self.elo_refresh.start()
 
     @tasks.loop(seconds=60)
     async def keep_alive(self):
-        """Background task to keep the database connection pool warm."""
+        """Background liveness check of idle pooled connections (both pools).
+
+        Checkouts are not probed, so this is where dead idle connections get
+        recycled before a command picks them up.
+        """
+        before = database.pool_stats["stale_recycled"]
+        try:
+            await run_in_db_executor(database.check_idle_connections)
+            await async_database.check_idle_connections()
+        except Exception as e:
+            logger.warning("keep_alive idle connection check failed: %s", e)
+        recycled = database.pool_stats["stale_recycled"] - before
+        if recycled:
+            logger.info("keep_alive recycled %d stale connection(s); totals sync=%s async=%s",
+                        recycled, database.get_pool_stats(), async_database.get_pool_stats())
+        ex = get_executor_stats()
+        if ex["throttled"] > self._last_throttled:
+            logger.warning("DB executor saturated: %d caller(s) waited for a slot in the last minute "
+                           "(max queue %d, max wait %.2fs, pool fallbacks %d)",
+                           ex["throttled"] - self._last_throttled, ex["max_queue_depth"],
+                           ex["wait_max"], database.pool_stats["fallback_connections"])
+            self._last_throttled = ex["throttled"]
+
+    @tasks.loop(seconds=SEASON_REFRESH_SECONDS)
+    async def season_refresh(self):
+        """Keep the in-memory season registry in step with the seasons table."""
+        previous = database.get_default_season()
+        if await run_in_db_executor(database.refresh_seasons):
+            current = database.get_default_season()
+            if current != previous:
+                logger.info("Active season changed: %s -> %s", previous, current)
+
+    @tasks.loop(seconds=ELO_SAVE_DEBOUNCE_SECONDS)
+    async def elo_refresh(self):
+        """Rebuild Skipio ELO scopes with saved matches, and every ELO_REFRESH_SECONDS those changed outside the bot."""
+        check_stale = time.monotonic() - self._last_stale_check >= ELO_REFRESH_SECONDS
         try:
-            with get_conn() as conn:
-                with conn.cursor() as cur:
-                    cur.execute("SELECT 1")
+            rebuilt = await run_in_db_executor(elo_store.refresh, check_stale)
         except Exception as e:
-            logger.warning("keep_alive DB ping failed: %s", e)
+            logger.warning("elo_refresh failed: %s", e)
+            return
+        if check_stale:
+            self._last_stale_check = time.monotonic()
+        if rebuilt:
+            logger.info("Rebuilt Skipio ELO scope(s): %s", ", ".join(rebuilt))
 
     async def sync_commands(self):
         if GUILD_ID:
@@ -6,7 +6,10 @@ from discord import app_commands
 import requests as http_requests
 
 from database import get_conn, get_default_season
-from utils.helpers import run_in_executor
+import query_cache
+from utils.helpers import run_in_executor, run_in_db_executor, query_budget
+from utils.autocomplete import db_choices
+from utils.elo_store import mark_match_scopes
 from config import PORTAL_URL, BOT_SECRET, REPORT_ROLE_IDS
 from utils.design import C_RED as V_RED, C_TEAL as V_TEAL, C_GOLD as V_GOLD, C_BLUE as V_BLUE
 
@@ -27,7 +30,7 @@ REGION_CHOICES = [
 ]
 
 
-# --- BLOCKING HELPERS (run via run_in_executor) ---
+# --- BLOCKING HELPERS (run via run_in_db_executor) ---
 
 def _fetch_reportable_choices(query):
     try:
@@ -123,7 +126,7 @@ def _mark_reported(mid, channel_id, submitter_id):
 
 
 async def reportable_match_autocomplete(interaction, current):
-    return await run_in_executor(_fetch_reportable_choices, current)
+    return await db_choices(interaction, _fetch_reportable_choices, current)
 
 
 def _clean_tracker_id(link):
@@ -278,7 +281,7 @@ class MatchReportCog(commands.Cog):
         except ValueError:
             return await interaction.followup.send("❌ Invalid match selection.")
 
-        info = await run_in_executor(_fetch_match_info, mid)
+        info = await run_in_db_executor(_fetch_match_info, mid, budget=query_budget(interaction))
         if not info:
             return await interaction.followup.send(f"❌ Match `#{mid}` not found.")
         if info["status"] == "completed":
@@ -308,8 +311,10 @@ class MatchReportCog(commands.Cog):
                 embed.title = "🚫 Match Forfeit — Cancelled" if view.value is False else "⌛ Match Forfeit — Timed out"
                 embed.color = V_RED
                 return await view.message.edit(embed=embed)
-            await run_in_executor(_apply_match_forfeit, mid, winner_id, info["team1_id"])
-            await run_in_executor(_mark_reported, mid, interaction.channel_id, interaction.user.id)
+            await run_in_db_executor(_apply_match_forfeit, mid, winner_id, info["team1_id"])
+            query_cache.invalidate_season(info["season_id"])
+            await run_in_db_executor(_mark_reported, mid, interaction.channel_id, interaction.user.id)
+            mark_match_scopes(info["season_id"])
             result = discord.Embed(
                 title=f"✅ Match #{mid} Saved — Forfeit",
                 description=(
@@ -347,7 +352,7 @@ class MatchReportCog(commands.Cog):
                 f"❌ This match is a **{fmt}** — a team needs {need} map win(s), "
                 f"so at least {need} map(s) are required.")
 
-        all_players = await run_in_executor(_fetch_all_players)
+        all_players = await run_in_db_executor(_fetch_all_players, budget=query_budget(interaction))
         players_by_id = {p["id"]: p for p in all_players}
 
         maps_data = []
@@ -476,6 +481,8 @@ class MatchReportCog(commands.Cog):
                 "playerRounds": md["playerRounds"],
             }
             resp = await run_in_executor(_api_post, "/api/admin/maps/save", body)
+            # Invalidate even on failure: earlier maps of the series may be saved
+            query_cache.invalidate_season(info["season_id"])
             if resp.status_code != 200:
                 try:
                     err = resp.json().get("error", resp.text)
@@ -485,7 +492,8 @@ class MatchReportCog(commands.Cog):
                     f"❌ Failed to save map {md['index'] + 1}: {err}\n"
                     f"⚠️ Earlier maps may already be saved — contact a moderator to verify match `#{mid}`.")
 
-        await run_in_executor(_mark_reported, mid, interaction.channel_id, interaction.user.id)
+        await run_in_db_executor(_mark_reported, mid, interaction.channel_id, interaction.user.id)
+        mark_match_scopes(info["season_id"])
 
         result = self._build_series_embed(
             info, maps_data, players_by_id,
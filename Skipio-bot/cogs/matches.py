@@ -1,8 +1,10 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from database import get_conn, get_default_season
-from utils.helpers import run_in_executor
+from database import get_default_season
+from queries import season_params
+from async_database import acursor, execute_named
+from utils.helpers import run_in_db_executor, query_budget
 from utils.autocomplete import match_autocomplete, team_autocomplete
 from ui.embeds import get_match_overview_embed
 from ui.views import MatchFlowView
@@ -22,7 +24,7 @@ class MatchesCog(commands.Cog):
         await interaction.response.defer()
         try:
             mid = int(match_id)
-            embed = await run_in_executor(get_match_overview_embed, mid)
+            embed = await run_in_db_executor(get_match_overview_embed, mid, budget=query_budget(interaction))
             view = MatchFlowView(mid)
             await interaction.followup.send(embed=embed, view=view)
         except ValueError:
@@ -35,19 +37,16 @@ class MatchesCog(commands.Cog):
     @app_commands.autocomplete(team=team_autocomplete)
     async def map_analytics(self, interaction: discord.Interaction, team: str, season: str = None):
         await interaction.response.defer()
-        if season is None: season = await run_in_executor(get_default_season)
+        if season is None: season = get_default_season()
         try:
-            with get_conn() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT id, name FROM teams WHERE name ILIKE %s OR tag ILIKE %s LIMIT 1",
-                    (team, team))
-                row = cursor.fetchone()
+            async with acursor(cache_season=season, budget=query_budget(interaction)) as cursor:
+                await execute_named(cursor, "team_by_name", (team, team))
+                row = await cursor.fetchone()
                 if not row:
                     return await interaction.followup.send(f"❌ Team `{team}` not found.")
-                tid, tname = row
+                tid, tname = row[:2]
 
-            file, embed = await run_in_executor(generate_team_map_chart, tid, season)
+            file, embed = await run_in_db_executor(generate_team_map_chart, tid, season, budget=query_budget(interaction))
             if not file:
                 return await interaction.followup.send(f"❌ No map data found for **{tname}** in season `{season}`.")
             await interaction.followup.send(file=file, embed=embed)
@@ -58,14 +57,12 @@ class MatchesCog(commands.Cog):
     @app_commands.describe(season="Season ID")
     async def meta_stats(self, interaction: discord.Interaction, season: str = None):
         await interaction.response.defer()
-        if season is None: season = await run_in_executor(get_default_season)
+        if season is None: season = get_default_season()
         try:
-            with get_conn() as conn:
-                cursor = conn.cursor()
-                sf = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
-                params_s = (season, season) if season != 'all' else ()
+            async with acursor(cache_season=season, budget=query_budget(interaction)) as cursor:
+                sf, params_s = season_params(season)
 
-                cursor.execute(f"""
+                await cursor.execute(f"""
                     SELECT agent, COUNT(*) as picks, AVG(acs) as avg_acs,
                            SUM(CASE WHEN msm.team_id = mm.winner_id THEN 1 ELSE 0 END)::float / COUNT(*) as wr
                     FROM match_stats_map msm
@@ -74,9 +71,9 @@ class MatchesCog(commands.Cog):
                     WHERE m.status = 'completed' AND {sf}
                     GROUP BY agent ORDER BY picks DESC LIMIT 8
                 """, params_s)
-                agents = cursor.fetchall()
+                agents = await cursor.fetchall()
 
-                cursor.execute(f"""
+                await cursor.execute(f"""
                     SELECT map_name, COUNT(*) as count,
                            AVG(team1_rounds + team2_rounds) as avg_rounds
                     FROM match_maps mm
@@ -84,7 +81,7 @@ class MatchesCog(commands.Cog):
                     WHERE m.status = 'completed' AND {sf}
                     GROUP BY map_name ORDER BY count DESC
                 """, params_s)
-                maps = cursor.fetchall()
+                maps = await cursor.fetchall()
 
             embed = discord.Embed(
                 title=f"📊 Meta Analytics  ·  Season {season}",
@@ -122,9 +119,8 @@ class MatchesCog(commands.Cog):
     async def match_result(self, interaction: discord.Interaction, match_id: int):
         await interaction.response.defer()
         try:
-            with get_conn() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
+            async with acursor(budget=query_budget(interaction)) as cursor:
+                await cursor.execute("""
                     SELECT m.id, m.week, m.group_name, t1.name, t2.name,
                            m.score_t1, m.score_t2, m.status, m.season_id, m.winner_id,
                            t1.id, t2.id
@@ -133,12 +129,12 @@ class MatchesCog(commands.Cog):
                     JOIN teams t2 ON m.team2_id = t2.id
                     WHERE m.id = %s
                 """, (match_id,))
-                m = cursor.fetchone()
+                m = await cursor.fetchone()
                 if not m:
                     return await interaction.followup.send(f"❌ Match `#{match_id}` not found.")
                 mid, wk, grp, t1n, t2n, s1, s2, status, sid, wid, t1id, t2id = m
 
-                cursor.execute("""
+                await cursor.execute("""
                     SELECT p.name, msm.agent, msm.acs, msm.kills, msm.deaths,
                            msm.assists, msm.adr, msm.hs_pct, t.tag
                     FROM match_stats_map msm
@@ -147,7 +143,7 @@ class MatchesCog(commands.Cog):
                     WHERE msm.match_id = %s
                     ORDER BY msm.acs DESC LIMIT 5
                 """, (match_id,))
-                perf = cursor.fetchall()
+                perf = await cursor.fetchall()
 
             winner = t1n if wid == t1id else (t2n if wid == t2id else "—")
             total = (s1 or 0) + (s2 or 0)
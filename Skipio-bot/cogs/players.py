@@ -3,8 +3,10 @@ import re
 import discord
 from discord.ext import commands
 from discord import app_commands
-from database import get_conn, get_default_season
-from utils.helpers import run_in_executor, determine_archetype
+from database import get_default_season
+from queries import season_params
+from async_database import acursor, execute_named, named
+from utils.helpers import determine_archetype, query_budget
 from utils.autocomplete import player_autocomplete, season_autocomplete
 from utils.formatting import rank_icon, pct_bar, fetch_discord_avatar
 from utils.design import C_TEAL, C_PURPLE
@@ -12,24 +14,24 @@ from utils.design import C_TEAL, C_PURPLE
 logger = logging.getLogger(__name__)
 
 
-def _resolve_player(cursor, name: str):
+async def _resolve_player(cursor, name: str):
     """Look up a player by name/riot_id/@mention. Returns the DB row or None."""
     mention = re.match(r"^<@!?(\d+)>$", name.strip())
     if mention:
-        cursor.execute(
+        await cursor.execute(
             "SELECT p.id, p.name, p.riot_id, p.rank, p.uuid, t.name, t.tag "
             "FROM players p LEFT JOIN teams t ON p.default_team_id = t.id "
             "WHERE p.uuid = %s LIMIT 1",
             (mention.group(1),)
         )
     else:
-        cursor.execute(
+        await cursor.execute(
             "SELECT p.id, p.name, p.riot_id, p.rank, p.uuid, t.name, t.tag "
             "FROM players p LEFT JOIN teams t ON p.default_team_id = t.id "
             "WHERE p.name ILIKE %s OR p.riot_id ILIKE %s LIMIT 1",
             (name, name)
         )
-    return cursor.fetchone()
+    return await cursor.fetchone()
 
 
 class PlayersCog(commands.Cog):
@@ -43,60 +45,48 @@ class PlayersCog(commands.Cog):
     async def player_info(self, interaction: discord.Interaction, name: str, season: str = None):
         await interaction.response.defer()
         if season is None:
-            season = await run_in_executor(get_default_season)
+            season = get_default_season()
         try:
-            with get_conn() as conn:
-                cursor = conn.cursor()
-                row = _resolve_player(cursor, name)
+            async with acursor(cache_season=season, budget=query_budget(interaction)) as cursor:
+                row = await _resolve_player(cursor, name)
                 if not row:
                     return await interaction.followup.send(f"❌ Player `{name}` not found.")
                 pid, pname, rid, prank, puuid, tname, ttag = row
 
+                sf, sp = season_params(season)
+
+                # Independent lookups keyed by the player id: sent in one round trip
+                statements = [
+                    named("player_totals", (pid,), season=season),
+                    (f"""
+                        SELECT agent, COUNT(*) as c, AVG(acs), AVG(kills), AVG(deaths)
+                        FROM match_stats_map msm JOIN matches m ON msm.match_id = m.id
+                        WHERE msm.player_id = %s AND m.status = 'completed' AND {sf}
+                        GROUP BY agent ORDER BY c DESC LIMIT 3
+                    """, (pid, *sp)),
+                    (f"""
+                        SELECT m.week, t1.tag, t2.tag, msm.acs, msm.kills, msm.deaths,
+                               msm.agent, msm.clutches,
+                               CASE WHEN m.winner_id = msm.team_id THEN true ELSE false END as won
+                        FROM match_stats_map msm
+                        JOIN matches m ON msm.match_id = m.id
+                        JOIN teams t1 ON m.team1_id = t1.id
+                        JOIN teams t2 ON m.team2_id = t2.id
+                        WHERE msm.player_id = %s AND m.status = 'completed' AND {sf}
+                        ORDER BY m.id DESC LIMIT 5
+                    """, (pid, *sp)),
+                ]
                 if season != 'all':
-                    cursor.execute(
+                    statements.append((
                         "SELECT t.name, t.tag FROM player_team_history pth "
                         "JOIN teams t ON pth.team_id = t.id "
                         "WHERE pth.player_id = %s AND pth.season_id = %s",
                         (pid, season)
-                    )
-                    hist = cursor.fetchone()
-                    if hist:
-                        tname, ttag = hist
-
-                sf = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
-                sp = (season, season) if season != 'all' else ()
-
-                cursor.execute(f"""
-                    SELECT COUNT(*), AVG(acs), SUM(kills), SUM(deaths), SUM(assists),
-                           AVG(adr), AVG(kast), AVG(hs_pct),
-                           SUM(fk), SUM(fd), SUM(mk), AVG(dd_delta)
-                    FROM match_stats_map msm
-                    JOIN matches m ON msm.match_id = m.id
-                    WHERE msm.player_id = %s AND m.status = 'completed' AND {sf}
-                """, (pid, *sp))
-                agg = cursor.fetchone()
-                maps, acs, k, d, a, adr, kast, hs, fk, fd, mk, dd = (v or 0 for v in agg)
-
-                cursor.execute(f"""
-                    SELECT agent, COUNT(*) as c, AVG(acs), AVG(kills), AVG(deaths)
-                    FROM match_stats_map msm JOIN matches m ON msm.match_id = m.id
-                    WHERE msm.player_id = %s AND m.status = 'completed' AND {sf}
-                    GROUP BY agent ORDER BY c DESC LIMIT 3
-                """, (pid, *sp))
-                agents = cursor.fetchall()
-
-                cursor.execute(f"""
-                    SELECT m.week, t1.tag, t2.tag, msm.acs, msm.kills, msm.deaths,
-                           msm.agent, msm.clutches,
-                           CASE WHEN m.winner_id = msm.team_id THEN true ELSE false END as won
-                    FROM match_stats_map msm
-                    JOIN matches m ON msm.match_id = m.id
-                    JOIN teams t1 ON m.team1_id = t1.id
-                    JOIN teams t2 ON m.team2_id = t2.id
-                    WHERE msm.player_id = %s AND m.status = 'completed' AND {sf}
-                    ORDER BY m.id DESC LIMIT 5
-                """, (pid, *sp))
-                recent = cursor.fetchall()
+                    ))
+                totals, agents, recent, *hist = await cursor.fetch_batch(statements)
+                if hist and hist[0]:
+                    tname, ttag = hist[0][0]
+                maps, acs, k, d, a, adr, kast, hs, fk, fd, mk, dd = (v or 0 for v in totals[0])
 
             kd = k / max(d, 1)
             arch = determine_archetype(agents[0][0] if agents else "")
@@ -164,43 +154,29 @@ class PlayersCog(commands.Cog):
                               player1: str, player2: str, season: str = None):
         await interaction.response.defer()
         if season is None:
-            season = await run_in_executor(get_default_season)
+            season = get_default_season()
         try:
-            with get_conn() as conn:
-                cursor = conn.cursor()
+            async with acursor(cache_season=season, budget=query_budget(interaction)) as cursor:
                 p_data = []
                 for n in [player1, player2]:
                     m = re.match(r"^<@!?(\d+)>$", n.strip())
                     if m:
-                        cursor.execute(
-                            "SELECT id, name, uuid FROM players WHERE uuid = %s LIMIT 1",
-                            (m.group(1),)
-                        )
+                        await execute_named(cursor, "player_by_uuid", (m.group(1),))
                     else:
-                        cursor.execute(
-                            "SELECT id, name, uuid FROM players "
-                            "WHERE name ILIKE %s OR riot_id ILIKE %s LIMIT 1",
-                            (n, n)
-                        )
-                    r = cursor.fetchone()
+                        await execute_named(cursor, "player_by_name", (n, n))
+                    r = await cursor.fetchone()
                     if not r:
                         return await interaction.followup.send(f"❌ Player `{n}` not found.")
-                    p_data.append(r)
+                    p_data.append((r[0], r[1], r[4]))
 
-                sf = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
-                sp = (season, season) if season != 'all' else ()
                 stats = []
                 for pid, _, _ in p_data:
-                    cursor.execute(f"""
-                        SELECT COUNT(*), AVG(acs), SUM(kills), SUM(deaths), AVG(adr),
-                               AVG(kast), AVG(hs_pct), SUM(fk)
-                        FROM match_stats_map msm JOIN matches m ON msm.match_id = m.id
-                        WHERE msm.player_id = %s AND m.status = 'completed' AND {sf}
-                    """, (pid, *sp))
-                    stats.append(cursor.fetchone())
+                    await execute_named(cursor, "player_totals", (pid,), season=season)
+                    stats.append(await cursor.fetchone())
 
             def _unpack(s):
-                return [v or 0 for v in s]
+                # maps, acs, kills, deaths, adr, kast, hs, fk
+                return [v or 0 for v in (*s[:4], *s[5:9])]
 
             m1, acs1, k1, d1, adr1, kast1, hs1, fk1 = _unpack(stats[0])
             m2, acs2, k2, d2, adr2, kast2, hs2, fk2 = _unpack(stats[1])
@@ -2,8 +2,10 @@ import logging
 import discord
 from discord.ext import commands
 from discord import app_commands
-from database import get_conn, get_default_season
-from utils.helpers import run_in_executor
+from database import get_default_season
+from queries import season_params
+from async_database import acursor, execute_named, named
+from utils.helpers import query_budget
 from utils.autocomplete import team_autocomplete, season_autocomplete
 from utils.formatting import rank_icon, pct_bar
 from utils.design import C_BLUE, C_GOLD
@@ -22,76 +24,55 @@ class TeamsCog(commands.Cog):
     async def team_info(self, interaction: discord.Interaction, name: str, season: str = None):
         await interaction.response.defer()
         if season is None:
-            season = await run_in_executor(get_default_season)
+            season = get_default_season()
         try:
-            with get_conn() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT id, name, tag, group_name FROM teams WHERE name ILIKE %s OR tag ILIKE %s LIMIT 1",
-                    (name, name)
-                )
-                row = cursor.fetchone()
+            async with acursor(cache_season=season, budget=query_budget(interaction)) as cursor:
+                await execute_named(cursor, "team_by_name", (name, name))
+                row = await cursor.fetchone()
                 if not row:
                     return await interaction.followup.send(f"❌ Team `{name}` not found.")
                 tid, tname, ttag, tgroup = row
 
-                if season == 'all':
-                    cursor.execute(
-                        "SELECT name, riot_id, uuid, rank FROM players WHERE default_team_id = %s",
-                        (tid,)
-                    )
-                else:
-                    cursor.execute(
+                sf, sp = season_params(season)
+
+                # Everything keyed by the team id goes out in one round trip. The
+                # current roster is always fetched: it is the fallback when the
+                # season has no roster history.
+                statements = [
+                    ("SELECT name, riot_id, uuid, rank FROM players WHERE default_team_id = %s", (tid,)),
+                    (f"""
+                        SELECT COUNT(*), SUM(CASE WHEN m.winner_id = %s THEN 1 ELSE 0 END)
+                        FROM matches m
+                        WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
+                    """, (tid, tid, tid, *sp)),
+                    named("team_map_record", (tid, tid, tid), season=season),
+                    (f"""
+                        SELECT AVG(msm.acs), AVG(msm.kills::float/NULLIF(msm.deaths, 0)),
+                               AVG(msm.adr), AVG(msm.kast)
+                        FROM match_stats_map msm JOIN matches m ON msm.match_id = m.id
+                        WHERE msm.team_id = %s AND m.status = 'completed' AND {sf}
+                    """, (tid, *sp)),
+                    (f"""
+                        SELECT m.week, t1.tag, t2.tag, m.score_t1, m.score_t2, m.winner_id, m.id
+                        FROM matches m
+                        JOIN teams t1 ON m.team1_id = t1.id
+                        JOIN teams t2 ON m.team2_id = t2.id
+                        WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
+                        ORDER BY m.id DESC LIMIT 5
+                    """, (tid, tid, *sp)),
+                ]
+                if season != 'all':
+                    statements.append((
                         "SELECT p.name, p.riot_id, p.uuid, p.rank "
                         "FROM player_team_history pth JOIN players p ON pth.player_id = p.id "
                         "WHERE pth.team_id = %s AND pth.season_id = %s",
                         (tid, season)
-                    )
-                roster = cursor.fetchall()
-                if not roster and season != 'all':
-                    cursor.execute(
-                        "SELECT name, riot_id, uuid, rank FROM players WHERE default_team_id = %s",
-                        (tid,)
-                    )
-                    roster = cursor.fetchall()
-
-                sf = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
-                sp = (season, season) if season != 'all' else ()
-
-                cursor.execute(f"""
-                    SELECT COUNT(*), SUM(CASE WHEN m.winner_id = %s THEN 1 ELSE 0 END)
-                    FROM matches m
-                    WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
-                """, (tid, tid, tid, *sp))
-                played_row = cursor.fetchone()
-                total_m, won_m = (played_row[0] or 0), (played_row[1] or 0)
-
-                cursor.execute(f"""
-                    SELECT mm.map_name, COUNT(*) as p,
-                           SUM(CASE WHEN m.winner_id = %s THEN 1 ELSE 0 END) as w
-                    FROM match_maps mm JOIN matches m ON mm.match_id = m.id
-                    WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
-                    GROUP BY mm.map_name ORDER BY p DESC
-                """, (tid, tid, tid, *sp))
-                maps_data = cursor.fetchall()
-
-                cursor.execute(f"""
-                    SELECT AVG(msm.acs), AVG(msm.kills::float/NULLIF(msm.deaths, 0)),
-                           AVG(msm.adr), AVG(msm.kast)
-                    FROM match_stats_map msm JOIN matches m ON msm.match_id = m.id
-                    WHERE msm.team_id = %s AND m.status = 'completed' AND {sf}
-                """, (tid, *sp))
-                team_stats = cursor.fetchone()
-
-                cursor.execute(f"""
-                    SELECT m.week, t1.tag, t2.tag, m.score_t1, m.score_t2, m.winner_id, m.id
-                    FROM matches m
-                    JOIN teams t1 ON m.team1_id = t1.id
-                    JOIN teams t2 ON m.team2_id = t2.id
-                    WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
-                    ORDER BY m.id DESC LIMIT 5
-                """, (tid, tid, *sp))
-                recent = cursor.fetchall()
+                    ))
+                roster, played, maps_data, stats, recent, *history = await cursor.fetch_batch(statements)
+                if history and history[0]:
+                    roster = history[0]
+                total_m, won_m = (played[0][0] or 0), (played[0][1] or 0)
+                team_stats = stats[0] if stats else None
 
             wr = round(won_m / max(total_m, 1) * 100)
             t_acs, t_kd, t_adr, t_kast = [(v or 0) for v in (team_stats or (0, 0, 0, 0))]
@@ -148,41 +129,30 @@ class TeamsCog(commands.Cog):
                             team1: str, team2: str, season: str = None):
         await interaction.response.defer()
         if season is None:
-            season = await run_in_executor(get_default_season)
+            season = get_default_season()
         try:
-            with get_conn() as conn:
-                cursor = conn.cursor()
+            async with acursor(cache_season=season, budget=query_budget(interaction)) as cursor:
                 t_data = []
                 for n in [team1, team2]:
-                    cursor.execute(
-                        "SELECT id, name, tag FROM teams WHERE name ILIKE %s OR tag ILIKE %s LIMIT 1",
-                        (n, n)
-                    )
-                    r = cursor.fetchone()
+                    await execute_named(cursor, "team_by_name", (n, n))
+                    r = await cursor.fetchone()
                     if not r:
                         return await interaction.followup.send(f"❌ Team `{n}` not found.")
-                    t_data.append(r)
+                    t_data.append(r[:3])
 
-                sf = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
-                sp = (season, season) if season != 'all' else ()
+                sf, sp = season_params(season)
                 records = []
                 for tid, _, _ in t_data:
-                    cursor.execute(f"""
-                        SELECT mm.map_name, COUNT(*),
-                               SUM(CASE WHEN m.winner_id = %s THEN 1 ELSE 0 END)
-                        FROM match_maps mm JOIN matches m ON mm.match_id = m.id
-                        WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
-                        GROUP BY mm.map_name
-                    """, (tid, tid, tid, *sp))
-                    rows = cursor.fetchall()
+                    await execute_named(cursor, "team_map_record", (tid, tid, tid), season=season)
+                    rows = await cursor.fetchall()
                     records.append({"p": sum(r[1] for r in rows), "w": sum(r[2] for r in rows)})
 
-                cursor.execute(f"""
+                await cursor.execute(f"""
                     SELECT m.score_t1, m.score_t2, m.team1_id, m.team2_id FROM matches m
                     WHERE ((m.team1_id = %s AND m.team2_id = %s) OR (m.team1_id = %s AND m.team2_id = %s))
                     AND m.status = 'completed' AND {sf}
                 """, (t_data[0][0], t_data[1][0], t_data[1][0], t_data[0][0], *sp))
-                h2h = cursor.fetchall()
+                h2h = await cursor.fetchall()
 
             wr1 = round(records[0]['w'] / max(records[0]['p'], 1) * 100, 1)
             wr2 = round(records[1]['w'] / max(records[1]['p'], 1) * 100, 1)
@@ -1,5 +1,7 @@
 import os
+import re
 import sys
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,6 +19,69 @@ if GUILD_ID:
 DB_URL = os.getenv("SUPABASE_DB_URL") or os.getenv("DB_CONNECTION_STRING")
 PORTAL_URL = os.getenv("PORTAL_URL", "https://valorant-portal.vercel.app")
 
+# Connection budget. DB_POOL_MAX is the most server connections the bot holds in
+# total, split between the sync (psycopg2) pool and the async (psycopg) pool the
+# cogs await on. The sync share defaults to half (DB_SYNC_POOL_MAX overrides it,
+# leaving the async pool at least one); the DB executor runs one worker thread
+# per sync connection so a burst never asks that pool for more than it holds.
+# DB_POOL_MIN is the idle floor of each pool.
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = max(2, int(os.getenv("DB_POOL_MAX", "10")))
+DB_SYNC_POOL_MAX = min(max(1, int(os.getenv("DB_SYNC_POOL_MAX", DB_POOL_MAX // 2))), DB_POOL_MAX - 1)
+DB_ASYNC_POOL_MAX = DB_POOL_MAX - DB_SYNC_POOL_MAX
+# Jobs allowed to wait for a DB worker before callers are held back (asyncio-side)
+DB_EXECUTOR_QUEUE = int(os.getenv("DB_EXECUTOR_QUEUE", "40"))
+
+# Prepare the shared query catalog (queries.py) once per pooled connection.
+# Off by default when SUPABASE_DB_URL points at Supabase's transaction-mode
+# pooler (port 6543): consecutive transactions may run on different server
+# backends, so a statement prepared on one is missing (or already there) on
+# the next. DB_PREPARED_STATEMENTS=true/false overrides the detection.
+def _dsn_port(dsn):
+    """The port of a postgres:// URL or key=value DSN, or None."""
+    if not dsn:
+        return None
+    dsn = str(dsn).strip().strip('"').strip("'")
+    try:
+        port = urlsplit(dsn).port if "://" in dsn else None
+    except ValueError:
+        port = None
+    # key=value form, or ?port= in a URL's query string (which libpq also honours)
+    match = re.search(r"(?:^|[\s?&])port\s*=\s*(\d+)", dsn)
+    return port or (int(match.group(1)) if match else None)
+
+_prepared_env = os.getenv("DB_PREPARED_STATEMENTS")
+DB_PREPARED_STATEMENTS = (_dsn_port(DB_URL) != 6543 if _prepared_env is None
+                          else _prepared_env.lower() not in ("0", "false", "no"))
+
+# Query budgets (seconds). All queries of one command share a deadline; when it
+# passes, in-flight statements are cancelled on the server and the command fails.
+QUERY_BUDGET_SECONDS = float(os.getenv("QUERY_BUDGET_SECONDS", "10"))
+# For the known heavy commands: /leaderboard role filter and the ELO scans
+HEAVY_QUERY_BUDGET_SECONDS = float(os.getenv("HEAVY_QUERY_BUDGET_SECONDS", "30"))
+# Server-side statement_timeout on every pooled connection, a backstop for
+# anything that runs without a budget (milliseconds, 0 disables)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "60000"))
+
+# Read-through cache for season-scoped command queries (query_cache.py).
+# TTL in seconds (0 disables the cache) and maximum number of cached results.
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1000"))
+
+# How often the in-memory season registry re-reads the seasons table (seconds)
+SEASON_REFRESH_SECONDS = float(os.getenv("SEASON_REFRESH_SECONDS", "600"))
+
+# How often the Skipio ELO store checks its scopes against the match data and
+# rebuilds the ones edited outside the bot (seconds)
+ELO_REFRESH_SECONDS = float(os.getenv("ELO_REFRESH_SECONDS", "600"))
+
+# How long a saved match waits before the ELO store rebuilds its season and
+# 'all' (seconds); saves within the window share one rebuild
+ELO_SAVE_DEBOUNCE_SECONDS = float(os.getenv("ELO_SAVE_DEBOUNCE_SECONDS", "30"))
+
+# Statements slower than this (milliseconds) are written to the slow-query log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+
 # Shared secret for authenticated portal API calls (/api/admin/maps/parse & /save).
 # Must match BOT_SECRET on the portal deployment. Required for /report_match.
 BOT_SECRET = os.getenv("BOT_SECRET")
@@ -1,17 +1,60 @@
 import logging
+import re
+import threading
+import time
+import weakref
 import psycopg2
 from psycopg2 import pool
-from config import DB_URL
+from contextlib import contextmanager
+from config import DB_URL, DB_POOL_MIN, DB_SYNC_POOL_MAX, DB_PREPARED_STATEMENTS, DB_STATEMENT_TIMEOUT_MS
+import queries
+import query_stats
 
 logger = logging.getLogger(__name__)
 
+# Pool counters, surfaced by keep_alive and get_pool_stats().
+#   stale_recycled       — dead connections discarded (idle check or first-query failure)
+#   idle_checked         — idle connections probed by check_idle_connections()
+#   replayed             — first statements transparently re-run on a fresh connection
+#   pool_exhausted       — checkouts refused because every pooled connection was busy
+#   fallback_connections — one-off psycopg2.connect() calls made after a refused checkout
+pool_stats = {"stale_recycled": 0, "idle_checked": 0, "replayed": 0,
+              "pool_exhausted": 0, "fallback_connections": 0}
+
+
+def get_pool_stats():
+    return dict(pool_stats)
+
+
+class QueryTimeout(Exception):
+    """A command's queries ran past their budget and were cancelled on the server."""
+    def __init__(self, budget):
+        super().__init__(f"query took longer than its {budget:.3g}s budget and was cancelled")
+        self.budget = budget
+
+
 # --- DATABASE CONNECTION WRAPPERS ---
 
 class UnifiedCursorWrapper:
-    def __init__(self, cur):
+    def __init__(self, cur, db=None):
         self.cur = cur
+        self.db = db
     def execute(self, sql, params=None):
-        return self.cur.execute(sql, params)
+        start = time.perf_counter()
+        try:
+            return self.cur.execute(sql, params)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Checkouts are not probed, so a connection that died while idle in the
+            # pool surfaces here on its first real statement. Swap and replay once.
+            if not self.db or not self.db.reconnect():
+                raise
+            self.cur = self.db.conn.cursor()
+            pool_stats["replayed"] += 1
+            return self.cur.execute(sql, params)
+        finally:
+            query_stats.record(sql, params, time.perf_counter() - start, self.cur.rowcount)
+            if self.db:
+                self.db.used = True
     def __getattr__(self, name):
         return getattr(self.cur, name)
     def __iter__(self):
@@ -23,18 +66,47 @@ class UnifiedCursorWrapper:
             self.cur.close()
 
 class UnifiedDBWrapper:
-    def __init__(self, conn, close_callback=None):
+    def __init__(self, conn, pool_obj=None):
         self.conn = conn
-        self.close_callback = close_callback
+        self.pool_obj = pool_obj
+        self.used = False
+        self.released = False
+        self._release_lock = threading.Lock()  # close() vs. cancel_job() from the event loop
     def cursor(self):
-        return UnifiedCursorWrapper(self.conn.cursor())
+        return UnifiedCursorWrapper(self.conn.cursor(), db=self)
     def commit(self):
         self.conn.commit()
+    def reconnect(self):
+        """Replace a pooled connection that was found dead before any statement ran.
+
+        Only safe before the first statement: nothing has been read or written on
+        the old connection, so replaying on a new one is invisible to the caller.
+        """
+        if self.used or not self.pool_obj or not self.conn.closed:
+            return False
+        _discard(self.pool_obj, self.conn)
+        try:
+            # Siblings idle in the pool most likely died with it; flush them first.
+            check_idle_connections()
+            self.conn = self.pool_obj.getconn()
+        except Exception as e:
+            logger.warning("Reconnect after stale connection failed: %s", e)
+            self.pool_obj = None
+            return False
+        return True
     def close(self):
-        if self.close_callback:
-            self.close_callback()
-        else:
-            self.conn.close()
+        with self._release_lock:
+            self.released = True
+            if self.pool_obj:
+                try:
+                    self.pool_obj.putconn(self.conn)
+                except Exception:
+                    try:
+                        self.conn.close()
+                    except Exception:
+                        pass
+            else:
+                self.conn.close()
     def __getattr__(self, name):
         return getattr(self.conn, name)
     def __enter__(self):
@@ -45,17 +117,31 @@ class UnifiedDBWrapper:
 _pg_pool = None
 
 
+def get_db_dsn():
+    """Normalised connection string with SSL enforced, or None if unconfigured."""
+    if not DB_URL:
+        return None
+    dsn = str(DB_URL).strip().strip('"').strip("'")
+    if "sslmode" not in dsn:
+        dsn += "?sslmode=require" if "?" not in dsn else "&sslmode=require"
+    return dsn
+
+
+def get_session_options():
+    """libpq `options` applied to every pooled connection (both pools)."""
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        return f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return None
+
+
 def get_db_connection_pool():
     global _pg_pool
     if _pg_pool:
         return _pg_pool
     if DB_URL:
-        db_url_str = str(DB_URL).strip().strip('"').strip("'")
         try:
-            params = db_url_str
-            if "sslmode" not in db_url_str:
-                params += "?sslmode=require" if "?" not in db_url_str else "&sslmode=require"
-            _pg_pool = pool.ThreadedConnectionPool(1, 10, params)
+            _pg_pool = pool.ThreadedConnectionPool(
+                min(DB_POOL_MIN, DB_SYNC_POOL_MAX), DB_SYNC_POOL_MAX, get_db_dsn(), options=get_session_options())
             logger.info("Database connection pool created")
             return _pg_pool
         except Exception as e:
@@ -63,6 +149,14 @@ def get_db_connection_pool():
     return None
 
 
+def _discard(pool_obj, conn):
+    pool_stats["stale_recycled"] += 1
+    try:
+        pool_obj.putconn(conn, close=True)
+    except Exception:
+        pass
+
+
 def get_conn():
     pool_obj = get_db_connection_pool()
     if pool_obj:
@@ -70,44 +164,102 @@ def get_conn():
             try:
                 conn = pool_obj.getconn()
                 if conn.closed:
-                    try:
-                        pool_obj.putconn(conn, close=True)
-                    except Exception:
-                        pass
-                    continue
-                try:
-                    with conn.cursor() as cur:
-                        cur.execute("SELECT 1")
-                except Exception:
-                    try:
-                        pool_obj.putconn(conn, close=True)
-                    except Exception:
-                        pass
+                    _discard(pool_obj, conn)
                     continue
-
-                # Capture conn in default arg to avoid closure bug
-                def return_to_pool(c=conn):
-                    try:
-                        pool_obj.putconn(c)
-                    except Exception:
-                        try:
-                            c.close()
-                        except Exception:
-                            pass
-
-                return UnifiedDBWrapper(conn, close_callback=return_to_pool)
+                # No liveness probe here: that was a full round trip per checkout.
+                # Idle connections are checked by check_idle_connections() in the
+                # background and UnifiedCursorWrapper replays a first statement that
+                # hits a dead one.
+                return _track(UnifiedDBWrapper(conn, pool_obj))
+            except pool.PoolError as e:
+                # Exhaustion will not clear up within the retry loop; go straight to
+                # the fallback instead of spinning.
+                pool_stats["pool_exhausted"] += 1
+                logger.warning("Connection pool exhausted: %s", e)
+                break
             except Exception as e:
                 logger.warning("Error getting connection from pool (attempt %d): %s", attempt + 1, e)
 
     if DB_URL:
         try:
-            conn = psycopg2.connect(DB_URL, sslmode='require', connect_timeout=10)
-            return UnifiedDBWrapper(conn)
+            pool_stats["fallback_connections"] += 1
+            conn = psycopg2.connect(DB_URL, sslmode='require', connect_timeout=10,
+                                    options=get_session_options())
+            return _track(UnifiedDBWrapper(conn))
         except Exception as e:
             logger.error("Direct connection failed: %s", e)
     return None
 
 
+# --- QUERY BUDGETS (psycopg2) ---
+# Blocking helpers run on DB executor threads, out of reach of asyncio
+# cancellation. run_in_db_executor(..., budget=) opens a cancellable() scope
+# around the job; every connection the job borrows is recorded there so that,
+# once the budget runs out, the event loop can cancel_job() and have Postgres
+# abort the statement in flight (psycopg2's conn.cancel() is thread-safe).
+_job_local = threading.local()
+
+
+@contextmanager
+def cancellable(job):
+    _job_local.job = job
+    try:
+        yield
+    finally:
+        _job_local.job = None
+
+
+def _track(db):
+    job = getattr(_job_local, "job", None)
+    if job is not None:
+        job.append(db)
+    return db
+
+
+def cancel_job(job):
+    for db in job:
+        # Under the release lock: once the job has handed the connection back,
+        # a cancel would hit whichever command borrowed it next.
+        with db._release_lock:
+            if db.released or db.conn.closed:
+                continue
+            try:
+                db.conn.cancel()
+            except Exception as e:
+                logger.warning("Cancelling a timed-out query failed: %s", e)
+
+
+def check_idle_connections():
+    """Probe the connections sitting idle in the pool and drop the dead ones.
+
+    Runs off the hot path (lifecycle keep_alive). The pool keeps at most minconn
+    connections idle (putconn closes the rest), so borrowing minconn through
+    getconn reaches every idle one; if commands hold some of them, getconn
+    opens the shortfall, which stays in the pool as its idle floor.
+    """
+    pool_obj = get_db_connection_pool()
+    if not pool_obj:
+        return
+    borrowed = []
+    try:
+        for _ in range(pool_obj.minconn):
+            borrowed.append(pool_obj.getconn())
+    except pool.PoolError:
+        pass
+    for conn in borrowed:
+        pool_stats["idle_checked"] += 1
+        try:
+            if not conn.closed:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+                pool_obj.putconn(conn)
+                continue
+        except Exception:
+            pass
+        _discard(pool_obj, conn)
+
+
 def close_pool():
     global _pg_pool
     if _pg_pool:
@@ -116,32 +268,82 @@ def close_pool():
         logger.info("Database connection pool closed")
 
 
-def get_default_season():
+# --- QUERY CATALOG (psycopg2) ---
+# psycopg2 has no statement cache of its own, so catalog entries are prepared
+# with an explicit PREPARE the first time each pooled connection runs them.
+# Prepared statements are session-scoped and survive rollbacks; the set below
+# dies with the connection object when the pool discards it.
+_prepared = weakref.WeakKeyDictionary()
+_PARAM_RE = re.compile(r"%s")
+
+
+def _numbered(sql):
+    counter = iter(range(1, sql.count("%s") + 1))
+    return _PARAM_RE.sub(lambda _: f"${next(counter)}", sql)
+
+
+def execute_named(cursor, name, params=(), season=None):
+    """Run a queries.CATALOG statement on a UnifiedCursorWrapper by name."""
+    key, sql, sp = queries.resolve(name, season)
+    args = (*params, *sp)
+    if not DB_PREPARED_STATEMENTS:  # e.g. behind the transaction pooler: plain statements
+        return cursor.execute(sql, args)
+    stmt = f"skipio_{key}"
+    if key not in _prepared.get(cursor.connection, ()):
+        cursor.execute(f"PREPARE {stmt} AS {_numbered(sql)}")
+        # Read the connection after executing: a stale-connection replay swaps it
+        _prepared.setdefault(cursor.connection, set()).add(key)
+    if not args:
+        return cursor.execute(f"EXECUTE {stmt}")
+    return cursor.execute(f"EXECUTE {stmt}({', '.join(['%s'] * len(args))})", args)
+
+
+# --- SEASON REGISTRY ---
+# The seasons table changes a handful of times a year, yet nearly every command
+# needs the active season. It is loaded once (setup_hook), re-read by the
+# lifecycle season_refresh loop every SEASON_REFRESH_SECONDS, and reloaded on
+# demand with refresh_seasons() (/refresh_seasons). Readers never touch the DB
+# once the registry is loaded.
+_season_registry = {"seasons": [], "default": None, "loaded_at": 0.0, "attempted": False}
+_season_lock = threading.Lock()
+
+
+def refresh_seasons():
+    """Reload the seasons table into the registry. Blocking; returns True on success."""
     try:
         with get_conn() as conn:
             if not conn:
-                return None
+                return False
             cursor = conn.cursor()
-            cursor.execute("SELECT id FROM seasons WHERE is_active = true ORDER BY id DESC LIMIT 1")
-            row = cursor.fetchone()
-            if row:
-                return row[0]
-            cursor.execute("SELECT id FROM seasons ORDER BY id DESC LIMIT 1")
-            row = cursor.fetchone()
-            return row[0] if row else None
+            cursor.execute("SELECT id, name, is_active FROM seasons ORDER BY id DESC")
+            rows = cursor.fetchall()
     except Exception as e:
-        logger.warning("get_default_season failed: %s", e)
-        return None
+        logger.warning("refresh_seasons failed: %s", e)
+        return False
+    finally:
+        _season_registry["attempted"] = True
+    # Same rule as the old per-call lookup: newest active season, else newest season
+    default = next((sid for sid, _, active in rows if active), rows[0][0] if rows else None)
+    with _season_lock:
+        _season_registry["seasons"] = [(sid, name) for sid, name, _ in rows]
+        _season_registry["default"] = default
+        _season_registry["loaded_at"] = time.time()
+    return True
+
+
+def _ensure_seasons():
+    # Only the very first caller in a process that skipped the startup load pays
+    # for a query; after a failed attempt readers get empty data until the
+    # scheduled refresh succeeds instead of retrying on every call.
+    if not _season_registry["attempted"]:
+        refresh_seasons()
+
+
+def get_default_season():
+    _ensure_seasons()
+    return _season_registry["default"]
 
 
 def get_seasons():
-    try:
-        with get_conn() as conn:
-            if not conn:
-                return []
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, name FROM seasons ORDER BY id DESC")
-            return cursor.fetchall()
-    except Exception as e:
-        logger.warning("get_seasons failed: %s", e)
-        return []
+    _ensure_seasons()
+    return list(_season_registry["seasons"])
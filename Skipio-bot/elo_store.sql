@@ -0,0 +1,46 @@
+-- ============================================================
+-- Skipio ELO store tables
+-- ============================================================
+-- PURPOSE: The materialised ELO that /elo and /skipio-leaderboard
+--          read (utils/elo_store.py). Run once in the Supabase
+--          SQL Editor before starting the bot; re-running is a
+--          no-op. The bot fills the tables itself: a scope (a
+--          season id or 'all') is built the first time a command
+--          asks for it.
+--
+-- skipio_elo_history  every player's ELO after each map
+-- skipio_elo_ratings  one summary row per player, in leaderboard
+--                     order through skipio_elo_ratings_by_elo
+-- skipio_elo_scopes   when each scope was built and a fingerprint
+--                     of the data it was built from
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS skipio_elo_history (
+    scope      TEXT NOT NULL,
+    player_id  BIGINT NOT NULL,
+    seq        INTEGER NOT NULL,
+    match_id   BIGINT NOT NULL,
+    elo        INTEGER NOT NULL,
+    raw_score  DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (scope, player_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS skipio_elo_ratings (
+    scope      TEXT NOT NULL,
+    player_id  BIGINT NOT NULL,
+    elo        INTEGER NOT NULL,
+    prev_elo   INTEGER,
+    maps       INTEGER NOT NULL,
+    avg_raw    DOUBLE PRECISION NOT NULL,
+    first_seen INTEGER NOT NULL,
+    PRIMARY KEY (scope, player_id)
+);
+CREATE INDEX IF NOT EXISTS skipio_elo_ratings_by_elo ON skipio_elo_ratings (scope, elo DESC, first_seen);
+
+CREATE TABLE IF NOT EXISTS skipio_elo_scopes (
+    scope         TEXT PRIMARY KEY,
+    matches       INTEGER NOT NULL,
+    stat_rows     INTEGER NOT NULL,
+    acs_total     BIGINT NOT NULL,
+    rebuilt_at    TIMESTAMPTZ NOT NULL DEFAULT now()
+);
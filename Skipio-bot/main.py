@@ -3,6 +3,9 @@ import asyncio
 import discord
 from discord.ext import commands
 from config import DISCORD_TOKEN
+from database import close_pool, refresh_seasons
+from async_database import close_async_pool
+from utils.helpers import run_in_db_executor, shutdown_db_executor
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,6 +22,7 @@ COGS = [
     'cogs.matches',
     'cogs.match_report',
     'cogs.ai',
+    'cogs.admin',
 ]
 
 
@@ -29,6 +33,9 @@ class MyBot(commands.Bot):
         super().__init__(command_prefix="!", intents=intents)
 
     async def setup_hook(self):
+        # Commands read the active season from memory; load it before they can run
+        await run_in_db_executor(refresh_seasons)
+
         for cog in COGS:
             try:
                 await self.load_extension(cog)
@@ -41,6 +48,12 @@ class MyBot(commands.Bot):
         if lifecycle:
             await lifecycle.sync_commands()
 
+    async def close(self):
+        await close_async_pool()
+        shutdown_db_executor()
+        close_pool()
+        await super().close()
+
 async def main():
     bot = MyBot()
     async with bot:
@@ -0,0 +1,85 @@
+import functools
+
+# --- SHARED QUERY CATALOG ---
+# Statements that several cogs/charts run with the same shape. Each one is
+# registered once here and executed by name through database.execute_named()
+# (psycopg2) or async_database.execute_named() (psycopg 3), which prepare it
+# once per pooled connection so Postgres plans it once instead of on every call.
+#
+# Season-filtered statements contain `{sf}` and exist in two variants: the
+# season variant takes two trailing season parameters, the `all` variant none.
+# Callers pass only their own parameters plus `season=`; the season arguments
+# are appended for them.
+
+SEASON_FILTER = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))"
+
+CATALOG = {
+    # ── lookups ──────────────────────────────────────────────────────────────
+    "team_by_name": """
+        SELECT id, name, tag, group_name FROM teams
+        WHERE name ILIKE %s OR tag ILIKE %s LIMIT 1
+    """,
+    "player_by_uuid": """
+        SELECT id, name, riot_id, rank, uuid FROM players WHERE uuid = %s LIMIT 1
+    """,
+    "player_by_name": """
+        SELECT id, name, riot_id, rank, uuid FROM players
+        WHERE name ILIKE %s OR riot_id ILIKE %s LIMIT 1
+    """,
+
+    # ── season-filtered aggregates ───────────────────────────────────────────
+    # (player_id) → maps, acs, kills, deaths, assists, adr, kast, hs, fk, fd, mk, dd_delta
+    "player_totals": """
+        SELECT COUNT(*), AVG(acs), SUM(kills), SUM(deaths), SUM(assists),
+               AVG(adr), AVG(kast), AVG(hs_pct),
+               SUM(fk), SUM(fd), SUM(mk), AVG(dd_delta)
+        FROM match_stats_map msm
+        JOIN matches m ON msm.match_id = m.id
+        WHERE msm.player_id = %s AND m.status = 'completed' AND {sf}
+    """,
+    # (team_id, team_id, team_id) → map_name, played, wins; most played first
+    "team_map_record": """
+        SELECT mm.map_name, COUNT(*) as played,
+               SUM(CASE WHEN m.winner_id = %s THEN 1 ELSE 0 END) as wins
+        FROM match_maps mm JOIN matches m ON mm.match_id = m.id
+        WHERE (m.team1_id = %s OR m.team2_id = %s) AND m.status = 'completed' AND {sf}
+        GROUP BY mm.map_name ORDER BY played DESC
+    """,
+    # () → league acs, kd, adr, kast, hs averages
+    "league_averages": """
+        SELECT AVG(msm.acs), AVG(msm.kills::float/NULLIF(msm.deaths, 0)),
+               AVG(msm.adr), AVG(msm.kast), AVG(msm.hs_pct)
+        FROM match_stats_map msm JOIN matches m ON msm.match_id = m.id
+        WHERE m.status = 'completed' AND {sf}
+    """,
+}
+
+
+def season_params(season):
+    """(sf, sp) for ad-hoc f-string queries — the same filter the catalog uses."""
+    if season == 'all':
+        return "1=1", ()
+    return SEASON_FILTER, (season, season)
+
+
+def resolve(name, season=None):
+    """Return (statement_key, sql, extra_params) for a catalog entry.
+
+    `statement_key` is unique per variant (`player_totals`, `player_totals__all`)
+    and doubles as the prepared statement name suffix.
+    """
+    if "{sf}" not in CATALOG[name]:
+        return (*_compile(name, None), ())
+    if season is None:
+        raise ValueError(f"query {name!r} is season-filtered; pass season=")
+    sf, sp = season_params(season)
+    return (*_compile(name, sf), sp)
+
+
+@functools.lru_cache(maxsize=None)
+def _compile(name, sf):
+    sql = CATALOG[name]
+    if sf is None:
+        return name, " ".join(sql.split())
+    key = f"{name}__all" if sf == "1=1" else name
+    return key, " ".join(sql.format(sf=sf).split())
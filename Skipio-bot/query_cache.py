@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+from config import QUERY_CACHE_TTL, QUERY_CACHE_SIZE
+
+# --- QUERY RESULT CACHE ---
+# League data only changes when a match is reported or forfeited, so read-only
+# commands can reuse results instead of going back to Supabase. Async cursors
+# opened with `cache_season=` (acursor / AsyncDBWrapper.cursor) serve SELECTs
+# through this cache, keyed by (sql, params) and tagged with the season they read.
+#
+# Entries expire after QUERY_CACHE_TTL seconds and the least recently used
+# entry is evicted beyond QUERY_CACHE_SIZE. When the bot itself writes a match
+# result it calls invalidate_season() for that match's season; 'all' entries
+# span every season and are dropped on any write. Portal-side edits are only
+# picked up when the TTL runs out.
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (expires_at, season, rows)
+cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidated": 0}
+
+
+def enabled():
+    return QUERY_CACHE_TTL > 0 and QUERY_CACHE_SIZE > 0
+
+
+def cacheable(sql):
+    head = sql.lstrip()[:6].upper() if isinstance(sql, str) else ""
+    return head.startswith("SELECT") or head.startswith("WITH")
+
+
+def make_key(sql, params):
+    return sql, repr(params)
+
+
+def get(key):
+    """Cached rows for key, or None on a miss/expired entry."""
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del _entries[key]
+            cache_stats["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        cache_stats["hits"] += 1
+        return entry[2]
+
+
+def put(key, rows, season):
+    with _lock:
+        _entries[key] = (time.monotonic() + QUERY_CACHE_TTL, season, rows)
+        _entries.move_to_end(key)
+        while len(_entries) > QUERY_CACHE_SIZE:
+            _entries.popitem(last=False)
+            cache_stats["evictions"] += 1
+
+
+def invalidate_season(season_id):
+    """Drop entries that may include a match from season_id (None = legacy S23)."""
+    season_id = season_id or 'S23'
+    with _lock:
+        stale = [k for k, (_, season, _) in _entries.items() if season in (season_id, 'all')]
+        for k in stale:
+            del _entries[k]
+        cache_stats["invalidated"] += len(stale)
+    return len(stale)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def get_cache_stats():
+    with _lock:
+        stats = dict(cache_stats)
+        stats["entries"] = len(_entries)
+    return stats
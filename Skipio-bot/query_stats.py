@@ -0,0 +1,120 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from config import SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("skipio.slow_query")
+
+# --- QUERY INSTRUMENTATION ---
+# Every bot statement goes through UnifiedCursorWrapper.execute (psycopg2) or
+# AsyncCursorWrapper.execute (psycopg 3); both report here. Statements are keyed
+# by normalized SQL so the f-string variants of one query (season vs 'all',
+# different LIMITs, inlined literals) aggregate under the same entry.
+#
+# Latencies go into fixed millisecond buckets; percentiles are read back from
+# the histogram, so memory per statement stays constant however many calls run.
+
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+MAX_STATEMENTS = 500  # distinct normalized statements tracked; later ones pool into "<other>"
+
+_WS_RE = re.compile(r"\s+")
+_STR_RE = re.compile(r"'(?:[^']|'')*'")
+_NUM_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+_lock = threading.Lock()
+_stats = {}
+slow_queries = deque(maxlen=50)
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and replace literals with `?` (e.g. `LIMIT 5` → `LIMIT ?`)."""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    elif not isinstance(sql, str):
+        sql = str(sql)  # psycopg sql.Composed
+    sql = _STR_RE.sub("?", sql)
+    sql = _NUM_RE.sub("?", sql)
+    sql = _IN_RE.sub("(?)", sql)
+    return _WS_RE.sub(" ", sql).strip()
+
+
+def redact_params(params):
+    """Describe bound parameters by type only, so slow-query logs carry no user data."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: type(v).__name__ for k, v in params.items()}
+    return tuple(type(v).__name__ for v in params)
+
+
+def record(sql, params, elapsed, rowcount):
+    """Account one executed statement; `elapsed` is in seconds, `rowcount` may be -1/None."""
+    ms = elapsed * 1000
+    key = normalize_sql(sql)
+    rows = rowcount if rowcount and rowcount > 0 else 0
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            if len(_stats) >= MAX_STATEMENTS:
+                key = "<other>"
+                entry = _stats.get(key)
+            if entry is None:
+                entry = _stats[key] = {
+                    "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                    "buckets": [0] * len(BUCKETS_MS),
+                }
+        entry["calls"] += 1
+        entry["total_ms"] += ms
+        entry["max_ms"] = max(entry["max_ms"], ms)
+        entry["rows"] += rows
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                entry["buckets"][i] += 1
+                break
+    if ms >= SLOW_QUERY_MS:
+        redacted = redact_params(params)
+        slow_queries.append({"at": time.time(), "ms": ms, "rows": rows, "sql": key, "params": redacted})
+        slow_logger.warning("slow query %.0fms rows=%d params=%s: %s", ms, rows, redacted, key[:500])
+
+
+def _percentile(buckets, calls, q):
+    """Upper bound of the histogram bucket holding the q-th percentile."""
+    target = q * calls
+    seen = 0
+    for bound, count in zip(BUCKETS_MS, buckets):
+        seen += count
+        if seen >= target:
+            return bound
+    return BUCKETS_MS[-1]
+
+
+def top_statements(n=10, order_by="total_ms"):
+    """The n most expensive statements, sorted by total_ms, avg_ms, max_ms, calls or rows."""
+    with _lock:
+        snapshot = [(sql, dict(e, buckets=list(e["buckets"]))) for sql, e in _stats.items()]
+    out = []
+    for sql, e in snapshot:
+        calls = e["calls"]
+        out.append({
+            "sql": sql,
+            "calls": calls,
+            "total_ms": e["total_ms"],
+            "avg_ms": e["total_ms"] / calls,
+            "max_ms": e["max_ms"],
+            "p50_ms": _percentile(e["buckets"], calls, 0.50),
+            "p95_ms": _percentile(e["buckets"], calls, 0.95),
+            "rows": e["rows"],
+            "avg_rows": e["rows"] / calls,
+        })
+    out.sort(key=lambda s: s[order_by], reverse=True)
+    return out[:n]
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+    slow_queries.clear()
@@ -100,15 +100,6 @@ def get_match_performance_embed(match_id):
         """, (match_id,))
         perf = cursor.fetchall()
 
-        cursor.execute("""
-            SELECT t1.name, t2.name, m.winner_id, t1.id, t2.id
-            FROM matches m
-            JOIN teams t1 ON m.team1_id = t1.id
-            JOIN teams t2 ON m.team2_id = t2.id
-            WHERE m.id = %s
-        """, (match_id,))
-        match_row = cursor.fetchone()
-
     embed = discord.Embed(
         title=f"⭐ Performance Scoreboard  ·  Match #{match_id}",
         color=V_PURPLE
@@ -117,7 +108,8 @@ def get_match_performance_embed(match_id):
         embed.description = "No performance data found."
         return embed
 
-    t1n, t2n, wid, t1id, t2id = match_row if match_row else ("T1","T2",None,None,None)
+    # Every scoreboard row already carries the match winner; no second round trip
+    wid = perf[0][16]
 
     # Group by team
     teams = {}
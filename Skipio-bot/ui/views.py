@@ -1,5 +1,5 @@
 import discord
-from utils.helpers import run_in_executor
+from utils.helpers import run_in_db_executor, query_budget
 from utils.charts import (
     generate_player_chart, generate_match_economy_chart,
     generate_team_map_chart, generate_radar_chart
@@ -38,9 +38,9 @@ class ChartControls(discord.ui.View):
     async def _render(self, interaction: discord.Interaction):
         try:
             if self.current_type == "radar":
-                file, embed = await run_in_executor(generate_radar_chart, self.player_id, self.season)
+                file, embed = await run_in_db_executor(generate_radar_chart, self.player_id, self.season, budget=query_budget(interaction))
             else:
-                file, embed = await run_in_executor(generate_player_chart, self.player_id, self.season, self.current_type)
+                file, embed = await run_in_db_executor(generate_player_chart, self.player_id, self.season, self.current_type, budget=query_budget(interaction))
             if not file:
                 return await interaction.response.send_message("❌ No data available.", ephemeral=True)
             self._update_button_styles()
@@ -105,20 +105,20 @@ class MatchFlowView(discord.ui.View):
         self._sync_button_styles()
         tab = self.current_tab
         if tab == "overview":
-            embed = await run_in_executor(get_match_overview_embed, self.match_id)
+            embed = await run_in_db_executor(get_match_overview_embed, self.match_id, budget=query_budget(interaction))
             await interaction.response.edit_message(attachments=[], embed=embed, view=self)
         elif tab == "economy":
-            file, embed = await run_in_executor(generate_match_economy_chart, self.match_id)
+            file, embed = await run_in_db_executor(generate_match_economy_chart, self.match_id, budget=query_budget(interaction))
             if file:
                 await interaction.response.edit_message(attachments=[file], embed=embed, view=self)
             else:
                 embed = discord.Embed(description="❌ No economy data for this match.", color=C_RED)
                 await interaction.response.edit_message(attachments=[], embed=embed, view=self)
         elif tab == "performance":
-            embed = await run_in_executor(get_match_performance_embed, self.match_id)
+            embed = await run_in_db_executor(get_match_performance_embed, self.match_id, budget=query_budget(interaction))
             await interaction.response.edit_message(attachments=[], embed=embed, view=self)
         elif tab == "rounds":
-            embed = await run_in_executor(get_match_rounds_embed, self.match_id)
+            embed = await run_in_db_executor(get_match_rounds_embed, self.match_id, budget=query_budget(interaction))
             await interaction.response.edit_message(attachments=[], embed=embed, view=self)
 
     @discord.ui.button(label="📊 Overview", style=discord.ButtonStyle.primary)
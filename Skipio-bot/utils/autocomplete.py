@@ -2,8 +2,8 @@ import logging
 import discord
 from discord import app_commands
 from typing import List
-from database import get_conn
-from .helpers import run_in_executor
+from database import get_conn, get_seasons, QueryTimeout
+from .helpers import run_in_db_executor, query_budget
 
 logger = logging.getLogger(__name__)
 
@@ -62,32 +62,36 @@ def _fetch_rank_choices(query: str) -> List[app_commands.Choice[str]]:
         filtered = ranks
     return [app_commands.Choice(name=r, value=r) for r in filtered[:25]]
 
+async def db_choices(interaction: discord.Interaction, fetch, current: str) -> List[app_commands.Choice[str]]:
+    """Run a blocking choice lookup within Discord's 3s autocomplete window.
+
+    A lookup that would answer too late is cancelled on the server; the user
+    simply sees no suggestions for that keystroke.
+    """
+    try:
+        return await run_in_db_executor(fetch, current, budget=query_budget(interaction))
+    except QueryTimeout:
+        return []
+
 async def team_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
-    return await run_in_executor(_fetch_team_choices, current)
+    return await db_choices(interaction, _fetch_team_choices, current)
 
 async def player_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
-    return await run_in_executor(_fetch_player_choices, current)
+    return await db_choices(interaction, _fetch_player_choices, current)
 
 async def match_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
-    return await run_in_executor(_fetch_match_choices, current)
+    return await db_choices(interaction, _fetch_match_choices, current)
 
 async def rank_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
     return _fetch_rank_choices(current)
 
 def _fetch_season_choices(query: str) -> List[app_commands.Choice[str]]:
-    try:
-        with get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, name FROM seasons ORDER BY id DESC")
-            seasons = cursor.fetchall()
-            options = [app_commands.Choice(name="All Time", value="all")]
-            options.extend([app_commands.Choice(name=name, value=sid) for sid, name in seasons])
-            if query:
-                return [o for o in options if query.lower() in o.name.lower()][:25]
-            return options[:25]
-    except Exception as e:
-        logger.warning("season autocomplete failed: %s", e)
-        return [app_commands.Choice(name="All Time", value="all")]
+    # Served from the in-memory season registry; no DB round trip per keystroke
+    options = [app_commands.Choice(name="All Time", value="all")]
+    options.extend([app_commands.Choice(name=name, value=sid) for sid, name in get_seasons()])
+    if query:
+        return [o for o in options if query.lower() in o.name.lower()][:25]
+    return options[:25]
 
 async def season_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
-    return await run_in_executor(_fetch_season_choices, current)
+    return _fetch_season_choices(current)
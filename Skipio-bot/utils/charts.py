@@ -8,7 +8,7 @@ from scipy.interpolate import make_interp_spline
 import numpy as np
 import pandas as pd
 import io
-from database import get_conn
+from database import get_conn, execute_named
 from utils.design import (
     V_RED, V_TEAL, V_GOLD, V_BLUE, V_PURPLE,
     V_BG, V_BG2, V_GRID, V_TEXT, V_MUTED,
@@ -65,12 +65,7 @@ def generate_radar_chart(player_id, season):
         )
 
         # League benchmarks (used to normalise 0-100)
-        cursor.execute(f"""
-            SELECT AVG(msm.acs), AVG(msm.kills::float/NULLIF(msm.deaths,0)),
-                   AVG(msm.adr), AVG(msm.kast), AVG(msm.hs_pct)
-            FROM match_stats_map msm JOIN matches m ON msm.match_id = m.id
-            WHERE m.status = 'completed' AND {sf}
-        """, (season, season) if season != 'all' else ())
+        execute_named(cursor, "league_averages", season=season)
         lg = cursor.fetchone()
         lg_acs, lg_kd, lg_adr, lg_kast, lg_hs = [v or 1 for v in lg]
 
@@ -151,11 +146,8 @@ def generate_player_chart(player_id, season, chart_type="acs"):
         df['kd'] = df['kills'] / df['deaths'].replace(0, 1)
 
         # League average
-        if chart_type == "kd":
-            cursor.execute(f"SELECT AVG(msm.kills::float/NULLIF(msm.deaths,0)) FROM match_stats_map msm JOIN matches m ON msm.match_id=m.id WHERE m.status='completed' AND {sf}", (season,season) if season!='all' else ())
-        else:
-            cursor.execute(f"SELECT AVG(msm.{chart_type}) FROM match_stats_map msm JOIN matches m ON msm.match_id=m.id WHERE m.status='completed' AND {sf}", (season,season) if season!='all' else ())
-        lg_avg = (cursor.fetchone() or [0])[0] or 0
+        execute_named(cursor, "league_averages", season=season)
+        lg_avg = (cursor.fetchone() or [0] * 3)[("acs", "kd", "adr").index(chart_type)] or 0
 
     colors  = {"acs": V_TEAL, "kd": V_RED, "adr": V_GOLD}
     labels  = {"acs": "Average Combat Score", "kd": "Kill / Death Ratio", "adr": "Avg Damage / Round"}
@@ -226,14 +218,7 @@ def generate_player_chart(player_id, season, chart_type="acs"):
 def generate_team_map_chart(team_id, season):
     with get_conn() as conn:
         cursor = conn.cursor()
-        sf = "(m.season_id = %s OR (m.season_id IS NULL AND %s = 'S23'))" if season != 'all' else "1=1"
-        cursor.execute(f"""
-            SELECT mm.map_name, COUNT(*) as played,
-                   SUM(CASE WHEN m.winner_id = %s THEN 1 ELSE 0 END) as wins
-            FROM match_maps mm JOIN matches m ON mm.match_id = m.id
-            WHERE (m.team1_id = %s OR m.team2_id = %s) AND {sf} AND m.status = 'completed'
-            GROUP BY mm.map_name ORDER BY played DESC
-        """, (team_id, team_id, team_id, season, season) if season != 'all' else (team_id, team_id, team_id))
+        execute_named(cursor, "team_map_record", (team_id, team_id, team_id), season=season)
         data = cursor.fetchall()
         if not data: return None, None
         cursor.execute("SELECT name FROM teams WHERE id = %s", (team_id,))
@@ -1,4 +1,8 @@
 import logging
+import time
+import numpy as np
+import query_stats
+from database import get_conn
 
 logger = logging.getLogger(__name__)
 
@@ -18,63 +22,219 @@ def _rank_grp(rank: str) -> int:
     return 2
 
 
-def calculate_skipio_elos(cursor, season: str = 'all') -> tuple[dict, list]:
-    """Compute Skipio ELO history for all players from an open DB cursor.
+# Same tiers as _rank_grp, evaluated by Postgres while it streams the stat rows
+_RANK_GROUP_SQL = """
+    CASE
+        WHEN UPPER(p.rank) LIKE '%%IRON%%' OR UPPER(p.rank) LIKE '%%BRONZE%%' THEN 1
+        WHEN UPPER(p.rank) LIKE '%%SILVER%%' OR UPPER(p.rank) LIKE '%%GOLD%%' THEN 2
+        WHEN UPPER(p.rank) LIKE '%%PLATINUM%%' OR UPPER(p.rank) LIKE '%%DIAMOND%%' THEN 3
+        WHEN UPPER(p.rank) LIKE '%%ASCENDANT%%' OR UPPER(p.rank) LIKE '%%IMMORTAL%%'
+          OR UPPER(p.rank) LIKE '%%RADIANT%%' THEN 4
+        ELSE 2
+    END"""
+
+# The raw score in float8 with the same operation order as _raw_scores, so
+# Postgres and NumPy round alike. adr and kast are REAL: they go through their
+# text form, the value psycopg2 parsed from it, since a plain ::float8 widens
+# the float4 bits instead (143.7 -> 143.6999969482422).
+_RAW_SCORE_SQL = """
+    COALESCE(msm.acs, 0)::float8 * 0.40::float8
+    + CASE WHEN COALESCE(msm.deaths, 0) <> 0 THEN COALESCE(msm.kills, 0)::float8 / msm.deaths
+           ELSE COALESCE(msm.kills, 0)::float8 END * 30 * 0.30::float8
+    + COALESCE(msm.adr::text::float8, 0) * 0.20::float8
+    + COALESCE(msm.kast::text::float8, 0) * 0.10::float8"""
+
+# Bytes of COPY output buffered before they are parsed into the arrays
+ELO_COPY_CHUNK = 1 << 20
+
+# Player id standing in for a NULL player_id. Such rows count towards the
+# group and lobby averages (as group 2, like the loop this engine replaced)
+# but get no history of their own.
+_NO_PLAYER = -1
+
+
+class _CopyArrays:
+    """File-like sink for COPY ... TO STDOUT (CSV): parses numeric rows into float
+    arrays every ELO_COPY_CHUNK bytes instead of building a tuple per row.
+
+    psycopg2 hands over one complete row per write(), so chunks end on a row.
+    """
+    def __init__(self, columns):
+        self.columns = columns
+        self.chunks = []
+        self._pending = []
+        self._size = 0
+
+    def write(self, data):
+        self._pending.append(data)
+        self._size += len(data)
+        if self._size >= ELO_COPY_CHUNK:
+            self._parse()
+
+    def _parse(self):
+        if self._pending:
+            text = b"".join(self._pending).replace(b"\n", b",").decode()
+            self.chunks.append(np.fromstring(text, sep=","))
+            self._pending, self._size = [], 0
+
+    def array(self):
+        self._parse()
+        values = np.concatenate(self.chunks) if self.chunks else np.empty(0)
+        return values.reshape(-1, self.columns)
+
+
+def _stream_elo_inputs(cursor, scopes) -> tuple:
+    """(player_ids, match_ids, raw_scores, rank_groups, season_pos) arrays for completed maps.
+
+    scopes are 'all' and/or season ids; only the rows they need are read.
+    season_pos is each row's 1-based position in the scopes list, 0 for maps
+    of seasons not in it (which only 'all' uses). Matches are joined on the
+    server, which also works out each row's raw score and rank group. The rows
+    are streamed with COPY ... TO STDOUT and parsed in ELO_COPY_CHUNK pieces;
+    every column is non-NULL, as the CSV parse needs, so a missing player
+    comes through as _NO_PLAYER.
+    Neither the statement nor client memory grows with the league beyond the
+    arrays themselves.
+    """
+    scopes = list(scopes)
+    seasons = [s for s in scopes if s != 'all']
+    sf = "1=1" if 'all' in scopes else "m.season_id = ANY(%s)"
+    # Rank groups once per player, not once per stat row
+    query = f"""
+        WITH ranks AS MATERIALIZED (SELECT p.id, {_RANK_GROUP_SQL} AS grp FROM players p)
+        SELECT COALESCE(msm.player_id, {_NO_PLAYER}), msm.match_id, COALESCE(msm.map_index, 0),
+               {_RAW_SCORE_SQL}, COALESCE(r.grp, 2),
+               COALESCE(array_position(%s::text[], m.season_id), 0)
+        FROM match_stats_map msm
+        JOIN matches m ON m.id = msm.match_id
+        LEFT JOIN ranks r ON r.id = msm.player_id
+        WHERE m.status = 'completed' AND {sf}
+    """
+    params = (scopes,) + ((seasons,) if 'all' not in scopes else ())
+    # copy_expert takes no parameters; mogrify quotes the season ids
+    sql = cursor.mogrify(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", params).decode()
+    sink = _CopyArrays(6)
+    start = time.perf_counter()
+    cursor.copy_expert(sql, sink)
+    rows = sink.array()
+    query_stats.record(query, params, time.perf_counter() - start, len(rows))
+    # Map order within each match, sorted here rather than in the server's work_mem.
+    # Players of one map come back in no particular order; player id fixes it so
+    # every read (and every slice of a batch read) rates them alike.
+    rows = rows[np.lexsort((rows[:, 0], rows[:, 2], rows[:, 1]))]
+    return (rows[:, 0].astype(np.int64), rows[:, 1].astype(np.int64), rows[:, 3],
+            rows[:, 4].astype(np.int64), rows[:, 5].astype(np.int64))
+
+
+def _raw_scores(acs, kills, deaths, adr, kast):
+    kd = np.where(deaths != 0, kills / np.where(deaths != 0, deaths, 1.0), kills)
+    return acs * 0.40 + kd * 30 * 0.30 + adr * 0.20 + kast * 0.10
+
+
+def compute_skipio_elos(rows, p_groups: dict) -> tuple[dict, list]:
+    """Skipio ELO histories from raw stat rows, for the whole league at once.
+
+    rows are (player_id, match_id, acs, kills, deaths, adr, kast) in fetch order;
+    see _skipio_elos for the rating itself and the return values.
+    """
+    if not rows:
+        return {}, []
+    pid_col, mid_col, acs, kills, deaths, adr, kast = zip(*rows)
+    pids = np.array([_NO_PLAYER if p is None else p for p in pid_col], dtype=np.int64)
+    mids = np.array(mid_col, dtype=np.int64)
+    # None -> NaN -> 0, as the `or 0` fallbacks did
+    acs, kills, deaths, adr, kast = (np.nan_to_num(np.array(c, dtype=float)) for c in (acs, kills, deaths, adr, kast))
+    uniq_pids, pid_idx = np.unique(pids, return_inverse=True)
+    grp = np.array([p_groups.get(p, 2) for p in uniq_pids.tolist()], dtype=np.int64)[pid_idx]
+    return _skipio_elos(pids, mids, _raw_scores(acs, kills, deaths, adr, kast), grp)
+
+
+def _skipio_elos(pids, mids, raw, grp) -> tuple[dict, list]:
+    """Skipio ELO histories from per-map raw scores and rank groups.
 
     Uses a blended normalisation: 50% vs global rank-tier average, 50% vs
-    in-match lobby average.  Sorted by match_id for chronological ordering.
+    in-match lobby average. Sorted by match_id for chronological ordering.
+
+    Every sum is accumulated in row order (np.bincount, np.cumsum) exactly like
+    the running Python sums it replaced, so results match them to the last bit.
+
+    Rows of _NO_PLAYER count towards the averages but appear in neither result.
 
     Returns:
         player_history  — {player_id: [elo_after_each_map, ...]}
         appearances     — [(player_id, match_id, raw_score, rank_group)]
     """
-    cursor.execute("SELECT id, rank FROM players")
-    p_groups = {r[0]: _rank_grp(r[1]) for r in cursor.fetchall()}
-
-    sf = "1=1" if season == 'all' else "m.season_id = %s"
-    cursor.execute(
-        f"SELECT id FROM matches m WHERE m.status = 'completed' AND {sf}",
-        (season,) if season != 'all' else ()
-    )
-    m_ids = [r[0] for r in cursor.fetchall()]
-    if not m_ids:
+    if not len(pids):
         return {}, []
 
-    placeholders = ','.join(['%s'] * len(m_ids))
-    cursor.execute(f"""
-        SELECT player_id, match_id, acs, kills, deaths, adr, kast
-        FROM match_stats_map
-        WHERE match_id IN ({placeholders})
-    """, tuple(m_ids))
-
-    grp_totals: dict[int, list] = {1: [0.0, 0], 2: [0.0, 0], 3: [0.0, 0], 4: [0.0, 0]}
-    lobby_scores: dict[tuple, list] = {}
-    appearances: list[tuple] = []
-
-    for pid, mid, acs, kills, deaths, adr, kast in cursor.fetchall():
-        grp = p_groups.get(pid, 2)
-        kd = (kills / deaths) if deaths else (kills or 0)
-        raw = (acs or 0) * 0.40 + kd * 30 * 0.30 + (adr or 0) * 0.20 + (kast or 0) * 0.10
-        grp_totals[grp][0] += raw
-        grp_totals[grp][1] += 1
-        lobby_scores.setdefault((mid, grp), []).append(raw)
-        appearances.append((pid, mid, raw, grp))
-
-    grp_avgs = {g: (v[0] / v[1] if v[1] > 0 else 150.0) for g, v in grp_totals.items()}
-
-    player_history: dict[int, list] = {}
-    blended_acc: dict[int, list] = {}
-    appearances.sort(key=lambda x: x[1])
-
-    for pid, mid, raw, grp in appearances:
-        g_avg = grp_avgs[grp]
-        lobby = lobby_scores.get((mid, grp), [])
-        l_avg = sum(lobby) / len(lobby) if len(lobby) > 1 else g_avg
-        g_norm = (raw / g_avg * 100) if g_avg else 100.0
-        l_norm = (raw / l_avg * 100) if l_avg else 100.0
-        blended = g_norm * 0.5 + l_norm * 0.5
-        blended_acc.setdefault(pid, []).append(blended)
-        avg_so_far = sum(blended_acc[pid]) / len(blended_acc[pid])
-        player_history.setdefault(pid, []).append(round(1000 + (avg_so_far - 100) * 20))
+    grp_sum = np.bincount(grp, weights=raw, minlength=5)
+    grp_cnt = np.bincount(grp, minlength=5)
+    grp_avgs = np.full(5, 150.0)
+    np.divide(grp_sum, grp_cnt, out=grp_avgs, where=grp_cnt > 0)
+
+    _, lobby = np.unique(mids * 5 + grp, return_inverse=True)
+    lobby_sum = np.bincount(lobby, weights=raw)
+    lobby_cnt = np.bincount(lobby)
 
+    # Chronological from here on; the stable sort keeps fetch order within a match
+    order = np.argsort(mids, kind="stable")
+    pids, mids, raw, grp, lobby = pids[order], mids[order], raw[order], grp[order], lobby[order]
+
+    g_avg = grp_avgs[grp]
+    l_avg = np.where(lobby_cnt[lobby] > 1, lobby_sum[lobby] / lobby_cnt[lobby], g_avg)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g_norm = np.where(g_avg != 0, raw / g_avg * 100, 100.0)
+        l_norm = np.where(l_avg != 0, raw / l_avg * 100, 100.0)
+    blended = g_norm * 0.5 + l_norm * 0.5
+
+    # Rows without a player end here, having counted towards the averages
+    if (pids == _NO_PLAYER).any():
+        kept = pids != _NO_PLAYER
+        pids, mids, raw, grp, blended = pids[kept], mids[kept], raw[kept], grp[kept], blended[kept]
+        if not len(pids):
+            return {}, []
+
+    # Running mean per player: one cumsum per player keeps each prefix sum exact
+    by_player = np.argsort(pids, kind="stable")
+    starts = np.flatnonzero(np.r_[True, pids[by_player][1:] != pids[by_player][:-1]])
+    segments = np.split(by_player, starts[1:])
+    segments.sort(key=lambda seg: seg[0])  # first appearance first, like the dict it replaced
+    player_history = {}
+    for seg in segments:
+        running = np.cumsum(blended[seg]) / np.arange(1, len(seg) + 1)
+        player_history[int(pids[seg[0]])] = np.round(1000 + (running - 100) * 20).astype(np.int64).tolist()
+
+    appearances = list(zip(pids.tolist(), mids.tolist(), raw.tolist(), grp.tolist()))
     return player_history, appearances
+
+
+def calculate_skipio_elos(cursor, season: str = 'all') -> tuple[dict, list]:
+    """Compute Skipio ELO history for all players from an open DB cursor (see _skipio_elos)."""
+    return calculate_scope_elos(cursor, [season])[season]
+
+
+def calculate_scope_elos(cursor, scopes) -> dict:
+    """calculate_skipio_elos for several scopes from a single read of the stat rows.
+
+    The rows of 'all' already hold every season's, so the league is streamed
+    once and each season is rated on its slice of the arrays.
+
+    Returns {scope: (player_history, appearances)}.
+    """
+    scopes = list(dict.fromkeys(scopes))
+    pids, mids, raw, grp, season_pos = _stream_elo_inputs(cursor, scopes)
+    results = {}
+    for pos, scope in enumerate(scopes, 1):
+        # The lexsort above is stable, so a slice keeps the order of a per-season read
+        rows = slice(None) if scope == 'all' else season_pos == pos
+        results[scope] = _skipio_elos(pids[rows], mids[rows], raw[rows], grp[rows])
+    return results
+
+
+def load_skipio_elos(season: str = 'all') -> tuple[dict, list]:
+    """Blocking wrapper around calculate_skipio_elos on a pooled connection.
+
+    Meant for run_in_db_executor so async cogs keep the ELO scan off the event loop.
+    """
+    with get_conn() as conn:
+        return calculate_skipio_elos(conn.cursor(), season)
@@ -0,0 +1,336 @@
+import bisect
+import io
+import logging
+import re
+import threading
+from collections import OrderedDict
+from database import get_conn, get_seasons
+from utils.elo import calculate_scope_elos
+from utils.formatting import RANK_TIERS
+
+logger = logging.getLogger(__name__)
+
+# --- SKIPIO ELO STORE ---
+# /elo and /skipio-leaderboard read materialised ELO instead of replaying the
+# league on every call. A scope is a season id or 'all'. For each scope the
+# store keeps every player's ELO after each map (skipio_elo_history), one
+# summary row per player (skipio_elo_ratings) and a fingerprint of the data it
+# was built from (skipio_elo_scopes).
+#
+# The formula normalises each map against rank-group averages taken over the
+# whole scope, so a new match moves every earlier value of that scope a little.
+# Appending rows for the new maps alone would drift from calculate_skipio_elos.
+# Updates are therefore incremental per scope: saving or forfeiting a match
+# marks only its season and 'all' (mark_match_scopes), and the lifecycle
+# elo_refresh loop rebuilds the marked scopes, however many saves marked them,
+# from one read of the stat rows. The same loop periodically picks up
+# portal-side edits, scopes whose fingerprint no longer matches, and
+# rebuild_all() (/elo_rebuild) starts over after a formula change.
+#
+# The tables are created by elo_store.sql, run once before the bot starts.
+
+_lock = threading.Lock()
+_dirty = set()         # scopes with saved matches since their last rebuild
+_ready_scopes = set()  # scopes known to be materialised, so reads skip the check
+_rank_indexes = {}     # scope -> RankIndex, dropped whenever the scope is rebuilt
+_generation = {}       # scope -> rebuild count, so a load racing a rebuild is not kept
+store_stats = {"rebuilt": 0, "stale": 0, "failed": 0}
+
+
+def known_scope(scope):
+    """Only 'all' and seasons in the registry are materialised."""
+    return scope == 'all' or any(sid == scope for sid, _ in get_seasons())
+
+
+def _fingerprints(cursor, scopes):
+    """{scope: (completed matches, stat rows, ACS total)} of the data each scope is built from.
+
+    One grouped scan: per season, plus the grand total for 'all'.
+    """
+    seasons = [s for s in scopes if s != 'all']
+    sf = "1=1" if 'all' in scopes else "m.season_id = ANY(%s)"
+    cursor.execute(f"""
+        SELECT m.season_id, GROUPING(m.season_id),
+               COUNT(DISTINCT m.id), COUNT(msm.match_id), COALESCE(SUM(msm.acs), 0)
+        FROM matches m LEFT JOIN match_stats_map msm ON msm.match_id = m.id
+        WHERE m.status = 'completed' AND {sf}
+        GROUP BY GROUPING SETS ((m.season_id), ())
+    """, (seasons,) if 'all' not in scopes else ())
+    found = {('all' if total else season): tuple(int(v) for v in fp) for season, total, *fp in cursor.fetchall()}
+    # A season without completed matches has no group
+    return {scope: found.get(scope, (0, 0, 0)) for scope in scopes}
+
+
+def _copy(cursor, table, rows):
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join("\\N" if v is None else repr(v) if isinstance(v, float) else str(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+    cursor.copy_expert(f"COPY {table} FROM STDIN", buf)
+
+
+def _store_rows(scope, p_history, appearances):
+    """History and rating rows for one scope, from calculate_skipio_elos output."""
+    raws = {}
+    history = []
+    for pid, mid, raw, _ in appearances:
+        seen = raws.setdefault(pid, [])
+        seen.append(raw)
+        history.append((scope, pid, len(seen), mid, p_history[pid][len(seen) - 1], raw))
+    ratings = [
+        (scope, pid, elos[-1], elos[-2] if len(elos) > 1 else None, len(elos),
+         sum(raws[pid]) / len(raws[pid]), order)
+        for order, (pid, elos) in enumerate(p_history.items())
+    ]
+    return history, ratings
+
+
+def rebuild_scopes(scopes):
+    """Recompute scopes and replace their rows in a single transaction. Blocking.
+
+    Every scope is rated from the same read of the stat rows
+    (calculate_scope_elos), so N seasons plus 'all' cost one scan, not N + 1.
+    Returns {scope: players}.
+    """
+    scopes = sorted(set(scopes))  # one lock order for every caller
+    rebuilt = {}
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        # Concurrent rebuilds of the same scope would trip over each other's rows
+        for scope in scopes:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('skipio_elo:' || %s))", (scope,))
+        # Fingerprints first: a write that lands mid-rebuild leaves the scope marked stale
+        fingerprints = _fingerprints(cursor, scopes)
+        elos = calculate_scope_elos(cursor, scopes)
+        for table in ("skipio_elo_history", "skipio_elo_ratings"):
+            cursor.execute(f"DELETE FROM {table} WHERE scope = ANY(%s)", (scopes,))
+        for scope in scopes:
+            history, ratings = _store_rows(scope, *elos.pop(scope))
+            _copy(cursor, "skipio_elo_history", history)
+            _copy(cursor, "skipio_elo_ratings", ratings)
+            cursor.execute("""
+                INSERT INTO skipio_elo_scopes (scope, matches, stat_rows, acs_total, rebuilt_at)
+                VALUES (%s, %s, %s, %s, now())
+                ON CONFLICT (scope) DO UPDATE SET matches = EXCLUDED.matches, stat_rows = EXCLUDED.stat_rows,
+                    acs_total = EXCLUDED.acs_total, rebuilt_at = EXCLUDED.rebuilt_at
+            """, (scope, *fingerprints[scope]))
+            rebuilt[scope] = len(ratings)
+            logger.info("Skipio ELO store: rebuilt %s (%d players, %d maps)", scope, len(ratings), len(history))
+        conn.commit()
+    with _lock:
+        for scope in scopes:
+            _ready_scopes.add(scope)
+            _rank_indexes.pop(scope, None)
+            _generation[scope] = _generation.get(scope, 0) + 1
+        store_stats["rebuilt"] += len(scopes)
+    return rebuilt
+
+
+def rebuild_scope(scope):
+    """Recompute one scope (see rebuild_scopes). Blocking."""
+    return rebuild_scopes([scope])[scope]
+
+
+def ensure_scope(scope):
+    """Materialise a scope on first use. Blocking; False for unknown seasons."""
+    if scope in _ready_scopes:
+        return True
+    if not known_scope(scope):
+        return False
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM skipio_elo_scopes WHERE scope = %s", (scope,))
+        exists = cursor.fetchone() is not None
+    if exists:
+        with _lock:
+            _ready_scopes.add(scope)
+        return True
+    rebuild_scope(scope)
+    return True
+
+
+def mark_match_scopes(season_id):
+    """Queue the scopes a saved or forfeited match belongs to for the next elo_refresh pass.
+
+    Matches with a NULL season_id (legacy S23) only count towards 'all'.
+    Only flags the scopes, so it is cheap to call from the event loop, and a
+    burst of saves costs one rebuild.
+    """
+    scopes = [scope for scope in ([season_id] if season_id else []) + ['all']
+              if scope in _ready_scopes or known_scope(scope)]
+    with _lock:
+        _dirty.update(scopes)
+
+
+def _stale_scopes():
+    """Materialised scopes whose source data no longer matches their fingerprint."""
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT scope, matches, stat_rows, acs_total FROM skipio_elo_scopes")
+        stored = {scope: tuple(fp) for scope, *fp in cursor.fetchall()}
+        current = _fingerprints(cursor, list(stored)) if stored else {}
+    return [scope for scope, fp in stored.items() if current[scope] != fp]
+
+
+def refresh(check_stale=True):
+    """Rebuild the scopes marked by saved matches and, with check_stale, the stale ones. Blocking.
+
+    All of them are rebuilt together (one scan). Returns the rebuilt scopes;
+    on failure the marks are kept for the next pass.
+    """
+    with _lock:
+        dirty = set(_dirty)
+        _dirty.clear()
+    try:
+        stale = _stale_scopes() if check_stale else []
+        scopes = sorted(dirty | set(stale))
+        if scopes:
+            rebuild_scopes(scopes)
+    except Exception:
+        with _lock:
+            _dirty.update(dirty)
+            store_stats["failed"] += 1
+        raise
+    if stale:
+        with _lock:
+            store_stats["stale"] += len(stale)
+    return scopes
+
+
+def rebuild_all():
+    """Rebuild 'all' and every season from scratch (after a formula change). Blocking."""
+    scopes = ['all'] + [sid for sid, _ in get_seasons()]
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        # Drop scopes of seasons that no longer exist along with everything else
+        for table in ("skipio_elo_history", "skipio_elo_ratings", "skipio_elo_scopes"):
+            cursor.execute(f"DELETE FROM {table} WHERE NOT (scope = ANY(%s))", (scopes,))
+        conn.commit()
+    with _lock:
+        _ready_scopes.clear()
+        _rank_indexes.clear()
+    rebuilt = rebuild_scopes(scopes)
+    return {scope: rebuilt[scope] for scope in scopes}
+
+
+# --- RANK INDEX ---
+# "Where do I stand?" and leaderboard pages are answered from an in-memory copy
+# of a scope's ratings, sorted once by ELO (descending, first appearance
+# breaking ties, like the leaderboard). A filtered view (rank filter, minimum
+# maps) is built the first time it is asked for and kept, least recently used
+# first out, until the scope is rebuilt; positions within a view are found by
+# bisection.
+
+VIEW_CACHE_SIZE = 32  # filtered views kept per RankIndex
+_RANK_TIERS = tuple(tier.lower() for tier in RANK_TIERS)
+_RANK_TERM = re.compile(rf"^({'|'.join(_RANK_TIERS)})(?:\s*([1-3]))?$")
+
+
+def rank_filter(rank):
+    """The rank terms a leaderboard filter matches, as a sorted tuple; () for no filter.
+
+    Accepts a tier with an optional division ("gold", "Gold 3") and the
+    autocomplete's combined choices ("Iron/Bronze", "Immortal 1/2"). Raises
+    ValueError for anything else, so arbitrary input never becomes a view.
+    """
+    if not (rank or "").strip():
+        return ()
+    terms, tier = set(), None
+    for part in rank.split("/"):
+        part = " ".join(part.lower().split())
+        if part in ("1", "2", "3") and tier:
+            terms.add(f"{tier} {part}")
+            continue
+        match = _RANK_TERM.match(part)
+        if match is None:
+            raise ValueError(f"Unknown rank `{rank}`")
+        tier = match.group(1)
+        terms.add(f"{tier} {match.group(2)}" if match.group(2) else tier)
+    return tuple(sorted(terms))
+
+
+class RankIndex:
+    def __init__(self, rows):
+        # rows: (player_id, name, rank, elo, maps), already in leaderboard order
+        self.rows = rows
+        self._rating = {row[0]: (-row[3], i) for i, row in enumerate(rows)}
+        self._views = OrderedDict()
+
+    def view(self, rank=None, min_games=0):
+        """(keys, rows) for one filter; keys are the sort keys of rows. Raises ValueError for an unknown rank."""
+        key = (rank_filter(rank), max(min_games, 0))
+        view = self._views.get(key)
+        if view is None:
+            # A player matches a term as `rank ILIKE '%<term>%'` would
+            terms, min_games = key
+            rows = [(i, row) for i, row in enumerate(self.rows)
+                    if row[4] >= min_games and (not terms or any(
+                        t in " ".join((row[2] or "").lower().split()) for t in terms))]
+            view = self._views[key] = ([(-row[3], i) for i, row in rows], [row for _, row in rows])
+            if len(self._views) > VIEW_CACHE_SIZE:
+                self._views.popitem(last=False)
+        else:
+            self._views.move_to_end(key)
+        return view
+
+    def page(self, page, per_page, rank=None, min_games=0):
+        """Rows on a 1-based page of the filtered leaderboard, and the filter's size."""
+        _, rows = self.view(rank, min_games)
+        return rows[(page - 1) * per_page:page * per_page], len(rows)
+
+    def standing(self, player_id, rank=None, min_games=0):
+        """(position, out_of) of a player within a filter, or None if they are not in it."""
+        keys, rows = self.view(rank, min_games)
+        sort_key = self._rating.get(player_id)
+        if sort_key is None:
+            return None
+        pos = bisect.bisect_left(keys, sort_key)
+        if pos == len(keys) or keys[pos] != sort_key:
+            return None
+        return pos + 1, len(rows)
+
+
+def cached_rank_index(scope):
+    """The scope's RankIndex if this process already holds it (no DB round trip)."""
+    return _rank_indexes.get(scope)
+
+
+def rank_index(scope):
+    """Load (materialising the scope first if needed) a scope's RankIndex. Blocking; None for unknown seasons."""
+    index = _rank_indexes.get(scope)
+    if index is not None:
+        return index
+    if not ensure_scope(scope):
+        return None
+    generation = _generation.get(scope, 0)
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT r.player_id, p.name, p.rank, r.elo, r.maps
+            FROM skipio_elo_ratings r JOIN players p ON p.id = r.player_id
+            WHERE r.scope = %s
+            ORDER BY r.elo DESC, r.first_seen
+        """, (scope,))
+        index = RankIndex(cursor.fetchall())
+    with _lock:
+        if _generation.get(scope, 0) == generation:
+            _rank_indexes[scope] = index
+    return index
+
+
+def reset():
+    """Forget what this process knows about the store (the tables were dropped)."""
+    with _lock:
+        _dirty.clear()
+        _ready_scopes.clear()
+        _rank_indexes.clear()
+
+
+def get_store_stats():
+    with _lock:
+        stats = dict(store_stats)
+        stats["scopes"] = len(_ready_scopes)
+        stats["pending"] = len(_dirty)
+        stats["indexes"] = len(_rank_indexes)
+    return stats
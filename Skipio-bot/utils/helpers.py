@@ -1,11 +1,130 @@
 import asyncio
 import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import discord
+from config import DB_SYNC_POOL_MAX, DB_EXECUTOR_QUEUE, QUERY_BUDGET_SECONDS
+from database import QueryTimeout, cancellable, cancel_job
 
 async def run_in_executor(func, *args):
     """Run a blocking function in an executor to prevent blocking the event loop."""
     loop = asyncio.get_running_loop()
     return await loop.run_in_executor(None, functools.partial(func, *args))
 
+# --- DB EXECUTOR ---
+# Blocking psycopg2 work gets its own executor with one thread per pooled
+# connection. The default executor has min(32, cpu+4) threads; on a match-night
+# burst the surplus threads found the pool exhausted and fell back to opening
+# fresh TLS connections. HTTP calls (portal, AI) stay on run_in_executor.
+#
+# At most DB_SYNC_POOL_MAX jobs run and DB_EXECUTOR_QUEUE wait inside the executor;
+# further callers are held on the semaphore (still awaiting, not blocking the
+# loop) until a slot frees, so the backlog never grows unbounded.
+_db_executor = ThreadPoolExecutor(max_workers=DB_SYNC_POOL_MAX, thread_name_prefix="db")
+_db_slots = None
+_stats_lock = threading.Lock()  # counters are updated from both the loop and worker threads
+
+executor_stats = {
+    "submitted": 0, "started": 0, "completed": 0, "in_flight": 0,
+    "queue_depth": 0, "max_queue_depth": 0,
+    "throttled": 0,  # callers that had to wait for a free slot
+    "wait_total": 0.0, "wait_max": 0.0,  # seconds from submit to start
+    "timed_out": 0,  # jobs cancelled for running past their budget
+}
+
+
+def _run_timed(func, args, submitted_at, job):
+    waited = time.perf_counter() - submitted_at
+    with _stats_lock:
+        executor_stats["queue_depth"] -= 1
+        executor_stats["started"] += 1
+        executor_stats["in_flight"] += 1
+        executor_stats["wait_total"] += waited
+        executor_stats["wait_max"] = max(executor_stats["wait_max"], waited)
+    try:
+        with cancellable(job):
+            return func(*args)
+    finally:
+        with _stats_lock:
+            executor_stats["in_flight"] -= 1
+            executor_stats["completed"] += 1
+
+
+def _drop_if_cancelled(fut):
+    # A future can only be cancelled before it starts (budget expiry while
+    # queued, shutdown with cancel_futures), so it is still counted as queued
+    if fut.cancelled():
+        with _stats_lock:
+            executor_stats["queue_depth"] -= 1
+
+
+async def run_in_db_executor(func, *args, budget=None):
+    """Run a blocking DB function on the pool-sized DB executor.
+
+    With `budget` (seconds, queueing included) the statement still running when
+    it expires — or when the awaiting command is cancelled — is cancelled on the
+    server and QueryTimeout raised.
+    """
+    global _db_slots
+    if _db_slots is None:
+        _db_slots = asyncio.Semaphore(DB_SYNC_POOL_MAX + DB_EXECUTOR_QUEUE)
+    submitted_at = time.perf_counter()
+    if _db_slots.locked():
+        executor_stats["throttled"] += 1
+    async with _db_slots:
+        with _stats_lock:
+            executor_stats["submitted"] += 1
+            executor_stats["queue_depth"] += 1
+            executor_stats["max_queue_depth"] = max(executor_stats["max_queue_depth"], executor_stats["queue_depth"])
+        job = []
+        cf = _db_executor.submit(_run_timed, func, args, submitted_at, job)
+        cf.add_done_callback(_drop_if_cancelled)
+        fut = asyncio.wrap_future(cf)
+        if budget is None:
+            return await fut
+        try:
+            return await asyncio.wait_for(fut, budget)
+        except asyncio.TimeoutError:
+            cancel_job(job)
+            with _stats_lock:
+                executor_stats["timed_out"] += 1
+            raise QueryTimeout(budget) from None
+        except asyncio.CancelledError:
+            cancel_job(job)
+            raise
+
+
+def get_executor_stats():
+    with _stats_lock:
+        stats = dict(executor_stats)
+    stats["workers"] = DB_SYNC_POOL_MAX
+    stats["wait_avg"] = stats["wait_total"] / stats["started"] if stats["started"] else 0.0
+    return stats
+
+
+# Discord only accepts an autocomplete answer or an initial response within 3s
+# of the interaction; a deferred command can follow up for 15 minutes.
+_RESPONSE_WINDOW = 3.0
+_FOLLOWUP_WINDOW = 15 * 60.0
+
+
+def query_budget(interaction, seconds=QUERY_BUDGET_SECONDS):
+    """Seconds an interaction's queries may run: the command budget, capped by
+    what is left of the window in which Discord still accepts the answer."""
+    if interaction is None:
+        return seconds
+    age = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    if interaction.type is discord.InteractionType.autocomplete or not interaction.response.is_done():
+        window = _RESPONSE_WINDOW - 0.5
+    else:
+        window = _FOLLOWUP_WINDOW
+    return max(0.1, min(seconds, window - age))
+
+
+def shutdown_db_executor():
+    _db_executor.shutdown(wait=False, cancel_futures=True)
+
 AGENT_ROLES = {
     "duelist": ["Jett", "Phoenix", "Raze", "Reyna", "Yoru", "Neon", "Iso", "Waylay"],
     "initiator": ["Sova", "Breach", "Skye", "KAY/O", "Fade", "Gekko", "Tejo"],
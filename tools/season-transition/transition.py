@@ -58,6 +58,10 @@ except ImportError:
     print("ERROR: Missing dependencies. Run:  pip install supabase python-dotenv")
     sys.exit(1)
 
+# Paged table reads shared with training/train.py
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "training"))
+from paging import fetch_rows
+
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
@@ -88,23 +92,54 @@ def confirm(prompt: str) -> bool:
     return ans.upper() == "YES"
 
 
+# Column each table's read is split on (keyset ranges, fetched concurrently).
+# Keys that are not integers, like the season ids, are read in offset pages
+# ordered by the key. Every table fetch_all reads needs an entry.
+TABLE_KEYS = {
+    "seasons": "id",
+    "teams": "id",
+    "players": "id",
+    "matches": "id",
+    "team_history": "team_id",
+    "player_history": "player_id",
+    "player_team_history": "player_id",
+    "match_maps": "match_id",
+    "match_stats": "match_id",
+    "match_stats_map": "match_id",
+    "match_rounds": "match_id",
+    "match_player_rounds": "match_id",
+    "match_substitutions": "match_id",
+    "league_snapshots": "id",
+}
+
+# Sort order of each table's rows: the key, then columns that make it unique
+# per row. fetch_rows rejects an order two rows share, since Postgres returns
+# tied rows in any order and offset pages of them could repeat or skip rows.
+TABLE_ORDER = {
+    "seasons": ["id"],
+    "teams": ["id"],
+    "players": ["id"],
+    "matches": ["id"],
+    "team_history": ["team_id", "season_id"],
+    "player_history": ["player_id", "season_id"],
+    "player_team_history": ["player_id", "season_id", "team_id"],
+    "match_maps": ["match_id", "map_index"],
+    "match_stats": ["match_id", "player_id"],
+    "match_stats_map": ["match_id", "map_index", "player_id"],
+    "match_rounds": ["match_id", "map_index", "round_number"],
+    "match_player_rounds": ["match_id", "map_index", "round_number", "player_id"],
+    "match_substitutions": ["match_id", "id"],
+    "league_snapshots": ["id"],
+}
+
 def fetch_all(supabase: "Client", table: str, select: str = "*", filters: dict = None) -> list:
-    """Fetch all rows from a Supabase table (handles pagination)."""
-    rows = []
-    offset = 0
-    page_size = 1000
-    while True:
-        q = supabase.table(table).select(select).range(offset, offset + page_size - 1)
-        if filters:
-            for col, val in filters.items():
-                q = q.eq(col, val)
-        res = q.execute()
-        batch = res.data or []
-        rows.extend(batch)
-        if len(batch) < page_size:
-            break
-        offset += page_size
-    return rows
+    """Fetch all rows from a Supabase table (concurrent pages, in TABLE_ORDER).
+
+    A read the table changed under is retried; raises if it keeps changing
+    rather than returning a partial copy.
+    """
+    return fetch_rows(supabase, table, select, key=TABLE_KEYS[table], order=TABLE_ORDER[table],
+                      filters=filters)
 
 
 # ── Step 1: Extract to SQLite ─────────────────────────────────────────────────
@@ -0,0 +1,44 @@
+-- ============================================================
+-- Training snapshot digests
+-- ============================================================
+-- PURPOSE: Lets training/extract.py find the keys whose rows
+--          changed since its last run without downloading them.
+--          Run once in the Supabase SQL Editor; re-running
+--          replaces the function. Without it, extract.py falls
+--          back to a full fetch every run.
+--
+-- training_digests(tbl, key_col, cols, filters) returns a JSON
+-- object {key: md5} for the rows of `tbl` matching every
+-- column = value pair of `filters`, over the columns `cols`.
+-- Rows are hashed in text order, so the digest does not depend
+-- on their physical order. One jsonb value, so PostgREST's row
+-- limit does not apply.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.training_digests(tbl text, key_col text, cols text[], filters jsonb DEFAULT '{}')
+RETURNS jsonb
+LANGUAGE plpgsql STABLE
+SET search_path = public
+AS $$
+DECLARE
+    result jsonb;
+BEGIN
+    IF tbl NOT IN ('matches', 'match_stats_map', 'players') THEN
+        RAISE EXCEPTION 'training_digests: unsupported table %', tbl;
+    END IF;
+    EXECUTE format(
+        'SELECT COALESCE(jsonb_object_agg(k, d), ''{}'') FROM ('
+        '  SELECT t.%1$I AS k, md5(string_agg(row(%2$s)::text, E''\n'' ORDER BY row(%2$s)::text)) AS d'
+        '  FROM %3$I t WHERE to_jsonb(t) @> $1 GROUP BY t.%1$I'
+        ') per_key',
+        key_col,
+        (SELECT string_agg(format('t.%I', c), ', ') FROM unnest(cols) AS c),
+        tbl)
+    INTO result USING filters;
+    RETURN result;
+END;
+$$;
+
+-- The training job connects with the service role
+REVOKE ALL ON FUNCTION public.training_digests(text, text, text[], jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.training_digests(text, text, text[], jsonb) TO service_role;
@@ -0,0 +1,134 @@
+"""Training data extraction: a local Parquet snapshot of the tables train.py reads.
+
+Only the columns the feature builder uses are downloaded. A run first asks
+the database for an md5 digest of every key's rows (training_digests, see
+digests.sql), fetches the rows past each table's watermark (its largest key),
+then refetches only the older keys whose digest changed since the last run
+(late completions, re-uploaded stats, rank updates) and drops deleted ones.
+Without the function the run falls back to a full fetch.
+"""
+import os
+import json
+import pandas as pd
+from paging import fetch_rows
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".snapshot")
+IN_CHUNK = 200  # keys per `in` filter, to keep request URLs short
+
+# What the snapshot keeps per table. Rows are grouped by `key`, which also
+# orders them, sets the watermark and is what the digests are taken per.
+TABLES = {
+    'matches': {
+        'columns': ['id', 'season_id', 'week', 'team1_id', 'team2_id', 'winner_id', 'score_t1', 'score_t2'],
+        'filters': {'status': 'completed'},
+        'key': 'id', 'order': ['id'],
+    },
+    'match_stats_map': {
+        'columns': ['match_id', 'team_id', 'player_id', 'acs', 'kills', 'deaths', 'adr', 'kast', 'hs_pct', 'fk', 'fd', 'clutches'],
+        'filters': {},
+        'key': 'match_id', 'order': ['match_id', 'map_index', 'team_id', 'player_id'],
+    },
+    'players': {
+        'columns': ['id', 'rank'],
+        'filters': {},
+        'key': 'id', 'order': ['id'],
+    },
+}
+
+def _fetch(sb, table, spec, where=None):
+    """Projected rows of a table query as a DataFrame, in key order. where(q) adds filters."""
+    rows = fetch_rows(sb, table, spec['columns'], key=spec['key'], order=spec['order'],
+                      filters=spec['filters'], where=where)
+    return pd.DataFrame(rows, columns=spec['columns'])
+
+def _server_digests(sb, table, spec):
+    """{key: md5 of its rows} over the projected columns, computed by the database; None without the function."""
+    try:
+        res = sb.rpc('training_digests', {
+            'tbl': table, 'key_col': spec['key'], 'cols': spec['columns'], 'filters': spec['filters'],
+        }).execute()
+    except Exception as e:
+        print(f"  {table}: no server digests ({e}), fetching everything")
+        return None
+    return {int(k): v for k, v in (res.data or {}).items()}
+
+def _digests(df, spec):
+    """An order-independent hash of each key's rows, over every projected column.
+
+    Numbers hash as float64 and text as str, so two reads of the same rows
+    agree whatever dtypes pandas inferred for them.
+    """
+    norm = {}
+    for col in spec['columns']:
+        s = df[col]
+        if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+            norm[col] = pd.to_numeric(s, errors='coerce').astype('float64')
+        else:
+            norm[col] = s.astype(object).where(s.notna(), '').astype(str)
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(norm), index=False)
+    return hashes.groupby(pd.to_numeric(df[spec['key']]).to_numpy()).sum()
+
+def _paths(table):
+    return os.path.join(SNAPSHOT_DIR, f"{table}.parquet"), os.path.join(SNAPSHOT_DIR, f"{table}.json")
+
+def _load(table, spec):
+    """(rows, digests) of a table's snapshot; None if missing, made with other columns or without digests."""
+    data_path, meta_path = _paths(table)
+    try:
+        with open(meta_path) as f: meta = json.load(f)
+        if meta.get('columns') != spec['columns'] or meta.get('filters') != spec['filters'] or 'digests' not in meta:
+            return None
+        return pd.read_parquet(data_path), {int(k): v for k, v in meta['digests'].items()}
+    except (OSError, ValueError):
+        return None
+
+def _save(table, spec, df, digests):
+    data_path, meta_path = _paths(table)
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    df.to_parquet(data_path + ".tmp", index=False)
+    os.replace(data_path + ".tmp", data_path)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump({'columns': spec['columns'], 'filters': spec['filters'], 'rows': len(df), 'digests': digests}, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+def sync_table(sb, table, refresh=False):
+    """A table's projected rows, bringing the local snapshot up to date first."""
+    spec = TABLES[table]
+    key = spec['key']
+    # Digests before rows: a write landing in between leaves an older digest,
+    # so the next run refetches that key rather than missing the change
+    remote = _server_digests(sb, table, spec)
+    snap = None if refresh or remote is None else _load(table, spec)
+    if snap is None or snap[0].empty:
+        df = _fetch(sb, table, spec)
+        print(f"  {table}: {len(df)} rows (full fetch)")
+        if remote is not None:
+            _save(table, spec, df, remote)
+        return df
+    snap, ours = snap
+
+    snap_keys = pd.to_numeric(snap[key])
+    watermark = int(snap_keys.max())
+    new = _fetch(sb, table, spec, lambda q: q.gt(key, watermark))
+
+    # Keys at or below the watermark whose rows differ or are gone
+    older = set(snap_keys.unique().tolist()) | {k for k in remote if k <= watermark}
+    stale = sorted(k for k in older if remote.get(k) != ours.get(k))
+    changed = [k for k in stale if k in remote]
+    refetched = []
+    for i in range(0, len(changed), IN_CHUNK):
+        ids = changed[i:i + IN_CHUNK]
+        refetched.append(_fetch(sb, table, spec, lambda q: q.in_(key, ids)))
+
+    # Same rows, in the same order, as a full fetch would give
+    parts = [p for p in [snap[~snap_keys.isin(stale)], *refetched, new] if len(p)]
+    df = pd.concat(parts, ignore_index=True).sort_values(key, kind='stable', ignore_index=True) if parts else snap.iloc[:0]
+    n_refetched = sum(len(p) for p in refetched)
+    print(f"  {table}: {len(df)} rows ({len(new)} new, {n_refetched} refetched for {len(stale)} changed keys)")
+    if len(new) or stale or remote != ours:
+        _save(table, spec, df, remote)
+    return df
+
+def load_tables(sb, refresh=False):
+    """(matches, match_stats_map, players) DataFrames for train.py; refresh ignores the snapshot."""
+    return tuple(sync_table(sb, table, refresh) for table in ('matches', 'match_stats_map', 'players'))
@@ -0,0 +1,121 @@
+"""Concurrent, ordered reads of whole Supabase tables.
+
+Shared by training/extract.py and tools/season-transition/transition.py, so
+it needs nothing beyond the supabase client. A read first asks for the exact
+row count and the key range, splits the keys into ranges of about one page
+each and fetches them on a small thread pool, retrying each request on its
+own. Offset pages (tables without an integer key, or one key value with
+more than a page of rows) are only consistent under a total order, so the
+order columns must be unique per row. Rows come back sorted by that order
+whatever order the pages finish in.
+"""
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PAGE_SIZE = 1000    # PostgREST's default max rows per request
+MAX_WORKERS = 8     # requests in flight at once
+RETRIES = 3         # extra attempts per request
+RETRY_BACKOFF = 0.5 # seconds before the first retry, doubled after each
+RANGE_FILL = 0.75   # planned rows per key range, as a share of PAGE_SIZE
+
+def _execute(build, retries):
+    """Run the query build() makes, retrying failures with backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return build().execute()
+        except Exception:
+            if attempt == retries: raise
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+def fetch_rows(sb, table, columns="*", key=None, order=None, filters=None, where=None,
+               page_size=PAGE_SIZE, workers=MAX_WORKERS, retries=RETRIES):
+    """Every row of a table query as a list of dicts, fetched concurrently, in order.
+
+    key is an integer column to split the read on (keyset ranges); without
+    one, or if its values are not integers, pages are plain offsets. order
+    lists the columns rows are sorted by (default: key) and must be unique
+    per row: Postgres orders tied rows arbitrarily, so pages of ties could
+    repeat or skip rows. Order columns not in `columns` are read for the
+    check and dropped again. filters are column == value tests; where(q) can
+    add any other filter to the query builder.
+
+    A read whose rows do not add up to the exact count (rows written or
+    deleted meanwhile) is retried from the start; raises RuntimeError if the
+    last attempt still disagrees, and ValueError if two rows share an order.
+    """
+    order = order or ([key] if key else [])
+    if not order:
+        raise ValueError(f"{table}: a read needs a key or an order to page consistently")
+    wanted = [c.strip() for c in columns.split(",")] if isinstance(columns, str) else list(columns)
+    extra = [] if "*" in wanted else [c for c in order if c not in wanted]
+    select = ",".join(wanted + extra)
+
+    def query(cols=select, count=None):
+        q = sb.table(table).select(cols, count=count) if count else sb.table(table).select(cols)
+        for col, val in (filters or {}).items():
+            q = q.eq(col, val)
+        return where(q) if where is not None else q
+
+    def ordered(q):
+        for col in order:
+            q = q.order(col)
+        return q
+
+    def page(q, start):
+        return _execute(lambda: ordered(q()).range(start, start + page_size - 1), retries).data or []
+
+    def read(pool):
+        """(rows, exact count) of one pass over the table."""
+        count_job = pool.submit(_execute, lambda: query(key or select, "exact").limit(1), retries)
+        if key:
+            ends = [pool.submit(_execute, lambda desc=desc: query(key).order(key, desc=desc).limit(1), retries)
+                    for desc in (False, True)]
+        total = count_job.result().count or 0
+        if not total:
+            return [], 0
+
+        lo_hi = [e.result().data for e in ends] if key else None
+        if not key or not all(lo_hi) or not all(isinstance(r[0][key], int) for r in lo_hi):
+            # No integer key: offset pages
+            pages = pool.map(lambda start: page(query, start), range(0, total, page_size))
+            return [row for batch in pages for row in batch], total
+
+        lo, hi = lo_hi[0][0][key], lo_hi[1][0][key] + 1
+        n_ranges = min(math.ceil(total / (page_size * RANGE_FILL)), hi - lo)
+        bounds = sorted({lo + (hi - lo) * i // n_ranges for i in range(n_ranges)} | {hi})
+
+        def key_range(a, b):
+            """Rows with a <= key < b; halves the range while it fills a page."""
+            q = lambda: query().gte(key, a).lt(key, b)
+            batch = page(q, 0)
+            if len(batch) < page_size:
+                return batch
+            if b - a > 1:
+                mid = (a + b) // 2
+                return key_range(a, mid) + key_range(mid, b)
+            start = page_size  # one key with more than a page of rows: offsets within it, in `order`
+            while True:
+                more = page(q, start)
+                batch += more
+                if len(more) < page_size: return batch
+                start += page_size
+
+        chunks = pool.map(lambda ab: key_range(*ab), zip(bounds, bounds[1:]))
+        return [row for chunk in chunks for row in chunk], total
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for attempt in range(retries + 1):
+            rows, total = read(pool)
+            if len(rows) == total:
+                break
+            if attempt == retries:
+                raise RuntimeError(f"{table}: read {len(rows)} rows, expected {total} (changed during the read?)")
+            print(f"  {table}: read {len(rows)} rows, expected {total}; reading again")
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    if len({tuple(row[c] for c in order) for row in rows}) != len(rows):
+        raise ValueError(f"{table}: rows share values of the order columns {order}; add columns that make it unique")
+    if extra:
+        rows = [{c: row[c] for c in wanted} for row in rows]
+    return rows
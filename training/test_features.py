@@ -0,0 +1,128 @@
+"""build_features, build_features_loop and checkpoint resumes must agree bit for bit.
+
+    python -m pytest training
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import train
+
+RANKS = ['Iron 2', 'Silver 1', 'Gold 3', 'Platinum 2', 'Diamond 1', 'Ascendant 3', 'Immortal 2', 'Radiant', 'Unranked']
+
+
+def synthetic_league(seed=0, n_teams=6, n_matches=80):
+    """(df_matches, df_stats, df_players) shaped like extract.load_tables' frames, sorted as main() sorts them.
+
+    Covers the cases the builders treat specially: optional stats missing
+    (NaN), players with no rank or no players row, matches without a winner,
+    matches with stats for one side only or none at all, and a season break.
+    """
+    rng = np.random.default_rng(seed)
+    rosters = {t: [t * 10 + k for k in range(5)] for t in range(1, n_teams + 1)}
+
+    players = [(pid, RANKS[rng.integers(len(RANKS))]) for pids in rosters.values() for pid in pids]
+    players[1] = (players[1][0], None)
+    players[7] = (players[7][0], np.nan)
+    del players[12]  # stats but no players row
+    df_players = pd.DataFrame(players, columns=['id', 'rank'])
+
+    matches, stats = [], []
+    for mid in range(1, n_matches + 1):
+        t1, t2 = (int(t) for t in rng.choice(list(rosters), 2, replace=False))
+        s1, s2 = (2, int(rng.integers(2))) if rng.random() < 0.5 else (int(rng.integers(2)), 2)
+        winner = t1 if s1 > s2 else t2
+        if mid % 11 == 0:
+            winner = None
+        season = 'S1' if mid <= n_matches // 2 else 'S2'
+        matches.append((mid, season, mid % 7 or None, t1, t2, winner, s1, s2))
+
+        sides = [] if mid % 13 == 0 else [t1] if mid % 9 == 0 else [t2] if mid % 10 == 0 else [t1, t2]
+        for _ in range(s1 + s2):
+            for tid in sides:
+                for pid in rosters[tid]:
+                    row = [mid, tid, pid, float(rng.integers(100, 350)), float(rng.integers(5, 30)),
+                           float(rng.integers(5, 25)), rng.uniform(80, 200), rng.uniform(40, 95),
+                           rng.uniform(10, 40), float(rng.integers(0, 5)), float(rng.integers(0, 5)),
+                           float(rng.integers(0, 3))]
+                    for i in range(6, 12):
+                        if rng.random() < 0.15:
+                            row[i] = np.nan
+                    stats.append(row)
+
+    df_matches = pd.DataFrame(matches, columns=['id', 'season_id', 'week', 'team1_id', 'team2_id',
+                                                'winner_id', 'score_t1', 'score_t2'])
+    df_matches['winner_id'] = df_matches['winner_id'].astype(object).where(df_matches['winner_id'].notna(), None)
+    df_stats = pd.DataFrame(stats, columns=['match_id', 'team_id', 'player_id', 'acs', 'kills', 'deaths',
+                                            'adr', 'kast', 'hs_pct', 'fk', 'fd', 'clutches'])
+    return df_matches.sort_values(['season_id', 'id']), df_stats, df_players
+
+
+@pytest.fixture(scope="module")
+def league():
+    return synthetic_league()
+
+
+@pytest.fixture(scope="module")
+def expected(league):
+    return train.feature_bytes(train.build_features_loop(*league))
+
+
+def test_league_covers_edge_cases(league):
+    df_matches, df_stats, df_players = league
+    assert df_matches['winner_id'].isna().any()
+    assert df_stats[['adr', 'kast', 'hs_pct', 'fk', 'fd', 'clutches']].isna().any().all()
+    assert df_players['rank'].isna().sum() == 2
+    assert not df_stats['player_id'].isin(df_players['id']).all()
+    sides = df_stats.groupby('match_id')['team_id'].nunique()
+    assert (sides == 1).any() and len(sides) < len(df_matches)
+
+
+def test_vectorised_matches_loop(league, expected):
+    assert train.feature_bytes(train.build_features(*league)) == expected
+    assert train.check_features(*league) == 0
+
+
+@pytest.mark.parametrize("n_done", [0, 1, 11, 40, 63, 80])
+def test_checkpoint_resume_matches_full_build(league, expected, n_done):
+    df_matches, df_stats, df_players = league
+    done = df_matches.iloc[:n_done]
+    *_, ckpt = train.update_features(done, df_stats[df_stats['match_id'].isin(done['id'])], df_players)
+    ckpt = json.loads(json.dumps(ckpt))  # as stored between runs
+
+    *resumed, next_ckpt = train.update_features(df_matches, df_stats, df_players, ckpt)
+    assert train.feature_bytes(resumed) == expected
+    *_, rebuilt_ckpt = train.update_features(df_matches, df_stats, df_players)
+    assert json.dumps(next_ckpt) == json.dumps(rebuilt_ckpt)
+
+
+def _edit_stat(df_matches, df_stats, df_players):
+    df_stats = df_stats.copy()
+    df_stats.loc[df_stats['match_id'] == 5, 'kast'] += 1
+    return df_matches, df_stats, df_players
+
+
+def _edit_score(df_matches, df_stats, df_players):
+    df_matches = df_matches.copy()
+    df_matches.loc[df_matches['id'] == 3, 'score_t2'] = 1 - df_matches.loc[df_matches['id'] == 3, 'score_t2']
+    return df_matches, df_stats, df_players
+
+
+def _edit_rank(df_matches, df_stats, df_players):
+    df_players = df_players.copy()
+    df_players.loc[0, 'rank'] = 'Radiant' if df_players.loc[0, 'rank'] != 'Radiant' else 'Iron 1'
+    return df_matches, df_stats, df_players
+
+
+@pytest.mark.parametrize("edit", [_edit_stat, _edit_score, _edit_rank])
+def test_checkpoint_edits_rebuild(league, edit, capsys):
+    df_matches, df_stats, df_players = league
+    done = df_matches.iloc[:50]
+    *_, ckpt = train.update_features(done, df_stats[df_stats['match_id'].isin(done['id'])], df_players)
+    edited = edit(*league)
+
+    *resumed, _ = train.update_features(*edited, json.loads(json.dumps(ckpt)))
+    assert "full rebuild" in capsys.readouterr().out
+    assert train.feature_bytes(resumed) == train.feature_bytes(train.build_features_loop(*edited))
@@ -1,15 +1,21 @@
 import os
+import copy
 import json
+import argparse
+import sys
 import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LogisticRegressionCV
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from joblib import parallel_config
 from sklearn.metrics import accuracy_score, roc_auc_score, log_loss
-from supabase import create_client, Client
 from dotenv import load_dotenv
+from extract import TABLES, _digests, load_tables
 
 # Try to load environment variables from .env.local
 load_dotenv(".env.local")
@@ -18,6 +24,7 @@ load_dotenv(".env.local")
 # With ~270 matches and 12 features, an unregularized fit (C=1.0) overfits the
 # 80/20 holdout; LogisticRegressionCV picks the best C via internal 5-fold CV.
 LOGREG_CS = np.logspace(-3, 1, 20)
+CV_FOLDS = 5
 
 warnings.filterwarnings("ignore", category=FutureWarning, module="sklearn")
 
@@ -31,87 +38,183 @@ RANK_MAP = {
 }
 
 def get_rank_value(rank_str):
-    if not rank_str: return 10
+    if not rank_str or not isinstance(rank_str, str): return 10  # None, or NaN from a text column
     for k, v in RANK_MAP.items():
         if k.lower() in rank_str.lower(): return v
     return 10
 
-def history_mean(h, key, last_n=5):
-    vals = [x[key] for x in h[-last_n:] if x.get(key) is not None]
-    return float(np.mean(vals)) if vals else None
+PLAYER_WINDOW = 5  # maps in a player's rolling averages
+FORM_WINDOW = 3    # matches in a team's form
+
+# Per-map player stats, in PlayerState tuple order; the optional ones may be
+# missing (NaN) and are averaged over the maps that have them
+PLAYER_STATS = ('acs', 'kills', 'deaths', 'adr', 'kast', 'hs_pct', 'entry', 'clutches')
+OPTIONAL_STATS = ('adr', 'kast', 'hs_pct', 'entry', 'clutches')
+
+def _numeric(df, col):
+    """A column as float64; NaN where missing, or everywhere if the column is absent (row.get)."""
+    if col not in df: return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+
+class PlayerState:
+    """A player's last PLAYER_WINDOW maps in a fixed ring, plus maps played.
+
+    Recording a map overwrites the oldest slot, so memory and work per update
+    stay constant however long the history. Window sums add the ring oldest
+    first, the order np.mean used over the last maps, so results are unchanged.
+    """
+    __slots__ = ('maps', 'ring')
+
+    def __init__(self):
+        self.maps = 0
+        self.ring = [None] * PLAYER_WINDOW
+
+    def add(self, values):
+        """Record one map: a tuple ordered like PLAYER_STATS, NaN where missing."""
+        self.ring[self.maps % PLAYER_WINDOW] = values
+        self.maps += 1
+
+    def window(self):
+        """{stat: (sum, count)} over the recent maps; optional stats skip missing values."""
+        if self.maps < PLAYER_WINDOW:
+            recent = self.ring[:self.maps]
+        else:
+            k = self.maps % PLAYER_WINDOW
+            recent = self.ring[k:] + self.ring[:k]
+        out = {}
+        for i, col in enumerate(PLAYER_STATS):
+            skip = col in OPTIONAL_STATS
+            total, n = 0, 0
+            for values in recent:
+                v = values[i]
+                if skip and v != v: continue
+                total = v if n == 0 else total + v
+                n += 1
+            out[col] = (total, n)
+        return out
+
+    def summary(self, rv):
+        """Current form for features and player_stats.json; rank-based defaults fill the gaps."""
+        if not self.maps:
+            return {'acs': 140 + rv * 6, 'kd': 0.4 + rv * 0.04, 'exp': 0, 'adr': 90 + rv * 4, 'kast': 55 + rv * 1,
+                    'hs_pct': 15 + rv * 1, 'entry': 0, 'clutch_rate': 0}
+        w = self.window()
+        mean = lambda col, default: w[col][0] / w[col][1] if w[col][1] else default
+        return {
+            'acs': mean('acs', None), 'kd': w['kills'][0] / max(1, w['deaths'][0]), 'exp': self.maps,
+            'adr': mean('adr', 90 + rv * 4), 'kast': mean('kast', 55 + rv * 1), 'hs_pct': mean('hs_pct', 15 + rv * 1),
+            'entry': mean('entry', 0), 'clutch_rate': mean('clutches', 0),
+        }
+
+class TeamState:
+    """A team's running match counters: O(1) per match whatever the length of its history."""
+    __slots__ = ('played', 'wins', 'rd_total', 'recent')
+
+    def __init__(self):
+        self.played = self.wins = self.rd_total = 0
+        self.recent = 0  # last FORM_WINDOW results as bits, newest lowest
+
+    def add(self, won, rd):
+        self.played += 1
+        self.wins += won
+        self.rd_total += rd
+        self.recent = ((self.recent << 1) | won) & ((1 << FORM_WINDOW) - 1)
+
+    def summary(self):
+        if not self.played: return {'wr': 0.5, 'form': 0.5, 'rd': 0}
+        return {'wr': self.wins / self.played, 'form': bin(self.recent).count('1') / min(self.played, FORM_WINDOW),
+                'rd': self.rd_total / self.played}
+
+def cv_folds(y, seed=42):
+    """Stratified fold number of each row, shared by the holdout evaluation and the final refit."""
+    fold = np.empty(len(y), dtype=int)
+    splitter = StratifiedKFold(CV_FOLDS, shuffle=True, random_state=seed)
+    for k, (_, held_out) in enumerate(splitter.split(np.zeros((len(y), 1)), y)):
+        fold[held_out] = k
+    return fold
+
+def fit_logreg(X_s, y, fold, n_jobs=None):
+    """LogisticRegressionCV over LOGREG_CS, cross-validated on the given folds.
+
+    The folds are fitted at the same time on threads: each fit is small, so
+    starting worker processes would cost more than it saves. Within a fold
+    lbfgs walks LOGREG_CS from the strongest penalty, warm-starting each C
+    from the previous solution, and the chosen C is refit from the folds'
+    mean coefficients. n_jobs caps the threads (default: one per fold, up to
+    the cores).
+    """
+    splits = [(np.flatnonzero(fold != k), np.flatnonzero(fold == k)) for k in np.unique(fold)]
+    n_jobs = n_jobs or min(len(splits), os.cpu_count() or 1)
+    with parallel_config(backend='threading'):
+        return LogisticRegressionCV(Cs=LOGREG_CS, cv=splits, max_iter=2000, scoring='neg_log_loss', n_jobs=n_jobs).fit(X_s, y)
+
+@contextmanager
+def timed(timings, stage):
+    """Record the wall time of a block in timings[stage] (seconds)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - started, 3)
 
 def upload_json(sb, path, obj):
     sb.storage.from_("models").upload(path, json.dumps(obj).encode("utf-8"), {"content-type": "application/json", "upsert": "true"})
 
-def main():
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        print("Error: Missing Supabase credentials. Ensure NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (or NEXT_PUBLIC_SUPABASE_ANON_KEY) are set in environment or .env.local")
-        return
+def download_json(sb, path):
+    """A JSON object from the models bucket, or None if it cannot be read."""
+    try:
+        return json.loads(sb.storage.from_("models").download(path))
+    except Exception as e:
+        print(f"Could not read {path}: {e}")
+        return None
+
+def replay_matches(df_matches, df_stats, df_players, players, teams):
+    """Step player and team state through df_matches in order, updating it in place.
+
+    players and teams map ids to PlayerState/TeamState. Each match with a
+    winner and both rosters yields a feature row from the state before it,
+    then records its maps. Returns the feature rows, labels and seasons.
+    """
+    # Index match_stats_map once instead of filtering the whole table per match:
+    # row positions per match and per (match, team), in table order
+    stats_by_match = df_stats.groupby('match_id', sort=False).indices
+    stats_by_team = df_stats.groupby(['match_id', 'team_id'], sort=False).indices
+    stat_pids = df_stats['player_id'].to_numpy()
+    no_rows = np.empty(0, dtype=np.intp)
+    player_ranks = dict(zip(df_players['id'], df_players['rank']))
+
+    # Each stat row as a PlayerState tuple
+    cols = {col: _numeric(df_stats, col) for col in PLAYER_STATS if col != 'entry'}
+    cols['entry'] = _numeric(df_stats, 'fk') - _numeric(df_stats, 'fd')
+    stat_rows = list(zip(*(cols[col].tolist() for col in PLAYER_STATS)))
+    stat_keys = stat_pids.tolist()  # Python ids, as player_stats.json keys
 
-    sb = create_client(SUPABASE_URL, SUPABASE_KEY)
-    print("Extracting data...")
-    matches = sb.table("matches").select("*").eq("status", "completed").execute().data
-    stats = []
-    start = 0
-    while True:
-        res = sb.table("match_stats_map").select("*").range(start, start + 999).execute().data
-        if not res: break
-        stats.extend(res)
-        start += 1000
-    players = sb.table("players").select("*").execute().data
-
-    df_matches = pd.DataFrame(matches).sort_values(['season_id', 'id'])
-    df_stats = pd.DataFrame(stats)
-    df_players = pd.DataFrame(players)
-
-    player_history = {}
-    team_history = {}
     features, labels, seasons = [], [], []
 
-    print("Training model...")
     for _, match in df_matches.iterrows():
         mid, t1, t2, winner = match['id'], match['team1_id'], match['team2_id'], match['winner_id']
         if not winner: continue
-        m_stats = df_stats[df_stats['match_id'] == mid]
-        t1_pids = m_stats[m_stats['team_id'] == t1]['player_id'].unique()
-        t2_pids = m_stats[m_stats['team_id'] == t2]['player_id'].unique()
+        t1_pids = pd.unique(stat_pids[stats_by_team.get((mid, t1), no_rows)])
+        t2_pids = pd.unique(stat_pids[stats_by_team.get((mid, t2), no_rows)])
         if len(t1_pids) == 0 or len(t2_pids) == 0: continue
 
         def get_roster(pids):
             acs, kd, rank, exp = [], [], [], []
             adr, kast, hs, entry, clutch = [], [], [], [], []
             for pid in pids:
-                p_info = df_players[df_players['id'] == pid]
-                rv = get_rank_value(p_info['rank'].iloc[0] if not p_info.empty else None)
+                rv = get_rank_value(player_ranks.get(pid))
+                p = (players.get(pid) or PlayerState()).summary(rv)
                 rank.append(rv)
-                h = player_history.get(pid, [])
-                if h:
-                    recent = h[-5:]
-                    acs.append(np.mean([x['acs'] for x in recent]))
-                    exp.append(len(h))
-                    kd.append(sum([x['kills'] for x in recent]) / max(1, sum([x['deaths'] for x in recent])))
-                else:
-                    acs.append(140 + rv * 6); kd.append(0.4 + rv * 0.04); exp.append(0)
-
-                adr_v = history_mean(h, 'adr')
-                kast_v = history_mean(h, 'kast')
-                hs_v = history_mean(h, 'hs_pct')
-                entry_v = history_mean(h, 'entry')
-                clutch_v = history_mean(h, 'clutches')
-                adr.append(adr_v if adr_v is not None else 90 + rv * 4)
-                kast.append(kast_v if kast_v is not None else 55 + rv * 1)
-                hs.append(hs_v if hs_v is not None else 15 + rv * 1)
-                entry.append(entry_v if entry_v is not None else 0)
-                clutch.append(clutch_v if clutch_v is not None else 0)
+                acs.append(p['acs']); kd.append(p['kd']); exp.append(p['exp'])
+                adr.append(p['adr']); kast.append(p['kast']); hs.append(p['hs_pct'])
+                entry.append(p['entry']); clutch.append(p['clutch_rate'])
             return {
                 'acs': np.mean(acs), 'kd': np.mean(kd), 'rank': np.mean(rank), 'exp': np.sum(exp),
                 'adr': np.mean(adr), 'kast': np.mean(kast), 'hs': np.mean(hs), 'entry': np.mean(entry), 'clutch_rate': np.mean(clutch)
             }
 
         def get_team(tid):
-            h = team_history.get(tid, [])
-            if not h: return {'wr': 0.5, 'form': 0.5, 'rd': 0}
-            return {'wr': sum([1 for x in h if x['won']]) / len(h), 'form': sum([1 for x in h[-3:] if x['won']]) / len(h[-3:]), 'rd': np.mean([x['rd'] for x in h])}
+            return (teams.get(tid) or TeamState()).summary()
 
         r1, r2 = get_roster(t1_pids), get_roster(t2_pids)
         tm1, tm2 = get_team(t1), get_team(t2)
@@ -123,26 +226,477 @@ def main():
         labels.append(1 if winner == t1 else 0)
         seasons.append(match['season_id'])
 
-        for _, row in m_stats.iterrows():
-            pid = row['player_id']
-            if pid not in player_history: player_history[pid] = []
-            fk, fd = row.get('fk'), row.get('fd')
-            entry_val = (fk - fd) if (pd.notna(fk) and pd.notna(fd)) else None
-            player_history[pid].append({
-                'acs': row['acs'], 'kills': row['kills'], 'deaths': row['deaths'],
-                'adr': row.get('adr') if pd.notna(row.get('adr')) else None,
-                'kast': row.get('kast') if pd.notna(row.get('kast')) else None,
-                'hs_pct': row.get('hs_pct') if pd.notna(row.get('hs_pct')) else None,
-                'entry': entry_val,
-                'clutches': row.get('clutches') if pd.notna(row.get('clutches')) else None,
-            })
+        for i in stats_by_match[mid]:
+            pid = stat_keys[i]
+            if pid not in players: players[pid] = PlayerState()
+            players[pid].add(stat_rows[i])
         s1, s2 = match.get('score_t1', 0) or 0, match.get('score_t2', 0) or 0
-        if t1 not in team_history: team_history[t1] = []
-        team_history[t1].append({'won': winner == t1, 'rd': s1 - s2})
-        if t2 not in team_history: team_history[t2] = []
-        team_history[t2].append({'won': winner == t2, 'rd': s2 - s1})
+        if t1 not in teams: teams[t1] = TeamState()
+        teams[t1].add(int(winner == t1), s1 - s2)
+        if t2 not in teams: teams[t2] = TeamState()
+        teams[t2].add(int(winner == t2), s2 - s1)
+
+    return features, labels, seasons
+
+def export_state(players, teams, df_players):
+    """player_stats.json and team_stats.json contents for the current state."""
+    player_ranks = dict(zip(df_players['id'], df_players['rank']))
+    cur_p = {pid: state.summary(get_rank_value(player_ranks.get(pid))) for pid, state in players.items()}
+    cur_t = {tid: {k: float(v) for k, v in state.summary().items()} for tid, state in teams.items()}
+    return cur_p, cur_t
+
+def build_features_loop(df_matches, df_stats, df_players):
+    """Feature rows match by match, replaying player and team histories in order.
+
+    The reference for build_features (see --check-features). Returns the
+    feature matrix, labels, each row's season and the exported player and
+    team stats.
+    """
+    players, teams = {}, {}
+    features, labels, seasons = replay_matches(df_matches, df_stats, df_players, players, teams)
+    cur_p, cur_t = export_state(players, teams, df_players)
+    return np.array(features), np.array(labels), seasons, cur_p, cur_t
+
+# --- Vectorised features ---
+# build_features does what build_features_loop does for the whole dataset at
+# once. Player windows and roster/team aggregates are gathered into arrays and
+# summed in the order the loop's PlayerState windows and np.mean use (oldest
+# first, missing values as exact zeros), so both produce the same bits.
+
+def _column_sum(m):
+    """Row sums of a matrix, adding columns left to right like a Python loop would."""
+    total = m[:, 0].copy()
+    for j in range(1, m.shape[1]): total += m[:, j]
+    return total
+
+def _ordered_mean(values, group, n_groups):
+    """np.mean of each group's values (sorted by group, in order), bit for bit.
+
+    np.mean adds fewer than 8 values one after the other, which the columns of a
+    zero-padded matrix reproduce; larger groups (rare) go through np.mean itself.
+    """
+    counts = np.bincount(group, minlength=n_groups)
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    padded = np.zeros((n_groups, max(int(counts.max(initial=0)), 1)))
+    padded[group, np.arange(len(values)) - starts[group]] = values
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = _column_sum(padded) / counts
+    for g in np.flatnonzero(counts >= 8):
+        means[g] = np.mean(values[starts[g]:starts[g] + counts[g]])
+    return means
 
-    X, y = np.array(features), np.array(labels)
+def _player_windows(stats, hi, lo):
+    """Last-PLAYER_WINDOW statistics of players whose history is stats[lo:hi] (oldest first).
+
+    Returns the maps played, ACS mean, K/D and the window mean of each
+    optional stat (NaN where a PlayerState has no value to average).
+    """
+    idx = hi[:, None] - PLAYER_WINDOW + np.arange(PLAYER_WINDOW)
+    valid = idx >= lo[:, None]
+    idx = np.maximum(idx, 0)
+
+    def window(col, skip_missing=False):
+        vals = stats[col][idx]
+        keep = valid & ~np.isnan(vals) if skip_missing else valid
+        return _column_sum(np.where(keep, vals, 0.0)), keep.sum(axis=1)
+
+    played = hi - lo
+    out = {'exp': played}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        acs_sum, n_recent = window('acs')
+        out['acs'] = acs_sum / n_recent
+        deaths = window('deaths')[0]
+        out['kd'] = window('kills')[0] / np.where(deaths > 1, deaths, 1)
+        for col in ('adr', 'kast', 'hs_pct', 'entry', 'clutches'):
+            total, n = window(col, skip_missing=True)
+            out[col] = np.where(n > 0, total / n, np.nan)
+    return out
+
+def _match_sides(df_matches, df_stats):
+    """Each stat row's match position (-1 if none), each side's stat rows, and the matches that train.
+
+    A match trains, i.e. becomes a feature row, when it has a winner and
+    stats for both rosters; rows follow df_matches order.
+    """
+    n_matches = len(df_matches)
+    t1, t2 = _numeric(df_matches, 'team1_id'), _numeric(df_matches, 'team2_id')
+    # `if not winner` skips None/0 only; a NaN winner still trains (and counts as a team 2 win)
+    played = df_matches['winner_id'].map(bool).to_numpy(dtype=bool, copy=True)
+    row_match = pd.Index(df_matches['id']).get_indexer(_numeric(df_stats, 'match_id'))
+    rm = np.maximum(row_match, 0)
+    team = _numeric(df_stats, 'team_id')
+    sides = [(row_match >= 0) & (team == t[rm]) for t in (t1, t2)]
+    for side in sides:
+        played &= np.bincount(rm[side], minlength=n_matches) > 0
+    return row_match, sides, played
+
+def build_features(df_matches, df_stats, df_players, state=False):
+    """Vectorised build_features_loop: the same return values, bit for bit.
+
+    With state, also returns the players and teams dicts replay_matches
+    would leave after df_matches, for the checkpoint.
+    """
+    player_ranks = dict(zip(df_players['id'], df_players['rank']))
+    n_matches = len(df_matches)
+    t1, t2 = _numeric(df_matches, 'team1_id'), _numeric(df_matches, 'team2_id')
+    winner = _numeric(df_matches, 'winner_id')
+
+    def score(col):
+        return np.array([v or 0 for v in df_matches[col]], dtype=float) if col in df_matches else np.zeros(n_matches)
+    s1, s2 = score('score_t1'), score('score_t2')
+
+    row_match, sides, played = _match_sides(df_matches, df_stats)
+    rm = np.maximum(row_match, 0)
+    seq = np.cumsum(played) - 1  # training order of played matches
+    n_played = int(played.sum())
+    stride = n_played + 1
+
+    # Player history: every stat row of a played match, by player, then training order
+    rows = np.flatnonzero((row_match >= 0) & played[rm])
+    rows = rows[np.argsort(seq[rm[rows]], kind='stable')]
+    pids = df_stats['player_id'].to_numpy()
+    p_code, p_ids = pd.factorize(pids[rows], use_na_sentinel=False)  # first-appearance order
+    r_seq = seq[rm[rows]]
+    order = np.lexsort((r_seq, p_code))
+    rows, p_code, r_seq = rows[order], p_code[order], r_seq[order]
+    p_key = p_code * stride + r_seq
+    fk, fd = _numeric(df_stats, 'fk'), _numeric(df_stats, 'fd')
+    stats = {col: _numeric(df_stats, col)[rows] for col in ('acs', 'kills', 'deaths', 'adr', 'kast', 'hs_pct', 'clutches')}
+    stats['entry'] = (fk - fd)[rows]
+    p_rank = np.array([get_rank_value(player_ranks.get(pid)) for pid in p_ids.tolist()], dtype=float)
+    p_start = np.searchsorted(p_key, np.arange(len(p_ids)) * stride)
+    p_end = np.searchsorted(p_key, np.arange(1, len(p_ids) + 1) * stride)
+
+    # Rosters: each side's distinct players in table order, with their state before the match
+    entries = pd.concat([
+        pd.DataFrame({'g': seq[rm[r]] * 2 + s, 'pid': pids[r], 'pos': r})
+        for s, side in enumerate(sides) for r in [np.flatnonzero(side & played[rm])]
+    ]).drop_duplicates(['g', 'pid']).sort_values(['g', 'pos'], kind='stable')
+    g = entries['g'].to_numpy()
+    code = pd.Index(p_ids).get_indexer(entries['pid'].to_numpy())
+    hi = np.searchsorted(p_key, code * stride + g // 2)
+    w = _player_windows(stats, hi, p_start[code])
+    rv = p_rank[code]
+    seen = w['exp'] > 0
+    per_player = {
+        'acs': np.where(seen, w['acs'], 140 + rv * 6),
+        'kd': np.where(seen, w['kd'], 0.4 + rv * 0.04),
+        'rank': rv,
+        'adr': np.where(np.isnan(w['adr']), 90 + rv * 4, w['adr']),
+        'kast': np.where(np.isnan(w['kast']), 55 + rv * 1, w['kast']),
+        'hs': np.where(np.isnan(w['hs_pct']), 15 + rv * 1, w['hs_pct']),
+        'entry': np.where(np.isnan(w['entry']), 0, w['entry']),
+        'clutch_rate': np.where(np.isnan(w['clutches']), 0, w['clutches']),
+    }
+    roster = {k: _ordered_mean(v, g, 2 * n_played).reshape(-1, 2) for k, v in per_player.items()}
+    roster['exp'] = np.bincount(g, weights=w['exp'], minlength=2 * n_played).reshape(-1, 2)
+
+    # Team history: two entries per played match (team 1 first), by team, then training order
+    ti = np.flatnonzero(played)
+    # Raw ids, so exported keys keep the column's type
+    t_ids = np.column_stack([df_matches['team1_id'].to_numpy()[ti], df_matches['team2_id'].to_numpy()[ti]]).ravel()
+    t_won = np.column_stack([winner[ti] == t1[ti], winner[ti] == t2[ti]]).ravel().astype(float)
+    t_rd = np.column_stack([s1[ti] - s2[ti], s2[ti] - s1[ti]]).ravel()
+    t_seq = np.repeat(np.arange(n_played), 2)
+    t_code, t_uniq = pd.factorize(t_ids, use_na_sentinel=False)
+    order = np.lexsort((t_seq, t_code))
+    t_key = t_code[order] * stride + t_seq[order]
+    won_cum = np.r_[0, np.cumsum(t_won[order])]
+    rd_sorted = t_rd[order]
+    rd_cum = np.r_[0, np.cumsum(np.nan_to_num(rd_sorted))]
+    nan_cum = np.r_[0, np.cumsum(np.isnan(rd_sorted))]
+    t_start = np.searchsorted(t_key, np.arange(len(t_uniq)) * stride)
+
+    def team_state(code, hi):
+        """(wr, form, rd) from history entries [start, hi) of each team; integer sums, so exact."""
+        lo = t_start[code]
+        n = hi - lo
+        recent = np.minimum(n, FORM_WINDOW)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            wr = (won_cum[hi] - won_cum[lo]) / n
+            form = (won_cum[hi] - won_cum[hi - recent]) / recent
+            rd = np.where(nan_cum[hi] > nan_cum[lo], np.nan, (rd_cum[hi] - rd_cum[lo]) / n)
+        return np.where(n > 0, wr, 0.5), np.where(n > 0, form, 0.5), np.where(n > 0, rd, 0), n
+
+    tm = [team_state(t_code[k::2], np.searchsorted(t_key, t_code[k::2] * stride + np.arange(n_played)))
+          for k in (0, 1)]
+
+    diff = lambda k: roster[k][:, 0] - roster[k][:, 1]
+    X = np.column_stack([
+        diff('acs'), diff('kd'), diff('rank'), diff('exp'),
+        tm[0][0] - tm[1][0], tm[0][1] - tm[1][1], tm[0][2] - tm[1][2],
+        diff('adr'), diff('kast'), diff('hs'), diff('entry'), diff('clutch_rate'),
+    ]) if n_played else np.empty((0, 12))
+    y = (winner[ti] == t1[ti]).astype(int)
+    seasons = df_matches['season_id'].to_numpy()[ti].tolist()
+
+    # Exported state: every player's and team's full history
+    w = _player_windows(stats, p_end, p_start)
+    cur_p = {}
+    for i, pid in enumerate(p_ids.tolist()):
+        rv = int(p_rank[i])
+        opt = lambda col, default: float(w[col][i]) if not np.isnan(w[col][i]) else default
+        cur_p[pid] = {
+            'acs': float(w['acs'][i]), 'kd': float(w['kd'][i]), 'exp': int(w['exp'][i]),
+            'adr': opt('adr', 90 + rv * 4), 'kast': opt('kast', 55 + rv * 1), 'hs_pct': opt('hs_pct', 15 + rv * 1),
+            'entry': opt('entry', 0), 'clutch_rate': opt('clutches', 0),
+        }
+    codes = np.arange(len(t_uniq))
+    t_end = np.searchsorted(t_key, (codes + 1) * stride)
+    wr, form, rd, _ = team_state(codes, t_end)
+    cur_t = {tid: {'wr': float(wr[i]), 'form': float(form[i]), 'rd': float(rd[i])}
+             for i, tid in enumerate(t_uniq.tolist())}
+    if not state:
+        return X, y, seasons, cur_p, cur_t
+
+    # The same histories as PlayerState rings and TeamState counters
+    ring_values = np.column_stack([stats[col] for col in PLAYER_STATS]).tolist()
+    players = {}
+    for i, pid in enumerate(p_ids.tolist()):
+        lo, hi = int(p_start[i]), int(p_end[i])
+        players[pid] = p = PlayerState()
+        for r in range(max(lo, hi - PLAYER_WINDOW), hi):
+            p.ring[(r - lo) % PLAYER_WINDOW] = tuple(ring_values[r])
+        p.maps = hi - lo
+    won = np.diff(won_cum).astype(int).tolist()
+    teams = {}
+    for i, tid in enumerate(t_uniq.tolist()):
+        lo, hi = int(t_start[i]), int(t_end[i])
+        teams[tid] = t = TeamState()
+        t.played, t.wins = hi - lo, sum(won[lo:hi])
+        t.rd_total = np.nan if nan_cum[hi] > nan_cum[lo] else float(rd_cum[hi] - rd_cum[lo])
+        for result in won[max(lo, hi - FORM_WINDOW):hi]:
+            t.recent = (t.recent << 1) | result
+    return X, y, seasons, cur_p, cur_t, players, teams
+
+FEATURE_OUTPUTS = ("features", "labels", "seasons", "player_stats", "team_stats")
+
+def feature_bytes(result):
+    """build_features' return values as bytes/text, so two builds compare bit for bit."""
+    X, y, seasons, cur_p, cur_t = result
+    return (np.asarray(X, dtype=float).reshape(-1, 12).tobytes(), np.asarray(y).astype(int).tobytes(),
+            json.dumps([str(x) for x in seasons]), json.dumps(cur_p), json.dumps(cur_t))
+
+def check_features(df_matches, df_stats, df_players):
+    """Build the features both ways and compare them bit for bit; exit status 1 on any difference."""
+    started = time.perf_counter()
+    expected = build_features_loop(df_matches, df_stats, df_players)
+    loop_s = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = build_features(df_matches, df_stats, df_players)
+    vec_s = time.perf_counter() - started
+    differs = [name for name, a, b in zip(FEATURE_OUTPUTS, feature_bytes(expected), feature_bytes(actual)) if a != b]
+    print(f"{len(expected[1])} feature rows · loop {loop_s:.2f}s · vectorised {vec_s:.2f}s")
+    if differs:
+        print("MISMATCH in " + ", ".join(differs))
+        return 1
+    print("Vectorised features are identical to the loop.")
+    return 0
+
+# --- Checkpoint ---
+# The nightly run resumes from the rolling state and feature rows of the
+# previous run and only replays matches completed since. Anything that
+# would make the result differ from a full replay falls back to one: the
+# checkpoint holds a digest of every processed match (its row and stat rows)
+# and the rank value of every player in its state, and any difference in
+# them rebuilds. It only has the state after its last match, so there is no
+# replaying from the first changed match; the vectorised rebuild is one pass.
+
+FEATURE_VERSION = 2  # bump with any feature formula or state layout change
+CHECKPOINT_PATH = "checkpoint/features.json"
+
+def _py(v):
+    """A NumPy scalar as its Python value, for JSON."""
+    return v.item() if isinstance(v, np.generic) else v
+
+def _match_digests(df_matches, df_stats):
+    """A hash of each match's row and stat rows over every column extract keeps, in df_matches order."""
+    ids = df_matches['id']
+    match = _digests(df_matches, TABLES['matches']).reindex(ids, fill_value=0).to_numpy(dtype=np.uint64)
+    stats = _digests(df_stats, TABLES['match_stats_map']).reindex(ids, fill_value=0).to_numpy(dtype=np.uint64)
+    return (match + stats).tolist()  # wraps around like the sums inside _digests
+
+def _rank_values(pids, df_players):
+    """get_rank_value of each player, the only form of the rank the features use."""
+    player_ranks = dict(zip(df_players['id'], df_players['rank']))
+    return [get_rank_value(player_ranks.get(pid)) for pid in pids]
+
+def make_checkpoint(df_matches, df_stats, df_players, players, teams, X, y, seasons):
+    """The state after every match of df_matches, as a JSON object (floats round-trip exactly)."""
+    ids = df_matches['id'].tolist()
+    pids = [_py(pid) for pid in players]
+    return {
+        'version': FEATURE_VERSION,
+        'last_match': ids[-1] if ids else None,
+        'matches': ids,
+        'digests': _match_digests(df_matches, df_stats),
+        'ranks': _rank_values(pids, df_players),
+        'players': [[pid, p.maps, p.ring] for pid, p in zip(pids, players.values())],
+        # rd_total as a float: the loop's is an int or float depending on the score columns' dtype
+        'teams': [[_py(tid), t.played, t.wins, float(t.rd_total), t.recent] for tid, t in teams.items()],
+        'features': np.asarray(X, dtype=float).reshape(-1, 12).tolist(),
+        'labels': np.asarray(y).astype(int).tolist(),
+        'seasons': [_py(v) for v in seasons],
+    }
+
+def _resume(ckpt, df_matches, df_stats, df_players):
+    """The checkpoint's state if it still describes a prefix of df_matches, else None (with the reason)."""
+    if ckpt is None:
+        return None
+    if ckpt.get('version') != FEATURE_VERSION:
+        print(f"Checkpoint is feature version {ckpt.get('version')}, not {FEATURE_VERSION}: full rebuild")
+        return None
+    done = ckpt['matches']
+    # New matches must sort after the checkpoint's (no late completions before it)
+    if df_matches['id'].iloc[:len(done)].tolist() != done:
+        print("Matches before the checkpoint changed: full rebuild")
+        return None
+    # Any column of a processed match or its stat rows edited, added or removed
+    digests = _match_digests(df_matches.iloc[:len(done)], df_stats)
+    changed = next((mid for mid, a, b in zip(done, digests, ckpt['digests']) if a != b), None)
+    if changed is not None:
+        print(f"Match {changed} or its stats changed since the checkpoint: full rebuild")
+        return None
+    # Resumed rows would keep the ranks they were built with
+    pids = [pid for pid, _, _ in ckpt['players']]
+    moved = sum(a != b for a, b in zip(_rank_values(pids, df_players), ckpt['ranks']))
+    if moved:
+        print(f"Ranks of {moved} checkpointed players changed: full rebuild")
+        return None
+    players = {}
+    for pid, maps, ring in ckpt['players']:
+        players[pid] = p = PlayerState()
+        p.maps, p.ring = maps, [tuple(v) if v is not None else None for v in ring]
+    teams = {}
+    for tid, played, wins, rd_total, recent in ckpt['teams']:
+        teams[tid] = t = TeamState()
+        t.played, t.wins, t.rd_total, t.recent = played, wins, rd_total, recent
+    X = np.array(ckpt['features'], dtype=float).reshape(-1, 12)
+    y = np.array(ckpt['labels'], dtype=int)
+    return players, teams, X, y, list(ckpt['seasons']), len(done)
+
+def update_features(df_matches, df_stats, df_players, ckpt=None):
+    """build_features' values, resuming from ckpt when it applies, plus the checkpoint for the next run.
+
+    A resumed run returns what a full rebuild from the current tables would.
+    """
+    resumed = _resume(ckpt, df_matches, df_stats, df_players)
+    if resumed is None:
+        X, y, seasons, cur_p, cur_t, players, teams = build_features(df_matches, df_stats, df_players, state=True)
+    else:
+        players, teams, X, y, seasons, n_done = resumed
+        print(f"Resuming after match {ckpt['last_match']}: {len(df_matches) - n_done} new matches")
+        features, labels, new_seasons = replay_matches(df_matches.iloc[n_done:], df_stats, df_players, players, teams)
+        X = np.vstack([X, np.array(features, dtype=float).reshape(-1, 12)])
+        y = np.concatenate([y, np.array(labels, dtype=int)])
+        seasons += new_seasons
+        cur_p, cur_t = export_state(players, teams, df_players)
+    return X, y, seasons, cur_p, cur_t, make_checkpoint(df_matches, df_stats, df_players, players, teams, X, y, seasons)
+
+# --- Backtest ---
+# Walk forward through the league week by week: the model is refit on every
+# earlier week and scored on the next one, as it would have been live.
+
+MIN_TRAIN_ROWS = 20  # a normal run's floor too
+
+def _backtest_week(X_train, y_train, X_test):
+    """Fit on the weeks so far and predict the next one (runs in a worker process)."""
+    scaler = StandardScaler().fit(X_train)
+    model = fit_logreg(scaler.transform(X_train), y_train, cv_folds(y_train), n_jobs=1)
+    return model.predict_proba(scaler.transform(X_test))[:, 1], float(model.C_[0])
+
+def _scores(y, proba):
+    """accuracy/auc/logLoss of predictions, as metrics.json reports them."""
+    auc = roc_auc_score(y, proba) if len(set(y)) > 1 else None
+    return {
+        "accuracy": float(accuracy_score(y, (proba > 0.5).astype(int))),
+        "auc": float(auc) if auc is not None else None,
+        "logLoss": float(log_loss(y, proba, labels=[0, 1])),
+    }
+
+def backtest(df_matches, df_stats, X, y):
+    """Per-week walk-forward results for the feature rows of df_matches (see build_features).
+
+    A week is a (season, week) pair, with a season's matches without a week
+    (playoffs) after its last one. Weeks are refit in a process pool; those
+    with fewer than MIN_TRAIN_ROWS earlier rows, or too few of either class
+    for the CV folds, are not scored.
+    """
+    if 'week' not in df_matches:
+        raise RuntimeError("Backtest needs the matches' week column")
+    trained = df_matches[_match_sides(df_matches, df_stats)[2]]
+    week = pd.to_numeric(trained['week'], errors='coerce').to_numpy(dtype=float)
+    blocks = pd.DataFrame({'season': trained['season_id'].to_numpy(), 'week': np.nan_to_num(week, nan=np.inf)})
+    block = blocks.groupby(['season', 'week'], sort=True, dropna=False).ngroup().to_numpy()  # in time order
+    order = blocks.assign(block=block).drop_duplicates('block').set_index('block').sort_index()
+
+    jobs, results = {}, []
+    with ProcessPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+        for b in range(len(order)):
+            train, test = block < b, block == b
+            if train.sum() < MIN_TRAIN_ROWS or np.bincount(y[train], minlength=2).min() < CV_FOLDS:
+                continue
+            jobs[b] = pool.submit(_backtest_week, X[train], y[train], X[test])
+        for b, job in jobs.items():
+            proba, C = job.result()
+            test = block == b
+            season, wk = order.loc[b, 'season'], order.loc[b, 'week']
+            results.append({
+                "season": season if isinstance(season, str) else None, "week": int(wk) if np.isfinite(wk) else None,
+                "n_train": int((block < b).sum()), "n_test": int(test.sum()), "C": C,
+                **_scores(y[test], proba), "proba": proba,
+            })
+
+    scored = np.concatenate([r.pop("proba") for r in results]) if results else np.empty(0)
+    y_scored = np.concatenate([y[block == b] for b in jobs]) if results else np.empty(0, dtype=int)
+    return {"weeks": results, "overall": {"n_test": int(len(y_scored)), **(_scores(y_scored, scored) if results else {})}}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Train the match prediction model and publish its artifacts.")
+    ap.add_argument("--check-features", action="store_true",
+                    help="Build the features with the loop and vectorised builders, compare them and exit (publishes nothing)")
+    ap.add_argument("--backtest", action="store_true",
+                    help="Walk forward week by week, refitting on the weeks before each; writes training/output/backtest.json (publishes nothing)")
+    ap.add_argument("--full-rebuild", action="store_true",
+                    help="Ignore the feature checkpoint and the local data snapshot: refetch and replay every match")
+    args = ap.parse_args(argv)
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("Error: Missing Supabase credentials. Ensure NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (or NEXT_PUBLIC_SUPABASE_ANON_KEY) are set in environment or .env.local")
+        return
+
+    from supabase import create_client  # here, so the feature code imports without it (tests)
+    sb = create_client(SUPABASE_URL, SUPABASE_KEY)
+    timings = {}
+    print("Extracting data...")
+    with timed(timings, "extract"):
+        df_matches, df_stats, df_players = load_tables(sb, refresh=args.full_rebuild)
+        df_matches = df_matches.sort_values(['season_id', 'id'])
+
+    print("Building features...")
+    if args.check_features:
+        return check_features(df_matches, df_stats, df_players)
+    if args.backtest:
+        started = time.perf_counter()
+        X, y, *_ = build_features(df_matches, df_stats, df_players)
+        print("Backtesting...")
+        results = backtest(df_matches, df_stats, X, y)
+        results["seconds"] = round(time.perf_counter() - started, 3)
+        results["updatedAt"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        os.makedirs("training/output", exist_ok=True)
+        with open("training/output/backtest.json", "w") as f: json.dump(results, f)
+        overall = results["overall"]
+        if not results["weeks"]:
+            print("No week had enough earlier matches to backtest.")
+        else:
+            print(f"{len(results['weeks'])} weeks · {overall['n_test']} matches · accuracy {overall['accuracy']:.3f} · "
+                  f"log loss {overall['logLoss']:.3f} · {results['seconds']}s")
+        return 0
+    with timed(timings, "features"):
+        ckpt = None if args.full_rebuild else download_json(sb, CHECKPOINT_PATH)
+        X, y, seasons, cur_p, cur_t, ckpt = update_features(df_matches, df_stats, df_players, ckpt)
+
+    print("Training model...")
     if len(X) < 20:
         raise RuntimeError("Not enough completed matches with stats to train")
 
@@ -151,25 +705,31 @@ def main():
         "diff_adr", "diff_kast", "diff_hs", "diff_entry", "diff_clutch"
     ]
 
-    # Holdout split for honest accuracy/AUC/log-loss reporting
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=True, random_state=42, stratify=y)
-    eval_scaler = StandardScaler()
-    X_train_s = eval_scaler.fit_transform(X_train)
-    X_test_s = eval_scaler.transform(X_test)
-    eval_model = LogisticRegressionCV(Cs=LOGREG_CS, cv=5, max_iter=2000, scoring='neg_log_loss').fit(X_train_s, y_train)
-    y_pred = eval_model.predict(X_test_s)
-    y_proba = eval_model.predict_proba(X_test_s)[:, 1]
-    accuracy = accuracy_score(y_test, y_pred)
-    try:
-        auc = roc_auc_score(y_test, y_proba) if len(set(y_test)) > 1 else None
-    except ValueError:
-        auc = None
-    logloss = log_loss(y_test, y_proba, labels=[0, 1])
+    # Holdout split for honest accuracy/AUC/log-loss reporting. The CV folds are
+    # drawn once over every row, so the refit's folds extend the evaluation's.
+    fold = cv_folds(y)
+    with timed(timings, "evaluate"):
+        idx_train, idx_test = train_test_split(np.arange(len(y)), test_size=0.2, shuffle=True, random_state=42, stratify=y)
+        X_train, X_test, y_train, y_test = X[idx_train], X[idx_test], y[idx_train], y[idx_test]
+        eval_scaler = StandardScaler()
+        X_train_s = eval_scaler.fit_transform(X_train)
+        X_test_s = eval_scaler.transform(X_test)
+        eval_model = fit_logreg(X_train_s, y_train, fold[idx_train])
+        y_pred = eval_model.predict(X_test_s)
+        y_proba = eval_model.predict_proba(X_test_s)[:, 1]
+        accuracy = accuracy_score(y_test, y_pred)
+        try:
+            auc = roc_auc_score(y_test, y_proba) if len(set(y_test)) > 1 else None
+        except ValueError:
+            auc = None
+        logloss = log_loss(y_test, y_proba, labels=[0, 1])
 
-    # Refit on the full dataset for the deployed artifacts
-    scaler = StandardScaler()
-    X_s = scaler.fit_transform(X)
-    model = LogisticRegressionCV(Cs=LOGREG_CS, cv=5, max_iter=2000, scoring='neg_log_loss').fit(X_s, y)
+    # Refit on the full dataset for the deployed artifacts; the scaler adds the
+    # holdout rows to the training rows' running statistics
+    with timed(timings, "refit"):
+        scaler = copy.deepcopy(eval_scaler).partial_fit(X_test)
+        X_s = scaler.transform(X)
+        model = fit_logreg(X_s, y, fold)
 
     version = str(int(time.time()))
     updated_at = time.strftime("%Y-%m-%d %H:%M:%S")
@@ -190,6 +750,7 @@ def main():
         "n_train": int(len(X_train)),
         "n_test": int(len(X_test)),
         "C": float(model.C_[0]),
+        "timings": timings,
         "version": version,
         "updatedAt": updated_at
     }
@@ -200,25 +761,9 @@ def main():
     with open("training/output/scalers.json", "w") as f: json.dump(scalers_json, f)
     with open("training/output/metrics.json", "w") as f: json.dump(metrics_json, f)
 
-    cur_p = {}
-    for pid, h in player_history.items():
-        p_info = df_players[df_players['id'] == pid]
-        rv = get_rank_value(p_info['rank'].iloc[0] if not p_info.empty else None)
-        recent = h[-5:]
-        adr_v, kast_v, hs_v, entry_v, clutch_v = history_mean(h, 'adr'), history_mean(h, 'kast'), history_mean(h, 'hs_pct'), history_mean(h, 'entry'), history_mean(h, 'clutches')
-        cur_p[pid] = {
-            'acs': float(np.mean([x['acs'] for x in recent])),
-            'kd': float(sum([x['kills'] for x in recent]) / max(1, sum([x['deaths'] for x in recent]))),
-            'exp': len(h),
-            'adr': adr_v if adr_v is not None else 90 + rv * 4,
-            'kast': kast_v if kast_v is not None else 55 + rv * 1,
-            'hs_pct': hs_v if hs_v is not None else 15 + rv * 1,
-            'entry': entry_v if entry_v is not None else 0,
-            'clutch_rate': clutch_v if clutch_v is not None else 0,
-        }
-    cur_t = {tid: {'wr': float(sum([1 for x in h if x['won']]) / len(h)), 'form': float(sum([1 for x in h[-3:] if x['won']]) / len(h[-3:])), 'rd': float(np.mean([x['rd'] for x in h]))} for tid, h in team_history.items()}
     with open("training/output/player_stats.json", "w") as f: json.dump(cur_p, f)
     with open("training/output/team_stats.json", "w") as f: json.dump(cur_t, f)
+    with open("training/output/checkpoint.json", "w") as f: json.dump(ckpt, f)
 
     print("Publishing artifacts to Supabase Storage...")
     upload_json(sb, "current/model.json", model_json)
@@ -226,7 +771,8 @@ def main():
     upload_json(sb, "current/metrics.json", metrics_json)
     upload_json(sb, "current/player_stats.json", cur_p)
     upload_json(sb, "current/team_stats.json", cur_t)
+    upload_json(sb, CHECKPOINT_PATH, ckpt)
     print("Training finished.")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())